@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+TailorCV batch renderer - renders many tailored resumes to PDF offline
+
+Usage (from tailorcv-backend/):
+    python -m admin.render_batch /tmp/tailorcv/generations --out rendered/
+    python -m admin.render_batch resumes.jsonl --out rendered/ --template premium_resume
+    cat resumes.jsonl | python -m admin.render_batch - --out rendered/ --workers 4
+
+Input is a directory of JSON files or a JSONL file ('-' for stdin), one resume
+per file or line. A record is either the tailored content itself or a stored
+generation (an object with a `content` field), so the generation store directory
+can be re-rendered as is, e.g. after a template update. PDFs are named after the
+file, the record's `id`, or the line number.
+
+Resumes are shaped to the template and rendered with LaTeXService on a process
+pool, one process per core by default; pdflatex is single-threaded, so this keeps
+every core busy. LaTeXService falls back to PDFFallbackService (ReportLab) when a
+compile fails, and --renderer reportlab renders with the fallback only. Progress
+is printed per resume and throughput at the end. The run exits non-zero if any
+resume failed.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from dotenv import load_dotenv
+
+from services.latex_service import LaTeXService
+from services.resume_shaper import shape_resume
+from services.template_env import template_names
+
+load_dotenv()
+
+# Renders queued per worker; the input is read lazily, so a long stream is never held in memory
+QUEUE_DEPTH = 4
+
+# Per worker process, set by init_worker
+_latex_service = None
+_renderer = None
+
+def read_records(source: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (name, record) pairs from a directory of JSON files or a JSONL file ('-' for stdin).
+    A record that is not valid JSON is yielded as None.
+    """
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(source, file_name), 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                record = None
+            yield file_name[:-len('.json')], record
+        return
+
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            name = record.get('id') if isinstance(record, dict) else None
+            # Ids become file names, so nothing in them may point outside the output directory
+            name = re.sub(r'[^\w.-]', '_', str(name)).lstrip('.') if name else None
+            yield name or f"resume_{line_number:05d}", record
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def resume_content(record: Any) -> Optional[Dict[str, Any]]:
+    """
+    The tailored content of a record: the record itself, or the `content` of a stored generation
+    """
+    if isinstance(record, dict) and isinstance(record.get('content'), dict):
+        return record['content']
+    return record if isinstance(record, dict) else None
+
+def init_worker(renderer: str) -> None:
+    global _latex_service, _renderer
+    _latex_service = LaTeXService()
+    _renderer = renderer
+
+def render_one(name: str, content: Dict[str, Any], template_name: str, out_dir: str,
+               fit_one_page: bool, watermark: bool) -> Dict[str, Any]:
+    """
+    Shape and render one resume and write the PDF. Runs in a worker process.
+    """
+    start = time.perf_counter()
+    content, trimmed = shape_resume(content, template_name)
+    if _renderer == 'reportlab':
+        pdf_bytes = _latex_service.fallback_service.generate_pdf(content)
+    elif fit_one_page:
+        pdf_bytes, _ = _latex_service.render_one_page(template_name, content)
+    else:
+        pdf_bytes = _latex_service.render_pdf(template_name, content)
+    if not pdf_bytes:
+        raise RuntimeError("PDF generation returned empty result")
+    if watermark:
+        pdf_bytes = _latex_service.apply_watermark(pdf_bytes)
+
+    path = os.path.join(out_dir, f"{name}.pdf")
+    with open(path, 'wb') as f:
+        f.write(pdf_bytes)
+    return {'path': path, 'bytes': len(pdf_bytes), 'trimmed': len(trimmed), 'seconds': time.perf_counter() - start}
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def main() -> int:
+    templates = [name[:-len('.tex')] for name in template_names() if name != 'cover_letter.tex']
+    parser = argparse.ArgumentParser(description='Render tailored resume JSON files to PDF in parallel')
+    parser.add_argument('source', help="Directory of JSON files, or a JSONL file ('-' for stdin)")
+    parser.add_argument('--out', required=True, help='Directory the PDFs are written to')
+    parser.add_argument('--template', default='jakes_resume', choices=templates)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Render processes (default: one per core)')
+    parser.add_argument('--renderer', default='latex', choices=['latex', 'reportlab'],
+                        help='latex falls back to ReportLab per resume when a compile fails')
+    parser.add_argument('--fit-one-page', action='store_true', help='Fit each resume onto one page')
+    parser.add_argument('--watermark', action='store_true', help='Stamp the free-tier watermark onto the PDFs')
+    args = parser.parse_args()
+
+    if args.source != '-' and not os.path.exists(args.source):
+        print(f"❌ Error: {args.source} does not exist")
+        return 1
+    os.makedirs(args.out, exist_ok=True)
+    workers = max(1, args.workers)
+    if args.renderer == 'latex' and not shutil.which('pdflatex'):
+        print("⚠️  pdflatex not found; every resume will be rendered with ReportLab")
+    print(f"Rendering {args.source} with {args.template} ({args.renderer}) on {workers} process(es) into {args.out}")
+
+    durations = []
+    failures = []
+    total_bytes = 0
+    start = time.perf_counter()
+
+    def report(future, name):
+        nonlocal total_bytes
+        done = len(durations) + len(failures) + 1
+        try:
+            result = future.result()
+        except Exception as e:
+            failures.append(name)
+            print(f"[{done}] ❌ {name}: {e}")
+            return
+        durations.append(result['seconds'])
+        total_bytes += result['bytes']
+        rate = len(durations) / (time.perf_counter() - start)
+        trimmed = f", {result['trimmed']} item(s) trimmed" if result['trimmed'] else ''
+        print(f"[{done}] ✅ {result['path']} ({result['seconds']:.2f}s{trimmed}) {rate:.1f} resumes/s")
+
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(args.renderer,)) as executor:
+        for name, record in read_records(args.source):
+            content = resume_content(record)
+            if content is None:
+                failures.append(name)
+                print(f"[{len(durations) + len(failures)}] ❌ {name}: not a resume JSON object")
+                continue
+            future = executor.submit(render_one, name, content, args.template, args.out,
+                                     args.fit_one_page, args.watermark)
+            pending[future] = name
+            # Keep every worker busy without reading the whole input up front
+            if len(pending) >= workers * QUEUE_DEPTH:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report(future, pending.pop(future))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                report(future, pending.pop(future))
+
+    elapsed = time.perf_counter() - start
+    print("=" * 50)
+    print(f"Rendered {len(durations)} resume(s), {len(failures)} failed, in {elapsed:.1f}s")
+    if durations:
+        print(f"Throughput: {len(durations) / elapsed:.2f} resumes/s, {total_bytes / elapsed / 1024:.0f} KB/s written")
+        print(f"Per resume: mean {sum(durations) / len(durations):.2f}s, "
+              f"p50 {percentile(durations, 0.5):.2f}s, p95 {percentile(durations, 0.95):.2f}s")
+    if failures:
+        print(f"Failed: {', '.join(failures[:20])}{' ...' if len(failures) > 20 else ''}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
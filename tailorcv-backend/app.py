@@ -15,18 +15,28 @@ print("-----------------------------")
 
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
-import tempfile
+import io
 import json
+import zipfile
+import re
+import time
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 from services.gemini_service import GeminiService
 from services.supabase_service import SupabaseService
 from services.linkedin_service import LinkedInService
 from services.pdf_service import PDFService
-from services.latex_service import LaTeXService
+from services.latex_service import LaTeXService, COVER_LETTER_TEMPLATE
 from services.email_service import EmailService
 from services.auth_service import AuthService
-from utils.validators import validate_email, validate_file
+from services.artifact_store import ArtifactStore
+from services.render_jobs import RenderJobQueue
+from services.generation_store import GenerationStore
+from services.resume_shaper import shape_resume
+from utils.validators import validate_email, validate_file, validate_resume_data
 from utils.rate_limiter import standard_limiter, premium_limiter
+from utils.metrics import metrics, timed, record_cache, resume_trims
+from utils.profiler import RequestProfiler, propagate
 import uuid
 
 # Load .env first, then override with .env.local for development
@@ -39,7 +49,15 @@ if os.path.exists('.env.local'):
 print(f"GEMINI_API_KEY: {os.environ.get('GEMINI_API_KEY', 'NOT_SET')}")
 
 app = Flask(__name__)
-CORS(app)
+# Expose the artifact headers so the frontend can re-download generated PDFs
+CORS(app, expose_headers=['ETag', 'X-Artifact-Id', 'Content-Range', 'X-Profile-Id', 'X-Resume-Trimmed', 'X-Page-Fit', 'X-Render-Job', 'X-Generation-Id', 'X-Changed-Sections', 'X-Cover-Letter-Id', 'X-Cover-Letter-Job'])
+
+# Artifacts are content-addressed, so clients may cache a download for as long as it is stored
+PDF_CACHE_MAX_AGE = int(os.environ.get('ARTIFACT_TTL_SECONDS', 3600))
+RESUME_TEMPLATES = ['free_resume', 'premium_resume', 'jakes_resume']
+
+artifact_disk_bytes = metrics.gauge('tailorcv_artifact_disk_bytes', 'Disk used by the generated PDF artifact store')
+artifact_memory_bytes = metrics.gauge('tailorcv_artifact_memory_bytes', 'Memory used by the artifact store hot tier in this worker')
 
 # --- Graceful Service Initialization ---
 service_status = {}
@@ -62,6 +80,34 @@ pdf_service = initialize_service('PDF', PDFService)
 latex_service = initialize_service('LaTeX', LaTeXService)
 email_service = initialize_service('Email', EmailService)
 auth_service = initialize_service('Auth', AuthService)
+artifact_store = initialize_service('Artifacts', ArtifactStore)
+generation_store = initialize_service('Generations', GenerationStore)
+
+# Load every template before the worker accepts traffic
+if latex_service:
+    try:
+        print(f"✅ Warmed up {latex_service.warm_up()} LaTeX templates")
+    except Exception as e:
+        print(f"⚠️ Template warm-up failed: {e}")
+
+# Created after load_dotenv so PROFILER_TOKEN can come from .env
+request_profiler = RequestProfiler()
+# Final LaTeX renders behind draft-first previews; results are shared through the artifact store
+render_jobs = RenderJobQueue(artifact_store) if artifact_store else None
+# LLM calls of batch generations. Shared by every batch in this worker, so concurrent
+# batches together stay under the provider's concurrency limit.
+batch_llm_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BATCH_LLM_CONCURRENCY', 4)), thread_name_prefix='batch-llm'
+)
+BATCH_MAX_JOBS = int(os.environ.get('BATCH_MAX_JOBS', 50))
+# Zip responses hold a request worker until every PDF is done, so only small batches get
+# them (and by default); larger batches are answered with job ids
+BATCH_ZIP_MAX_JOBS = int(os.environ.get('BATCH_ZIP_MAX_JOBS', 3))
+# Items of a zip response not done by then are reported as failed in the manifest,
+# well inside gunicorn's 120 s worker timeout
+BATCH_ZIP_TIMEOUT_SECONDS = float(os.environ.get('BATCH_ZIP_TIMEOUT_SECONDS', 75))
+# Rate-limit cost of re-rendering or editing a generation, charged only when it compiles
+RERENDER_RATE_COST = int(os.environ.get('RERENDER_RATE_COST', 1))
 
 
 def get_current_user():
@@ -76,6 +122,133 @@ def get_current_user():
         return auth_service.get_user_by_session(session_token)
     return None
 
+def send_pdf(pdf_bytes, artifact_id, path=None):
+    """
+    Send a PDF with its content hash as the ETag. Werkzeug answers If-None-Match
+    with 304 and serves byte ranges; `path` lets send_file use the stored file directly.
+    """
+    source = path if path else io.BytesIO(pdf_bytes)
+    response = send_file(
+        source,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name='Tailored_Resume.pdf',
+        etag=artifact_id,
+        conditional=True,
+        max_age=PDF_CACHE_MAX_AGE
+    )
+    response.headers['X-Artifact-Id'] = artifact_id
+    return response
+
+def store_pdf(pdf_bytes, clean_pdf_bytes):
+    """
+    Keep a generated PDF for later downloads, linked to its unwatermarked copy.
+    Returns the artifact id.
+    """
+    artifact_id = ArtifactStore.content_id(pdf_bytes)
+    if artifact_store:
+        try:
+            artifact_store.put(pdf_bytes)
+            if pdf_bytes is not clean_pdf_bytes:
+                # Lets the user re-download without the watermark after upgrading
+                artifact_store.link(artifact_id, artifact_store.put(clean_pdf_bytes))
+        except Exception as e:
+            print(f"Failed to store generated PDF: {e}")
+    return artifact_id
+
+def render_clean_pdf(template_name, tailored_content, fit_one_page):
+    """
+    Render the unwatermarked PDF, fitted onto one page when asked.
+    Returns the PDF and the page fit summary (None without fitting).
+    """
+    if not fit_one_page:
+        return latex_service.render_pdf(template_name, tailored_content), None
+    clean_pdf_bytes, page_fit = latex_service.render_one_page(template_name, tailored_content)
+    print(f"One-page fit: predicted {page_fit['predicted_pages']} page(s), {page_fit['layout']} layout, "
+          f"{page_fit['pages']} page(s) after {page_fit['compiles']} compile(s)")
+    return clean_pdf_bytes, page_fit
+
+def record_trims(template_name, trimmed):
+    if not trimmed:
+        return
+    print(f"Trimmed {len(trimmed)} item(s) to fit {template_name}: {', '.join(item['path'] for item in trimmed[:10])}")
+    for item in trimmed:
+        resume_trims.inc(section=re.split(r'[\[.]', item['path'], maxsplit=1)[0], action=item['action'])
+
+def send_resume(pdf_bytes, artifact_id, trimmed, page_fit=None):
+    """
+    send_pdf plus the headers describing how the content was fitted to the template
+    """
+    response = send_pdf(pdf_bytes, artifact_id)
+    if trimmed:
+        response.headers['X-Resume-Trimmed'] = str(len(trimmed))
+    if page_fit:
+        response.headers['X-Page-Fit'] = f"layout={page_fit['layout']}; pages={page_fit['pages']}; compiles={page_fit['compiles']}"
+    return response
+
+def render_final(template_name, tailored_content, is_premium, fit_one_page, cover_letter_page=False):
+    """
+    Render the LaTeX PDF behind a draft-first preview or a batch item and store it.
+    Returns the artifact id.
+    """
+    clean_pdf_bytes, _ = render_clean_pdf(template_name, tailored_content, fit_one_page)
+    if not clean_pdf_bytes:
+        raise RuntimeError("PDF generation returned empty result")
+    if cover_letter_page:
+        clean_pdf_bytes = latex_service.append_pdf(clean_pdf_bytes, render_cover_letter(tailored_content))
+    pdf_bytes = clean_pdf_bytes if is_premium else latex_service.apply_watermark(clean_pdf_bytes)
+    return store_pdf(pdf_bytes, clean_pdf_bytes)
+
+def load_resume_text(linkedin_profile_url, uploaded_resume):
+    """
+    Resume text from a LinkedIn profile or an uploaded PDF.
+    Returns the text and None, or None and an error response.
+    """
+    if linkedin_profile_url:
+        print(f"Fetching LinkedIn profile: {linkedin_profile_url}")
+        try:
+            with timed('linkedin_fetch'):
+                return linkedin_service.extract_profile_data(linkedin_profile_url), None
+        except Exception as e:
+            return None, (jsonify({"error": f"Failed to fetch LinkedIn profile: {str(e)}"}), 500)
+
+    if not validate_file(uploaded_resume):
+        return None, (jsonify({"error": "Invalid file type or size"}), 400)
+
+    print(f"Processing uploaded resume: {uploaded_resume.filename}")
+    try:
+        with timed('pdf_extract'):
+            return pdf_service.extract_text_from_pdf(uploaded_resume), None
+    except Exception as e:
+        return None, (jsonify({"error": f"Failed to extract text from PDF: {str(e)}"}), 500)
+
+def parse_cover_letter_option(value):
+    """
+    The cover_letter form field: 'page' appends the letter to the resume PDF,
+    'separate' (or any other true value) stores it as its own PDF
+    """
+    value = (value or '').lower()
+    if value == 'page':
+        return 'page'
+    if value in ('separate', '1', 'true', 'yes'):
+        return 'separate'
+    return None
+
+def render_cover_letter(tailored_content, draft=False):
+    if draft:
+        return latex_service.render_draft(tailored_content, COVER_LETTER_TEMPLATE)
+    return latex_service.render_cover_letter(tailored_content)
+
+def store_cover_letter(tailored_content, is_premium, draft=False):
+    """
+    Render the cover letter as a separate PDF and store it. Returns the artifact id.
+    """
+    clean_pdf_bytes = render_cover_letter(tailored_content, draft)
+    if not clean_pdf_bytes:
+        raise RuntimeError("Cover letter generation returned empty result")
+    pdf_bytes = clean_pdf_bytes if is_premium else latex_service.apply_watermark(clean_pdf_bytes)
+    return store_pdf(pdf_bytes, clean_pdf_bytes)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     # The service is "healthy" if it can respond to requests.
@@ -86,9 +259,23 @@ def health_check():
     return jsonify({
         "status": "healthy" if core_services_loaded else "degraded",
         "timestamp": datetime.now().isoformat(),
-        "services": service_status
+        "services": service_status,
+        "artifacts": artifact_store.get_stats() if artifact_store else None,
+        "render_jobs": render_jobs.get_stats() if render_jobs else None
     }), status_code
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Export stage latency histograms, fallback rate and cache hit ratios for this worker
+    """
+    if artifact_store:
+        stats = artifact_store.get_stats()
+        artifact_disk_bytes.set(stats['disk_usage_bytes'])
+        artifact_memory_bytes.set(stats['memory_usage_bytes'])
+
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/auth/google', methods=['POST'])
 def google_auth():
     """
@@ -216,15 +403,28 @@ def generate_resume():
     if not gemini_service or not latex_service or not supabase_service:
         return jsonify({"error": "One or more services required for resume generation are unavailable."}), 503
 
+    # Admin-requested profiling; unprofiled requests skip straight to the pipeline
+    if request_profiler.is_requested(request):
+        with request_profiler.capture() as profiler:
+            with timed('total'):
+                response = app.make_response(_generate_resume())
+        response.headers['X-Profile-Id'] = request_profiler.save(profiler, 'generate_resume')
+        return response
+
+    with timed('total'):
+        return _generate_resume()
+
+def _generate_resume():
     try:
         # Check rate limit
         client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR'))
-        user = get_current_user()
-        
-        is_premium = False
-        if user:
-            premium_status = auth_service.check_premium_status_authenticated(user['id'])
-            is_premium = premium_status['is_premium']
+        with timed('auth'):
+            user = get_current_user()
+            
+            is_premium = False
+            if user:
+                premium_status = auth_service.check_premium_status_authenticated(user['id'])
+                is_premium = premium_status['is_premium']
         
         # Use the appropriate rate limiter based on premium status
         if is_premium:
@@ -235,7 +435,9 @@ def generate_resume():
         # The key for the rate limiter is the user's ID if they are logged in, otherwise their IP.
         limiter_key = user['id'] if user else client_ip
 
-        if not limiter.allow_request(limiter_key):
+        with timed('rate_limit'):
+            allowed = limiter.allow_request(limiter_key)
+        if not allowed:
             return jsonify({"error": "Rate limit exceeded. Please try again later."}), 429
 
         data = request.form
@@ -243,6 +445,9 @@ def generate_resume():
         linkedin_profile_url = data.get('linkedin_url')
         uploaded_resume = request.files.get('resume')
         template_name = data.get('template', 'jakes_resume')
+        fit_one_page = data.get('fit_one_page', '').lower() in ('1', 'true', 'yes')
+        draft_first = data.get('draft', '').lower() in ('1', 'true', 'yes') and render_jobs is not None
+        cover_letter = parse_cover_letter_option(data.get('cover_letter'))
 
         if not job_description:
             return jsonify({"error": "Job description is required"}), 400
@@ -257,65 +462,574 @@ def generate_resume():
             else:
                 return jsonify({"error": "Either LinkedIn URL or a resume file is required"}), 400
 
-        if template_name not in ['free_resume', 'premium_resume', 'jakes_resume']:
+        if template_name not in RESUME_TEMPLATES:
             return jsonify({"error": "Invalid template name"}), 400
 
         # Process input
-        if linkedin_profile_url:
-            print(f"Fetching LinkedIn profile: {linkedin_profile_url}")
-            try:
-                profile_data = linkedin_service.extract_profile_data(linkedin_profile_url)
-                resume_text = profile_data
-            except Exception as e:
-                return jsonify({"error": f"Failed to fetch LinkedIn profile: {str(e)}"}), 500
-
-        elif uploaded_resume:
-            if not validate_file(uploaded_resume):
-                return jsonify({"error": "Invalid file type or size"}), 400
-
-            print(f"Processing uploaded resume: {uploaded_resume.filename}")
-            try:
-                resume_text = pdf_service.extract_text_from_pdf(uploaded_resume)
-            except Exception as e:
-                return jsonify({"error": f"Failed to extract text from PDF: {str(e)}"}), 500
+        if linkedin_profile_url or uploaded_resume:
+            resume_text, error_response = load_resume_text(linkedin_profile_url, uploaded_resume)
+            if error_response:
+                return error_response
         
         # Use Gemini to tailor the resume
         print("Generating tailored content with Gemini...")
         try:
-            tailored_content = gemini_service.optimize_resume(resume_text, job_description)
+            # The cover letter comes out of the same LLM call as the resume
+            tailored_content = gemini_service.optimize_resume(resume_text, job_description,
+                                                              include_cover_letter=cover_letter is not None)
         except Exception as e:
             return jsonify({"error": f"Failed to generate optimized resume content: {str(e)}"}), 500
         
         # Validate that we received proper data structure
         if not isinstance(tailored_content, dict):
             return jsonify({"error": "Invalid response format from AI service"}), 500
+        if cover_letter and not (tailored_content.get('coverLetter') or {}).get('paragraphs'):
+            print("Cover letter requested but missing from the tailored content")
+            cover_letter = None
 
-        # Generate LaTeX PDF
+        # Keep the tailored content so switching templates does not need the LLM again
+        generation_id = None
+        if generation_store:
+            try:
+                generation_id = generation_store.put(tailored_content, user['id'] if user else None)
+            except Exception as e:
+                print(f"Failed to store tailored content: {e}")
+
+        # Bound what reaches the renderer: per-section budgets and a target page count for the template
+        with timed('shape'):
+            tailored_content, trimmed = shape_resume(tailored_content, template_name)
+
+        # Generate LaTeX PDF. Free and premium share one render; free downloads get the watermark stamped on.
         print(f"Generating PDF with template: {template_name}.tex")
+        page_fit = None
         try:
-            pdf_bytes = latex_service.generate_pdf(template_name, tailored_content, is_premium)
+            if draft_first:
+                # Answer with a ReportLab preview now; the LaTeX PDF is fetched later by job id
+                clean_pdf_bytes = latex_service.render_draft(tailored_content)
+            else:
+                clean_pdf_bytes, page_fit = render_clean_pdf(template_name, tailored_content, fit_one_page)
+                if page_fit:
+                    trimmed += page_fit['trimmed']
+            if cover_letter == 'page' and clean_pdf_bytes:
+                clean_pdf_bytes = latex_service.append_pdf(clean_pdf_bytes, render_cover_letter(tailored_content, draft_first))
+            pdf_bytes = clean_pdf_bytes
+            if clean_pdf_bytes and not is_premium:
+                pdf_bytes = latex_service.apply_watermark(clean_pdf_bytes)
             if not pdf_bytes:
                 return jsonify({"error": "Failed to generate PDF: PDF generation returned empty result"}), 500
         except Exception as e:
             return jsonify({"error": f"Failed to generate PDF: {str(e)}"}), 500
 
+        record_trims(template_name, trimmed)
+
         # Save generation record to Supabase
         if user:
-            auth_service.increment_generation_count(user['id'])
-            supabase_service.save_generation(user_id=user['id'], job_description=job_description)
+            with timed('supabase_log'):
+                auth_service.increment_generation_count(user['id'])
+                supabase_service.save_generation(user_id=user['id'], job_description=job_description, ip_address=client_ip)
 
-        # Return the generated PDF
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        temp_file.write(pdf_bytes)
-        temp_file.close()
-        
-        return send_file(temp_file.name, as_attachment=True, download_name='Tailored_Resume.pdf')
+        # Keep a copy for later downloads, but stream the response straight from memory
+        artifact_id = store_pdf(pdf_bytes, clean_pdf_bytes)
+        # Stored renders are resume-only, so a PDF with the letter appended is not remembered
+        if generation_id and not draft_first and cover_letter != 'page':
+            remember_render(generation_store.get(generation_id), render_variant(template_name, fit_one_page, is_premium), artifact_id)
+
+        response = send_resume(pdf_bytes, artifact_id, trimmed, page_fit)
+        if generation_id:
+            response.headers['X-Generation-Id'] = generation_id
+        if draft_first:
+            response.headers['X-Render-Job'] = render_jobs.submit(
+                lambda: render_final(template_name, tailored_content, is_premium, fit_one_page, cover_letter == 'page'),
+                artifact_id
+            )
+        if cover_letter == 'separate':
+            try:
+                cover_letter_id = store_cover_letter(tailored_content, is_premium, draft_first)
+                response.headers['X-Cover-Letter-Id'] = cover_letter_id
+                if draft_first:
+                    response.headers['X-Cover-Letter-Job'] = render_jobs.submit(
+                        lambda: store_cover_letter(tailored_content, is_premium),
+                        cover_letter_id
+                    )
+            except Exception as e:
+                print(f"Failed to generate the cover letter: {e}")
+        return response
 
     except Exception as e:
         print(f"Error in generate_resume: {str(e)}")
         return jsonify({"error": "An unexpected error occurred during resume generation."}), 500
 
 
+def parse_job_descriptions(data):
+    """
+    Job descriptions of a batch: a JSON array in `job_descriptions`, or repeated
+    `job_description` fields. Returns the list, or None if it is malformed.
+    """
+    raw = data.get('job_descriptions')
+    if raw:
+        try:
+            job_descriptions = json.loads(raw)
+        except ValueError:
+            return None
+    else:
+        job_descriptions = data.getlist('job_description')
+    if not isinstance(job_descriptions, list) or not all(isinstance(jd, str) and jd.strip() for jd in job_descriptions):
+        return None
+    return job_descriptions
+
+def tailor_batch_item(resume_text, prepared, job_description, template_name, user):
+    """
+    The LLM half of one batch item: tailor the prepared resume to a job
+    description, keep the generation and shape the content for the template.
+    Returns the shaped content and the generation id.
+    """
+    tailored_content = gemini_service.optimize_resume(resume_text, job_description, prepared=prepared)
+    if not isinstance(tailored_content, dict):
+        raise ValueError("Invalid response format from AI service")
+
+    generation_id = None
+    if generation_store:
+        try:
+            generation_id = generation_store.put(tailored_content, user['id'] if user else None)
+        except Exception as e:
+            print(f"Failed to store tailored content: {e}")
+    if user and supabase_service:
+        try:
+            auth_service.increment_generation_count(user['id'])
+            supabase_service.save_generation(user_id=user['id'], job_description=job_description, ip_address=None)
+        except Exception as e:
+            print(f"Failed to log batch generation: {e}")
+
+    with timed('shape'):
+        shaped_content, trimmed = shape_resume(tailored_content, template_name)
+    record_trims(template_name, trimmed)
+    return shaped_content, generation_id
+
+def run_batch_job(job_id, resume_text, prepared, job_description, template_name, user, is_premium, fit_one_page):
+    """
+    One batch item answered by job id: tailor on the batch LLM pool, then queue
+    the render on the render workers under the reserved job id
+    """
+    try:
+        shaped_content, _ = tailor_batch_item(resume_text, prepared, job_description, template_name, user)
+    except Exception as e:
+        print(f"Batch job {job_id[:12]} failed before rendering: {e}")
+        render_jobs.fail(job_id)
+        return
+    render_jobs.submit(
+        lambda: render_final(template_name, shaped_content, is_premium, fit_one_page),
+        job_id=job_id
+    )
+
+@app.route('/api/generate-resume/batch', methods=['POST'])
+def generate_resume_batch():
+    """
+    Tailors one resume to several job descriptions. The resume is extracted and
+    parsed once, the LLM calls fan out under BATCH_LLM_CONCURRENCY and the PDFs
+    compile on the render workers. Batches of up to BATCH_ZIP_MAX_JOBS return a
+    zip of the PDFs with a manifest; larger ones, or any batch with
+    `response=jobs`, return one job id per job description to poll at
+    /api/resume/jobs/<job_id>.
+    """
+    if not gemini_service or not latex_service or not render_jobs:
+        return jsonify({"error": "One or more services required for resume generation are unavailable."}), 503
+
+    if request_profiler.is_requested(request):
+        with request_profiler.capture() as profiler:
+            with timed('batch_total'):
+                response = app.make_response(_generate_resume_batch())
+        response.headers['X-Profile-Id'] = request_profiler.save(profiler, 'generate_resume_batch')
+        return response
+
+    with timed('batch_total'):
+        return _generate_resume_batch()
+
+def _generate_resume_batch():
+    try:
+        client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR'))
+        with timed('auth'):
+            user = get_current_user()
+            is_premium = False
+            if user:
+                is_premium = auth_service.check_premium_status_authenticated(user['id'])['is_premium']
+
+        data = request.form
+        job_descriptions = parse_job_descriptions(data)
+        linkedin_profile_url = data.get('linkedin_url')
+        uploaded_resume = request.files.get('resume')
+        template_name = data.get('template', 'jakes_resume')
+        fit_one_page = data.get('fit_one_page', '').lower() in ('1', 'true', 'yes')
+        response_mode = data.get('response') or \
+            ('zip' if job_descriptions and len(job_descriptions) <= BATCH_ZIP_MAX_JOBS else 'jobs')
+
+        if not job_descriptions:
+            return jsonify({"error": "job_descriptions must be a non-empty list of job descriptions"}), 400
+        if len(job_descriptions) > BATCH_MAX_JOBS:
+            return jsonify({"error": f"At most {BATCH_MAX_JOBS} job descriptions per batch"}), 400
+        if response_mode not in ('zip', 'jobs'):
+            return jsonify({"error": "response must be 'zip' or 'jobs'"}), 400
+        if response_mode == 'zip' and len(job_descriptions) > BATCH_ZIP_MAX_JOBS:
+            return jsonify({"error": f"Zip responses take at most {BATCH_ZIP_MAX_JOBS} job descriptions; use response=jobs"}), 400
+        if not linkedin_profile_url and not uploaded_resume:
+            return jsonify({"error": "Either LinkedIn URL or a resume file is required"}), 400
+        if template_name not in RESUME_TEMPLATES:
+            return jsonify({"error": "Invalid template name"}), 400
+
+        # Each job description counts towards the rate limit as one generation
+        limiter = premium_limiter if is_premium else standard_limiter
+        with timed('rate_limit'):
+            allowed = limiter.allow_request(user['id'] if user else client_ip, cost=len(job_descriptions))
+        if not allowed:
+            return jsonify({"error": "Rate limit exceeded. Please try again later."}), 429
+
+        resume_text, error_response = load_resume_text(linkedin_profile_url, uploaded_resume)
+        if error_response:
+            return error_response
+        prepared = gemini_service.prepare_resume(resume_text)
+        print(f"Batch of {len(job_descriptions)} job description(s), {response_mode} response")
+
+        if response_mode == 'jobs':
+            jobs = []
+            for index, job_description in enumerate(job_descriptions):
+                job_id = render_jobs.reserve()
+                batch_llm_executor.submit(propagate(run_batch_job), job_id, resume_text, prepared, job_description,
+                                          template_name, user, is_premium, fit_one_page)
+                jobs.append({'index': index, 'job_id': job_id})
+            return jsonify({'jobs': jobs}), 202
+
+        deadline = time.monotonic() + BATCH_ZIP_TIMEOUT_SECONDS
+        llm_futures = {
+            batch_llm_executor.submit(propagate(tailor_batch_item), resume_text, prepared, job_description, template_name, user): index
+            for index, job_description in enumerate(job_descriptions)
+        }
+        # Each render starts as soon as its own LLM call is done
+        render_futures = {}
+        manifest = [{'index': index} for index in range(len(job_descriptions))]
+
+        def start_render(future):
+            index = llm_futures.pop(future)
+            try:
+                shaped_content, manifest[index]['generation_id'] = future.result()
+            except Exception as e:
+                manifest[index]['error'] = f"Failed to generate optimized resume content: {e}"
+                return
+            render_futures[index] = render_jobs.run(render_final, template_name, shaped_content, is_premium, fit_one_page)
+
+        try:
+            for future in as_completed(list(llm_futures), timeout=BATCH_ZIP_TIMEOUT_SECONDS):
+                start_render(future)
+        except FutureTimeoutError:
+            for future in list(llm_futures):
+                if future.done():
+                    start_render(future)
+                else:
+                    future.cancel()
+                    manifest[llm_futures.pop(future)]['error'] = "Timed out generating optimized resume content"
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for index, future in sorted(render_futures.items()):
+                try:
+                    artifact_id = future.result(timeout=max(0, deadline - time.monotonic()))
+                    pdf_bytes = artifact_store.get_bytes(artifact_id)
+                    if pdf_bytes is None:
+                        raise RuntimeError("rendered PDF is no longer stored")
+                except FutureTimeoutError:
+                    manifest[index]['error'] = "Timed out generating PDF"
+                    continue
+                except Exception as e:
+                    manifest[index]['error'] = f"Failed to generate PDF: {e}"
+                    continue
+                manifest[index].update(artifact_id=artifact_id, file=f"resume_{index + 1:02d}.pdf")
+                zip_file.writestr(manifest[index]['file'], pdf_bytes)
+            zip_file.writestr('manifest.json', json.dumps(manifest, indent=2))
+
+        if not any('file' in item for item in manifest):
+            return jsonify({"error": "Every resume in the batch failed", "results": manifest}), 500
+        archive.seek(0)
+        return send_file(archive, mimetype='application/zip', as_attachment=True, download_name='Tailored_Resumes.zip')
+
+    except Exception as e:
+        print(f"Error in generate_resume_batch: {str(e)}")
+        return jsonify({"error": "An unexpected error occurred during batch generation."}), 500
+
+
+@app.route('/api/resume/<artifact_id>', methods=['GET'])
+def download_resume(artifact_id):
+    """
+    Re-download a previously generated resume by its artifact id
+    """
+    if not artifact_store:
+        return jsonify({"error": "Resume downloads are unavailable."}), 503
+
+    # The artifact id is the content hash, so a matching ETag means the client
+    # already holds these exact bytes and nothing has to be read
+    if artifact_id in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(artifact_id)
+        response.headers['X-Artifact-Id'] = artifact_id
+        return response
+
+    pdf_bytes = artifact_store.get_cached_bytes(artifact_id)
+    record_cache('artifact_memory', pdf_bytes is not None)
+    if pdf_bytes is not None:
+        return send_pdf(pdf_bytes, artifact_id)
+
+    artifact_path = artifact_store.get_path(artifact_id)
+    if not artifact_path:
+        return jsonify({"error": "Resume not found or expired"}), 404
+
+    return send_pdf(None, artifact_id, path=artifact_path)
+
+
+def render_variant(template_name, fit_one_page, is_premium):
+    return f"{template_name}:{'one_page' if fit_one_page else 'default'}:{'premium' if is_premium else 'free'}"
+
+def remember_render(record, variant, artifact_id):
+    """
+    Note which artifact a generation's content rendered to, when it can be served again
+    """
+    if not record or not artifact_store:
+        return
+    try:
+        generation_store.record_render(record, variant, artifact_id)
+    except Exception as e:
+        print(f"Failed to record render of generation {record['generation_id'][:12]}: {e}")
+
+def load_generation(generation_id, user):
+    """
+    Look up a stored generation. Someone else's generation is reported as missing rather than forbidden.
+    """
+    record = generation_store.get(generation_id)
+    if not record or (record['owner_id'] and (not user or user['id'] != record['owner_id'])):
+        return None
+    return record
+
+def is_premium_user(user):
+    return bool(user) and auth_service.check_premium_status_authenticated(user['id'])['is_premium']
+
+def render_generation_response(record, user, template_name, fit_one_page):
+    """
+    Render a stored generation's current content. A variant already rendered from
+    this content is served from the artifact store without rendering again; a
+    fresh compile counts towards the caller's rate limit.
+    """
+    generation_id = record['generation_id']
+    is_premium = is_premium_user(user)
+    variant = render_variant(template_name, fit_one_page, is_premium)
+
+    rendered_id = (record.get('renders') or {}).get(variant)
+    pdf_bytes = artifact_store.get_bytes(rendered_id) if rendered_id and artifact_store else None
+    if pdf_bytes is not None:
+        response = send_pdf(pdf_bytes, rendered_id)
+        response.headers['X-Generation-Id'] = generation_id
+        return response
+
+    # Each compile can hold a worker for seconds, so it is limited like a generation
+    limiter = premium_limiter if is_premium else standard_limiter
+    client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR'))
+    with timed('rate_limit'):
+        allowed = limiter.allow_request(user['id'] if user else client_ip, cost=RERENDER_RATE_COST)
+    if not allowed:
+        return jsonify({"error": "Rate limit exceeded. Please try again later."}), 429
+
+    with timed('shape'):
+        tailored_content, trimmed = shape_resume(record['content'], template_name)
+    print(f"Rendering generation {generation_id[:12]} with template: {template_name}.tex")
+    try:
+        clean_pdf_bytes, page_fit = render_clean_pdf(template_name, tailored_content, fit_one_page)
+        if page_fit:
+            trimmed += page_fit['trimmed']
+        if not clean_pdf_bytes:
+            return jsonify({"error": "Failed to generate PDF: PDF generation returned empty result"}), 500
+        pdf_bytes = clean_pdf_bytes if is_premium else latex_service.apply_watermark(clean_pdf_bytes)
+    except Exception as e:
+        return jsonify({"error": f"Failed to generate PDF: {str(e)}"}), 500
+
+    record_trims(template_name, trimmed)
+    artifact_id = store_pdf(pdf_bytes, clean_pdf_bytes)
+    remember_render(record, variant, artifact_id)
+
+    response = send_resume(pdf_bytes, artifact_id, trimmed, page_fit)
+    response.headers['X-Generation-Id'] = generation_id
+    return response
+
+def parse_render_options(data):
+    template_name = data.get('template', 'jakes_resume')
+    fit_one_page = str(data.get('fit_one_page', '')).lower() in ('1', 'true', 'yes')
+    return template_name, fit_one_page
+
+@app.route('/api/generations/<generation_id>/render', methods=['POST'])
+def render_generation(generation_id):
+    """
+    Re-render a previous generation's tailored content with another template, without the LLM
+    """
+    if not generation_store or not latex_service:
+        return jsonify({"error": "Re-rendering is unavailable."}), 503
+
+    with timed('rerender'):
+        template_name, fit_one_page = parse_render_options(request.get_json(silent=True) or request.form)
+        if template_name not in RESUME_TEMPLATES:
+            return jsonify({"error": "Invalid template name"}), 400
+
+        user = get_current_user()
+        record = load_generation(generation_id, user)
+        if not record:
+            return jsonify({"error": "Generation not found or expired"}), 404
+
+        return render_generation_response(record, user, template_name, fit_one_page)
+
+
+@app.route('/api/generations/<generation_id>', methods=['GET'])
+def get_generation(generation_id):
+    """
+    Return a generation's tailored content, for editing
+    """
+    if not generation_store:
+        return jsonify({"error": "Generations are unavailable."}), 503
+
+    record = load_generation(generation_id, get_current_user())
+    if not record:
+        return jsonify({"error": "Generation not found or expired"}), 404
+    return jsonify({"generation_id": generation_id, "content": record['content']})
+
+
+@app.route('/api/generations/<generation_id>', methods=['PUT'])
+def edit_generation(generation_id):
+    """
+    Replace a generation's tailored content with an edited copy and re-render it.
+    Only the edited sections are sanitized again before compiling. Unchanged
+    content is never compiled: it is served from a previous render of the
+    variant, or answered with 204 (use the render endpoint to switch templates).
+    """
+    if not generation_store or not latex_service:
+        return jsonify({"error": "Re-rendering is unavailable."}), 503
+
+    with timed('edit_render'):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('content'), dict):
+            return jsonify({"error": "Request body must be JSON with the edited resume under 'content'"}), 400
+        template_name, fit_one_page = parse_render_options(data)
+        if template_name not in RESUME_TEMPLATES:
+            return jsonify({"error": "Invalid template name"}), 400
+
+        content = data['content']
+        is_valid, message = validate_resume_data(content)
+        if not is_valid:
+            return jsonify({"error": message}), 400
+
+        user = get_current_user()
+        record = load_generation(generation_id, user)
+        if not record:
+            return jsonify({"error": "Generation not found or expired"}), 404
+
+        changed_sections = sorted(
+            key for key in set(record['content']) | set(content)
+            if record['content'].get(key) != content.get(key)
+        )
+        if changed_sections:
+            print(f"Generation {generation_id[:12]} edited: {', '.join(changed_sections)}")
+            record = generation_store.update_content(record, content)
+        elif not (record.get('renders') or {}).get(render_variant(template_name, fit_one_page, is_premium_user(user))):
+            response = app.make_response(('', 204))
+            response.headers['X-Generation-Id'] = generation_id
+            response.headers['X-Changed-Sections'] = ''
+            return response
+
+        response = app.make_response(render_generation_response(record, user, template_name, fit_one_page))
+        response.headers['X-Changed-Sections'] = ','.join(changed_sections)
+        return response
+
+
+@app.route('/api/resume/jobs/<job_id>', methods=['GET'])
+def download_rendered_resume(job_id):
+    """
+    Fetch the LaTeX PDF behind a draft-first preview, or 202 while it is still compiling
+    """
+    if not render_jobs:
+        return jsonify({"error": "Resume downloads are unavailable."}), 503
+    if not re.fullmatch(r'[0-9a-f]{64}', job_id):
+        return jsonify({"error": "Invalid job id"}), 400
+
+    artifact_id = render_jobs.result(job_id)
+    if not artifact_id:
+        return jsonify({"error": "Job not found or expired"}), 404
+    if artifact_id == RenderJobQueue.PENDING_ID:
+        response = jsonify({"status": "pending"})
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        return response
+    if artifact_id == RenderJobQueue.FAILED_ID:
+        return jsonify({"status": "failed", "error": "Resume generation failed"}), 500
+
+    pdf_bytes = artifact_store.get_bytes(artifact_id)
+    if pdf_bytes is None:
+        return jsonify({"error": "Resume not found or expired"}), 404
+    return send_pdf(pdf_bytes, artifact_id)
+
+
+@app.route('/api/resume/<artifact_id>/premium', methods=['GET'])
+def download_premium_resume(artifact_id):
+    """
+    Re-download a free-tier resume without the watermark once the user is premium
+    """
+    if not artifact_store or not auth_service:
+        return jsonify({"error": "Resume downloads are unavailable."}), 503
+
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Not authenticated"}), 401
+    if not auth_service.check_premium_status_authenticated(user['id'])['is_premium']:
+        return jsonify({"error": "Premium membership required"}), 403
+
+    # Premium downloads were never watermarked and link to nothing, so serve them as they are
+    clean_id = artifact_store.resolve_link(artifact_id) or artifact_id
+    pdf_bytes = artifact_store.get_bytes(clean_id)
+    if pdf_bytes is None:
+        return jsonify({"error": "Resume not found or expired"}), 404
+
+    return send_pdf(pdf_bytes, clean_id)
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    List captured request profiles (admin only)
+    """
+    if not request_profiler.is_authorized(request.headers.get('X-Profile-Token')):
+        return jsonify({"error": "Not authorized"}), 403
+    return jsonify({"profiles": request_profiler.ring.list_profiles()})
+
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    Download a captured request profile in collapsed-stack format (admin only)
+    """
+    if not request_profiler.is_authorized(request.headers.get('X-Profile-Token')):
+        return jsonify({"error": "Not authorized"}), 403
+
+    content = request_profiler.ring.load(profile_id)
+    if content is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return app.response_class(content, mimetype='text/plain')
+
+
+@app.route('/api/admin/compile-failures', methods=['GET', 'DELETE'])
+def compile_failures():
+    """
+    Export (or clear, after fixing a template) the inputs that failed LaTeX compilation (admin only)
+    """
+    if not request_profiler.is_authorized(request.headers.get('X-Profile-Token')):
+        return jsonify({"error": "Not authorized"}), 403
+    if not latex_service:
+        return jsonify({"error": "LaTeX service is unavailable."}), 503
+
+    if request.method == 'DELETE':
+        return jsonify({"cleared": latex_service.compile_failures.clear()})
+    return jsonify({"failures": latex_service.compile_failures.export()})
+
+
 @app.route('/api/payment/upload', methods=['POST'])
 def upload_payment_screenshot():
     """
@@ -331,7 +1045,7 @@ def upload_payment_screenshot():
         if not email or not validate_email(email):
             return jsonify({"error": "A valid email is required"}), 400
         
-        if not screenshot or not validate_file(screenshot, content_types=['image/jpeg', 'image/png']):
+        if not screenshot or not validate_file(screenshot, allowed_types=['image/jpeg', 'image/png']):
             return jsonify({"error": "A valid screenshot (JPG/PNG) is required"}), 400
 
         # Upload to Supabase Storage
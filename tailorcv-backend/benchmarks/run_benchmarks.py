@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+TailorCV micro-benchmarks for the CPU-bound, in-process services
+
+Usage (from tailorcv-backend/):
+    python -m benchmarks.run_benchmarks                    # compare against benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --update-baseline  # record a new baseline
+    python -m benchmarks.run_benchmarks --filter sanitize --threshold 0.15
+
+Each benchmark is warmed up, then timed for several repeats, each scored against a
+fixed pure-Python calibration loop timed right after it; the median score is
+reported. Baselines compare those normalized scores, so a baseline recorded on one
+machine stays meaningful on another, and a new baseline is the median of several
+such measurements. The run exits non-zero if any benchmark regresses by more than
+--threshold on every confirmation run. The default threshold sits above the
+run-to-run noise measured on a shared 2-vCPU VM (up to ~27% for the multi-page
+PDF extraction benchmarks, under 10% for most others).
+
+sanitize_for_latex's output is checked against an independent reference table in
+tests/test_latex_sanitizer.py, not here.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from typing import Callable, Dict, Any, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from werkzeug.datastructures import FileStorage
+
+from services.latex_sanitizer import sanitize_for_latex
+from services.latex_lint import lint_latex, repair_latex
+from services.latex_service import LaTeXService
+from services.pdf_fallback_service import PDFFallbackService
+from services.pdf_service import PDFService
+from services.prompt_budget import prepare_prompt_inputs
+from services.resume_shaper import shape_resume
+from services.watermark_service import WatermarkService
+from utils.rate_limiter import RateLimiter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+TEMPLATES = ['jakes_resume', 'free_resume', 'premium_resume']
+PDF_PAGE_COUNTS = [1, 5, 20]
+
+def load_resume() -> Dict[str, Any]:
+    with open(os.path.join(FIXTURES_DIR, 'large_resume.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_corpus() -> List[str]:
+    with open(os.path.join(FIXTURES_DIR, 'resume_corpus.txt'), 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def collect_strings(data) -> List[str]:
+    if isinstance(data, dict):
+        return [s for value in data.values() for s in collect_strings(value)]
+    if isinstance(data, list):
+        return [s for item in data for s in collect_strings(item)]
+    return [data] if isinstance(data, str) else []
+
+def build_pdf(page_count: int, corpus: List[str]) -> bytes:
+    """
+    Deterministically lay out corpus lines over `page_count` letter pages
+    """
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter, invariant=1)
+    lines_per_page = 50
+    for page in range(page_count):
+        text = pdf.beginText(72, 720)
+        text.setFont('Helvetica', 9)
+        for i in range(lines_per_page):
+            text.textLine(corpus[(page * lines_per_page + i) % len(corpus)][:110])
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def as_upload(pdf_bytes: bytes) -> FileStorage:
+    return FileStorage(stream=io.BytesIO(pdf_bytes), filename='resume.pdf', content_type='application/pdf')
+
+def calibration_loop() -> int:
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    return total
+
+def _loop_count(func: Callable[[], Any], min_time: float) -> int:
+    """
+    Calls of `func` that take about `min_time`, running it for at least that long first as warm-up
+    """
+    number = 1
+    warmed = 0.0
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        warmed += elapsed
+        if (elapsed >= min_time / 4 and warmed >= min_time) or number >= 1 << 20:
+            break
+        if elapsed < min_time / 4:
+            number *= 2
+    return max(1, int(number * (min_time / max(elapsed, 1e-9))))
+
+def _time_loop(func: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number
+
+def measure(func: Callable[[], Any], min_time: float, repeats: int) -> Tuple[float, float]:
+    """
+    Median seconds per call and median score across repeats, after a warm-up.
+    Each repeat times the benchmark and the calibration loop back to back and is
+    scored by their ratio, so CPU frequency changes and neighbouring load during
+    the run affect both sides alike.
+    """
+    number = _loop_count(func, min_time)
+    calibration_number = _loop_count(calibration_loop, min_time)
+
+    seconds = []
+    scores = []
+    for _ in range(repeats):
+        elapsed = _time_loop(func, number)
+        seconds.append(elapsed)
+        scores.append(elapsed / _time_loop(calibration_loop, calibration_number))
+    return statistics.median(seconds), statistics.median(scores)
+
+def build_benchmarks() -> List[Tuple[str, Callable[[], Any]]]:
+    resume = load_resume()
+    corpus = load_corpus()
+    strings = collect_strings(resume)
+
+    latex_service = LaTeXService()
+    context = latex_service._template_context(latex_service._sanitize_data(resume))
+    fallback_service = PDFFallbackService()
+    pdf_service = PDFService()
+
+    benchmarks = [
+        ('sanitize_for_latex.all_strings', lambda: [sanitize_for_latex(s) for s in strings]),
+        ('latex_service.sanitize_data', lambda: latex_service._sanitize_data(resume)),
+        ('resume_shaper.shape', lambda: shape_resume(resume, 'premium_resume')),
+    ]
+
+    # Both texts are over their default budgets, so the trimming path runs too
+    corpus_text = '\n'.join(corpus * 2)
+    job_description = '\n'.join(corpus[:60] * 2)
+    benchmarks.append(('prompt_budget.prepare', lambda: prepare_prompt_inputs(corpus_text, job_description)))
+
+    for template_name in TEMPLATES:
+        template = latex_service.template_env.get_template(f"{template_name}.tex")
+        benchmarks.append((f"jinja_render.{template_name}", lambda template=template: template.render(context)))
+
+    rendered = latex_service.template_env.get_template('jakes_resume.tex').render(context)
+    benchmarks.append(('latex_lint.repair_and_lint', lambda: lint_latex(repair_latex(rendered)[0])))
+
+    benchmarks.append(('pdf_fallback.generate_pdf', lambda: fallback_service.generate_pdf(resume)))
+
+    watermark_service = WatermarkService()
+    rendered_pdf = fallback_service.generate_pdf(resume)
+    benchmarks.append(('watermark.apply', lambda: watermark_service.apply(rendered_pdf)))
+
+    for page_count in PDF_PAGE_COUNTS:
+        pdf_bytes = build_pdf(page_count, corpus)
+        benchmarks.append((
+            f"pdf_service.extract_text.{page_count}p",
+            lambda pdf_bytes=pdf_bytes: pdf_service.extract_text_from_pdf(as_upload(pdf_bytes))
+        ))
+        benchmarks.append((
+            f"pdf_service.extract_structured.{page_count}p",
+            lambda pdf_bytes=pdf_bytes: pdf_service.extract_structured_data(as_upload(pdf_bytes))
+        ))
+
+    def rate_limiter_many_keys():
+        limiter = RateLimiter(max_requests=5, window_minutes=60)
+        for i in range(20000):
+            limiter.allow_request(f"10.0.{i % 5000 // 256}.{i % 256}")
+        limiter.get_stats()
+
+    benchmarks.append(('rate_limiter.20k_requests_5k_keys', rate_limiter_many_keys))
+    return benchmarks
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Run TailorCV micro-benchmarks against a stored baseline')
+    parser.add_argument('--filter', help='Only run benchmarks whose name contains this string')
+    parser.add_argument('--threshold', type=float, default=0.35, help='Allowed slowdown before failing (0.35 = 35%%)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Target seconds per repeat')
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--confirm-runs', type=int, default=2, help='Extra measurements before reporting a regression')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    args = parser.parse_args()
+
+    benchmarks = [(name, func) for name, func in build_benchmarks() if not args.filter or args.filter in name]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('benchmarks', {})
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<42} {'time/op':>12} {'score':>10} {'vs baseline':>12}")
+    for name, func in benchmarks:
+        delta = None
+        if args.update_baseline:
+            # One unlucky measurement must not become the reference for every later run
+            attempts = [measure(func, args.min_time, args.repeats) for _ in range(1 + args.confirm_runs)]
+            seconds = statistics.median(attempt[0] for attempt in attempts)
+            score = statistics.median(attempt[1] for attempt in attempts)
+        else:
+            # A suspected regression is re-measured and only counts if every attempt exceeds the threshold
+            seconds, score = None, None
+            for attempt in range(1 + args.confirm_runs):
+                attempt_seconds, attempt_score = measure(func, args.min_time, args.repeats)
+                if score is None or attempt_score < score:
+                    seconds, score = attempt_seconds, attempt_score
+                delta = score / baseline[name]['score'] - 1 if name in baseline else None
+                if delta is None or delta <= args.threshold:
+                    break
+        results[name] = {'seconds': seconds, 'score': score}
+
+        change = ''
+        if delta is not None:
+            change = f"{delta * 100:+.1f}%"
+            if delta > args.threshold:
+                regressions.append((name, delta))
+                change += ' !!'
+        print(f"{name:<42} {seconds * 1000:>10.3f}ms {score:>10.2f} {change:>12}")
+
+    if args.update_baseline:
+        merged = dict(baseline)
+        merged.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'benchmarks': dict(sorted(merged.items()))
+            }, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold * 100:.0f}%:")
+        for name, delta in regressions:
+            print(f"  {name}: {delta * 100:+.1f}%")
+        return 1
+
+    print(f"\nNo regressions beyond {args.threshold * 100:.0f}%")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+TailorCV load test - drives the backend at a target request rate against local stubs
+
+Usage (from tailorcv-backend/):
+    python -m loadtest.run_loadtest --rps 5 --duration 30
+    python -m loadtest.run_loadtest --scenarios generate --gemini-latency-ms 1500 --gemini-error-rate 0.05
+    python -m loadtest.run_loadtest --compare loadtest/results/<previous>.json
+
+By default the app is started as a subprocess (`python app.py`) wired to the stubs;
+pass --server-cmd to use e.g. gunicorn, or --target to hit an already running server.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import shlex
+import random
+import argparse
+import threading
+import subprocess
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from loadtest.stubs import SupabaseStore, start_gemini_stub, start_supabase_stub, start_formsubmit_stub
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+SCENARIOS = ['generate', 'auth_me', 'auth_logout', 'user_status', 'payment_upload']
+
+# supabase-py only accepts keys shaped like a JWT
+STUB_SUPABASE_KEY = 'stub.c3R1Yg.c3R1Yg'
+
+# Minimal 1x1 PNG for payment screenshot uploads
+TINY_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f6d0000000049454e44ae426082'
+)
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def build_resume_pdf(resume_data: Dict[str, Any]) -> bytes:
+    """
+    Render the fixture resume with the ReportLab fallback so uploads carry real, parseable text
+    """
+    from services.pdf_fallback_service import PDFFallbackService
+    return PDFFallbackService().generate_pdf(resume_data)
+
+def seed_users(store: SupabaseStore, count: int) -> List[str]:
+    """
+    Create premium users with live sessions and return their session tokens.
+    Premium users get the larger rate-limit budget, so the limiter does not dominate results.
+    """
+    expires_at = (datetime.now() + timedelta(days=1)).isoformat()
+    tokens = []
+    for i in range(count):
+        user = store.insert('users', [{
+            'email': f"loadtest{i}@example.com",
+            'name': f"Load Test {i}",
+            'profile_picture': '',
+            'ip': '127.0.0.1',
+            'is_premium': True,
+            'generation_count': 0
+        }])[0]
+        token = uuid.uuid4().hex
+        store.insert('user_sessions', [{
+            'user_id': user['id'],
+            'session_token': token,
+            'expires_at': expires_at
+        }])
+        tokens.append(token)
+    return tokens
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class LoadDriver:
+    """
+    Open-loop driver: requests are issued on a fixed schedule regardless of how
+    fast earlier ones complete, so server slowdowns show up as latency, not lower load.
+    """
+    def __init__(self, base_url: str, session_tokens: List[str], job_description: str,
+                 resume_pdf: bytes, max_workers: int, seed: int = 0):
+        self.base_url = base_url.rstrip('/')
+        self.session_tokens = session_tokens
+        self.job_description = job_description
+        self.resume_pdf = resume_pdf
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.rng = random.Random(seed)
+        self._local = threading.local()
+        self._token_index = 0
+        self._lock = threading.Lock()
+
+    def _http(self) -> requests.Session:
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _next_token(self) -> str:
+        with self._lock:
+            token = self.session_tokens[self._token_index % len(self.session_tokens)]
+            self._token_index += 1
+            return token
+
+    def _request(self, scenario: str) -> requests.Response:
+        http = self._http()
+        url = self.base_url
+        if scenario == 'generate':
+            return http.post(
+                f"{url}/api/generate-resume",
+                headers={'Authorization': f"Bearer {self._next_token()}"},
+                data={'job_description': self.job_description, 'template': 'jakes_resume'},
+                files={'resume': ('resume.pdf', io.BytesIO(self.resume_pdf), 'application/pdf')},
+                timeout=180
+            )
+        if scenario == 'auth_me':
+            return http.get(f"{url}/api/auth/me", headers={'Authorization': f"Bearer {self._next_token()}"}, timeout=30)
+        if scenario == 'user_status':
+            return http.get(f"{url}/api/user/status", headers={'Authorization': f"Bearer {self._next_token()}"}, timeout=30)
+        if scenario == 'auth_logout':
+            # Logging out an unknown session still exercises the full delete path
+            return http.post(f"{url}/api/auth/logout", headers={'Authorization': f"Bearer {uuid.uuid4().hex}"}, timeout=30)
+        if scenario == 'payment_upload':
+            return http.post(
+                f"{url}/api/payment/upload",
+                data={'email': f"payer{self.rng.randint(0, 10**6)}@example.com"},
+                files={'screenshot': ('proof.png', io.BytesIO(TINY_PNG), 'image/png')},
+                timeout=60
+            )
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    def _timed_request(self, scenario: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            response = self._request(scenario)
+            status = response.status_code
+            size = len(response.content)
+        except requests.RequestException as e:
+            status, size = type(e).__name__, 0
+        return {'latency': time.perf_counter() - start, 'status': status, 'bytes': size}
+
+    def run(self, scenario: str, rps: float, duration: float) -> Dict[str, Any]:
+        """
+        Issue `scenario` requests at `rps` for `duration` seconds and summarize the results
+        """
+        futures = []
+        interval = 1.0 / rps
+        start = time.perf_counter()
+        next_at = start
+        while next_at - start < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(self.executor.submit(self._timed_request, scenario))
+            next_at += interval
+
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        return summarize(scenario, results, elapsed, rps)
+
+def summarize(scenario: str, results: List[Dict[str, Any]], elapsed: float, target_rps: float) -> Dict[str, Any]:
+    latencies = sorted(result['latency'] * 1000 for result in results)
+    statuses: Dict[str, int] = {}
+    for result in results:
+        statuses[str(result['status'])] = statuses.get(str(result['status']), 0) + 1
+    ok = sum(count for status, count in statuses.items() if status.isdigit() and int(status) < 400)
+
+    return {
+        'scenario': scenario,
+        'target_rps': target_rps,
+        'requests': len(results),
+        'ok': ok,
+        'errors': len(results) - ok,
+        'error_rate': round((len(results) - ok) / len(results), 4) if results else 0.0,
+        'throughput_rps': round(ok / elapsed, 3) if elapsed else 0.0,
+        'elapsed_seconds': round(elapsed, 3),
+        'statuses': statuses,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50), 2),
+            'p90': round(percentile(latencies, 90), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0.0
+        }
+    }
+
+def start_app(args, env: Dict[str, str]) -> subprocess.Popen:
+    command = args.server_cmd.format(port=args.port, python=sys.executable)
+    log_file = open(os.path.join(RESULTS_DIR, 'server.log'), 'w')
+    process = subprocess.Popen(shlex.split(command), cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup, see {log_file.name}")
+        try:
+            requests.get(f"http://127.0.0.1:{args.port}/api/health", timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"Server did not become ready within {args.startup_timeout}s")
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+def print_summary(summary: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    latency = summary['latency_ms']
+    line = (
+        f"{summary['scenario']:<15} {summary['requests']:>6} req  {summary['throughput_rps']:>8.2f} ok/s  "
+        f"err {summary['error_rate'] * 100:5.1f}%  p50 {latency['p50']:>8.1f}  p95 {latency['p95']:>8.1f}  "
+        f"p99 {latency['p99']:>8.1f}  max {latency['max']:>8.1f} ms"
+    )
+    if baseline:
+        base_p95 = baseline['latency_ms']['p95']
+        if base_p95:
+            line += f"  (p95 {(latency['p95'] - base_p95) / base_p95 * 100:+.1f}% vs baseline)"
+    print(line)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Load-test the TailorCV backend against local service stubs')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument('--rps', type=float, default=5.0, help='Target requests per second per scenario')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to drive each scenario')
+    parser.add_argument('--max-workers', type=int, default=64, help='Client threads available for in-flight requests')
+    parser.add_argument('--users', type=int, default=200, help='Seeded premium users with sessions')
+    parser.add_argument('--gemini-latency-ms', type=float, default=800, help='Gemini stub time to first token')
+    parser.add_argument('--gemini-per-token-ms', type=float, default=0.0, help='Gemini stub generation time per output token')
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0, help='Share of Gemini calls failing with 429/5xx')
+    parser.add_argument('--supabase-latency-ms', type=float, default=20, help='Latency added to every Supabase call')
+    parser.add_argument('--formsubmit-latency-ms', type=float, default=150, help='Latency of the FormSubmit stub')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the spawned app server')
+    parser.add_argument('--server-cmd', default='{python} app.py',
+                        help="Command used to start the app; {port} and {python} are substituted, "
+                             "e.g. 'gunicorn --workers 2 --timeout 120 --bind 127.0.0.1:{port} app:app'")
+    parser.add_argument('--target', help='Base URL of an already running server (skips stubs and app startup)')
+    parser.add_argument('--startup-timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Results file (default: loadtest/results/<git-rev>-<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous results file to compare p95 latency against')
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()]
+    unknown = [scenario for scenario in scenarios if scenario not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {unknown}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    tailored_json = load_fixture('tailored_resume.json')
+    job_description = load_fixture('job_description.txt')
+    resume_pdf = build_resume_pdf(json.loads(tailored_json))
+
+    stubs = []
+    server = None
+    try:
+        if args.target:
+            base_url = args.target
+            session_tokens = [uuid.uuid4().hex]
+            print(f"Targeting existing server at {base_url}; authenticated scenarios will see 401s")
+        else:
+            store = SupabaseStore()
+            session_tokens = seed_users(store, args.users)
+            gemini = start_gemini_stub(
+                tailored_json,
+                latency_ms=args.gemini_latency_ms,
+                per_token_ms=args.gemini_per_token_ms,
+                error_rate=args.gemini_error_rate,
+                seed=args.seed
+            )
+            supabase = start_supabase_stub(store, latency_ms=args.supabase_latency_ms)
+            formsubmit = start_formsubmit_stub(latency_ms=args.formsubmit_latency_ms)
+            stubs = [gemini, supabase, formsubmit]
+
+            env = dict(os.environ)
+            env.update({
+                'PORT': str(args.port),
+                'DEBUG': 'False',
+                'GEMINI_API_KEY': 'loadtest-stub-key',
+                'GEMINI_API_URL': f"{gemini.url}/v1beta/models/gemini-1.5-flash:generateContent",
+                'SUPABASE_URL': supabase.url,
+                'SUPABASE_ANON_KEY': STUB_SUPABASE_KEY,
+                'FORMSUBMIT_ENDPOINT': f"{formsubmit.url}/ajax",
+                'GOOGLE_CLIENT_ID': 'loadtest-client-id'
+            })
+            server = start_app(args, env)
+            base_url = f"http://127.0.0.1:{args.port}"
+
+        baseline = {}
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = {summary['scenario']: summary for summary in json.load(f)['scenarios']}
+
+        driver = LoadDriver(base_url, session_tokens, job_description, resume_pdf, args.max_workers, args.seed)
+        summaries = []
+        print(f"Driving {base_url} at {args.rps} rps for {args.duration}s per scenario")
+        for scenario in scenarios:
+            summary = driver.run(scenario, args.rps, args.duration)
+            summaries.append(summary)
+            print_summary(summary, baseline.get(scenario))
+        driver.executor.shutdown()
+
+        revision = git_revision()
+        output = args.output or os.path.join(RESULTS_DIR, f"{revision}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'revision': revision,
+                'timestamp': datetime.now().isoformat(),
+                'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+                'stub_requests': {
+                    'gemini': stubs[0].requests_served if stubs else None,
+                    'supabase': stubs[1].requests_served if stubs else None,
+                    'formsubmit': stubs[2].requests_served if stubs else None
+                },
+                'scenarios': summaries
+            }, f, indent=2)
+        print(f"Results saved to {output}")
+        return 0
+
+    finally:
+        if server:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        for stub in stubs:
+            stub.stop()
+
+if __name__ == '__main__':
+    sys.exit(main())
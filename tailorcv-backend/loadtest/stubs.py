@@ -0,0 +1,323 @@
+"""
+Local stand-ins for the external services the backend talks to, so app.py can be
+load-tested without Gemini, Supabase or FormSubmit credentials.
+
+Each stub is a ThreadingHTTPServer running on a daemon thread and listening on
+127.0.0.1 with an ephemeral port.
+"""
+
+import json
+import time
+import uuid
+import random
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse, parse_qsl, unquote
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+class StubServer:
+    """
+    Runs a handler class on a background thread
+    """
+    def __init__(self, handler_class, **state):
+        handler = type(handler_class.__name__, (handler_class,), {'stub': self})
+        self.state = state
+        self.requests_served = 0
+        self._counter_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self) -> None:
+        with self._counter_lock:
+            self.requests_served += 1
+
+    def start(self) -> 'StubServer':
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# --- Gemini ---
+
+class _GeminiHandler(_QuietHandler):
+    """
+    Implements `models/<model>:generateContent` and `:streamGenerateContent` (SSE)
+    """
+    def do_POST(self):
+        self.stub.count_request()
+        body = self._read_body()
+        config = self.stub.state
+        rng: random.Random = config['rng']
+
+        time.sleep(config['latency_ms'] / 1000)
+
+        if rng.random() < config['error_rate']:
+            status = rng.choice([429, 500, 503])
+            self._send_json(status, {'error': {'code': status, 'message': 'Injected stub error'}})
+            return
+
+        text = _shape_response(config['response_text'], body)
+        tokens = _split_tokens(text)
+        per_token = config['per_token_ms'] / 1000
+
+        if ':streamGenerateContent' in self.path:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            chunk_tokens = config['tokens_per_chunk']
+            for i in range(0, len(tokens), chunk_tokens):
+                piece = ''.join(tokens[i:i + chunk_tokens])
+                time.sleep(per_token * len(tokens[i:i + chunk_tokens]))
+                event = json.dumps(_gemini_payload(piece))
+                self._write_chunk(f"data: {event}\r\n\r\n".encode('utf-8'))
+            self._write_chunk(b'')
+            return
+
+        # Non-streaming responses still pay the generation time of every token
+        time.sleep(per_token * len(tokens))
+        self._send_json(200, _gemini_payload(text, len(tokens)))
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+def _shape_response(response_text: str, body: bytes) -> str:
+    """
+    Answer a request with a responseSchema the way Gemini does: the canned resume
+    in the schema's short keys, limited to the properties the schema asks for
+    """
+    try:
+        schema = json.loads(body or b'{}').get('generationConfig', {}).get('responseSchema')
+        data = json.loads(response_text)
+    except ValueError:
+        return response_text
+    if not schema or not isinstance(data, dict):
+        return response_text
+    from services.gemini_service import RESPONSE_FIELDS, compact_keys
+    properties = schema.get('properties', {})
+    compacted = compact_keys(data, RESPONSE_FIELDS)
+    return json.dumps({key: value for key, value in compacted.items() if key in properties})
+
+def _split_tokens(text: str) -> List[str]:
+    # Roughly four characters per token, like the real tokenizer on English text
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+def _gemini_payload(text: str, token_count: Optional[int] = None) -> Dict[str, Any]:
+    payload = {
+        'candidates': [{
+            'content': {'parts': [{'text': text}], 'role': 'model'},
+            'finishReason': 'STOP',
+            'index': 0
+        }]
+    }
+    if token_count is not None:
+        payload['usageMetadata'] = {'candidatesTokenCount': token_count}
+    return payload
+
+def start_gemini_stub(response_text: str, latency_ms: float = 0, per_token_ms: float = 0,
+                      error_rate: float = 0.0, tokens_per_chunk: int = 16, seed: int = 0) -> StubServer:
+    return StubServer(
+        _GeminiHandler,
+        response_text=response_text,
+        latency_ms=latency_ms,
+        per_token_ms=per_token_ms,
+        error_rate=error_rate,
+        tokens_per_chunk=tokens_per_chunk,
+        rng=random.Random(seed)
+    ).start()
+
+# --- Supabase (PostgREST + Storage) ---
+
+class _SupabaseHandler(_QuietHandler):
+    """
+    In-memory PostgREST subset: eq/neq/lt/gt/lte/gte filters, order, limit,
+    one-level embeds such as `*, users(*)`, plus Storage object uploads.
+    """
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method: str) -> None:
+        self.stub.count_request()
+        time.sleep(self.stub.state['latency_ms'] / 1000)
+        parsed = urlparse(self.path)
+        body = self._read_body()
+
+        if parsed.path.startswith('/storage/v1/object/'):
+            key = unquote(parsed.path[len('/storage/v1/object/'):])
+            with self.stub.state['lock']:
+                self.stub.state['objects'][key] = body
+            self._send_json(200, {'Key': key})
+            return
+
+        if not parsed.path.startswith('/rest/v1/'):
+            self._send_json(404, {'message': 'Unknown stub path'})
+            return
+
+        table = parsed.path[len('/rest/v1/'):]
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        store: SupabaseStore = self.stub.state['store']
+
+        if method == 'GET':
+            self._send_json(200, store.select(table, params))
+        elif method == 'POST':
+            rows = json.loads(body or b'[]')
+            self._send_json(201, store.insert(table, rows if isinstance(rows, list) else [rows]))
+        elif method == 'PATCH':
+            self._send_json(200, store.update(table, params, json.loads(body or b'{}')))
+        else:
+            self._send_json(200, store.delete(table, params))
+
+class SupabaseStore:
+    """
+    Thread-safe table storage behind the PostgREST stub
+    """
+    _OPERATORS = {
+        'eq': lambda a, b: a == b,
+        'neq': lambda a, b: a != b,
+        'lt': lambda a, b: a < b,
+        'gt': lambda a, b: a > b,
+        'lte': lambda a, b: a <= b,
+        'gte': lambda a, b: a >= b,
+    }
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        created = []
+        now = datetime.now().isoformat()
+        with self.lock:
+            for row in rows:
+                record = {'id': str(uuid.uuid4()), 'created_at': now, 'updated_at': now}
+                record.update(row)
+                self.tables.setdefault(table, []).append(record)
+                created.append(dict(record))
+        return created
+
+    def select(self, table: str, params) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = [dict(row) for row in self._matching(table, params)]
+            options = dict(params)
+            if options.get('order'):
+                column, _, direction = options['order'].partition('.')
+                rows.sort(key=lambda row: str(row.get(column, '')), reverse=direction.startswith('desc'))
+            if options.get('limit'):
+                rows = rows[:int(options['limit'])]
+            return [self._project(row, options.get('select', '*')) for row in rows]
+
+    def update(self, table: str, params, values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self.lock:
+            updated = []
+            for row in self._matching(table, params):
+                row.update(values)
+                updated.append(dict(row))
+            return updated
+
+    def delete(self, table: str, params) -> List[Dict[str, Any]]:
+        with self.lock:
+            matching = self._matching(table, params)
+            ids = {id(row) for row in matching}
+            self.tables[table] = [row for row in self.tables.get(table, []) if id(row) not in ids]
+            return [dict(row) for row in matching]
+
+    def _matching(self, table: str, params) -> List[Dict[str, Any]]:
+        filters = []
+        for column, expression in params:
+            if column in ('select', 'order', 'limit', 'offset'):
+                continue
+            operator, _, value = expression.partition('.')
+            if operator in self._OPERATORS:
+                filters.append((column, self._OPERATORS[operator], value))
+        return [
+            row for row in self.tables.get(table, [])
+            if all(self._compare(compare, row.get(column), value) for column, compare, value in filters)
+        ]
+
+    def _compare(self, compare, actual, expected: str) -> bool:
+        if actual is None:
+            return False
+        if isinstance(actual, bool):
+            return compare(str(actual).lower(), expected.lower())
+        if isinstance(actual, (int, float)):
+            try:
+                return compare(actual, float(expected))
+            except ValueError:
+                return False
+        return compare(str(actual), expected)
+
+    def _project(self, row: Dict[str, Any], select: str) -> Dict[str, Any]:
+        columns = [column.strip() for column in select.split(',') if column.strip()]
+        projected = dict(row) if '*' in columns else {}
+        for column in columns:
+            if column.endswith('(*)'):
+                # One-level embed through a `<singular>_id` foreign key, e.g. users(*) via user_id
+                related = column[:-3]
+                foreign_key = f"{related.rstrip('s')}_id"
+                projected[related] = next(
+                    (dict(r) for r in self.tables.get(related, []) if r.get('id') == row.get(foreign_key)),
+                    None
+                )
+            elif column != '*':
+                projected[column] = row.get(column)
+        return projected
+
+def start_supabase_stub(store: Optional[SupabaseStore] = None, latency_ms: float = 0) -> StubServer:
+    return StubServer(
+        _SupabaseHandler,
+        store=store or SupabaseStore(),
+        objects={},
+        lock=threading.Lock(),
+        latency_ms=latency_ms
+    ).start()
+
+# --- FormSubmit ---
+
+class _FormSubmitHandler(_QuietHandler):
+    def do_POST(self):
+        self.stub.count_request()
+        self._read_body()
+        time.sleep(self.stub.state['latency_ms'] / 1000)
+        self._send_json(200, {'success': 'true', 'message': 'The form was submitted successfully.'})
+
+def start_formsubmit_stub(latency_ms: float = 0) -> StubServer:
+    return StubServer(_FormSubmitHandler, latency_ms=latency_ms).start()
@@ -0,0 +1,271 @@
+import os
+import re
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated PDFs.
+
+    Blobs are keyed by their SHA-256 digest and written atomically, so several
+    gunicorn workers can share the same directory. A file's mtime doubles as its
+    last-access time: reads touch it, which drives both the idle TTL and the
+    least-recently-used eviction once the store grows past its size cap.
+
+    Recently stored blobs are also kept in a small per-process memory tier so
+    repeat downloads can be streamed without touching the disk.
+
+    An artifact can link to another rendition of the same document, such as the
+    unwatermarked PDF behind a free-tier download.
+    """
+
+    _DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+    def __init__(self, base_dir: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                 max_bytes: Optional[int] = None, memory_max_bytes: Optional[int] = None):
+        self.base_dir = base_dir or os.environ.get(
+            'ARTIFACT_STORE_DIR', os.path.join(tempfile.gettempdir(), 'tailorcv', 'artifacts')
+        )
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.environ.get('ARTIFACT_TTL_SECONDS', 3600))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.environ.get('ARTIFACT_STORE_MAX_MB', 256)) * 1024 * 1024
+        self.memory_max_bytes = memory_max_bytes if memory_max_bytes is not None else int(os.environ.get('ARTIFACT_MEMORY_CACHE_MB', 32)) * 1024 * 1024
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_bytes = 0
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        # Drop whatever expired while the process was down
+        self.cleanup()
+
+    def put(self, data: bytes) -> str:
+        """
+        Store a blob and return its content hash (the artifact id)
+        """
+        digest = self.content_id(data)
+        path = self._path_for(digest)
+
+        with self._lock:
+            self._remember(digest, data)
+
+            if os.path.exists(path):
+                # Identical content already stored, just refresh its access time
+                self._touch(path)
+                return digest
+
+            # Write to a temp file in the same directory, then rename atomically so
+            # other workers never observe a partially written PDF
+            fd, tmp_path = tempfile.mkstemp(dir=self.base_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as tmp_file:
+                    tmp_file.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self._evict()
+
+        return digest
+
+    @staticmethod
+    def content_id(data: bytes) -> str:
+        """
+        Content hash used as the artifact id and HTTP ETag
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def get_path(self, artifact_id: str) -> Optional[str]:
+        """
+        Return the on-disk path of a stored artifact, or None if it is unknown or expired
+        """
+        if not self._DIGEST_PATTERN.match(artifact_id or ''):
+            return None
+
+        path = self._path_for(artifact_id)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        if time.time() - stat.st_mtime > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        self._touch(path)
+        return path
+
+    def get_bytes(self, artifact_id: str) -> Optional[bytes]:
+        """
+        Read a stored artifact, preferring the in-memory tier
+        """
+        data = self.get_cached_bytes(artifact_id)
+        if data is not None:
+            return data
+
+        path = self.get_path(artifact_id)
+        if not path:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            self._remember(artifact_id, data)
+        return data
+
+    def get_cached_bytes(self, artifact_id: str) -> Optional[bytes]:
+        """
+        Return an artifact from the in-memory tier only, without any disk access
+        """
+        with self._lock:
+            data = self._memory.get(artifact_id)
+            if data is not None:
+                self._memory.move_to_end(artifact_id)
+            return data
+
+    def link(self, artifact_id: str, target_id: str) -> None:
+        """
+        Record `target_id` as an alternate rendition of `artifact_id`
+        """
+        if not (self._DIGEST_PATTERN.match(artifact_id or '') and self._DIGEST_PATTERN.match(target_id or '')):
+            raise ValueError("Artifact ids must be SHA-256 hex digests")
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.base_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as tmp_file:
+                tmp_file.write(target_id)
+            os.replace(tmp_path, self._link_path_for(artifact_id))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def resolve_link(self, artifact_id: str) -> Optional[str]:
+        """
+        Return the artifact id linked from `artifact_id`, or None
+        """
+        if not self._DIGEST_PATTERN.match(artifact_id or ''):
+            return None
+        link_path = self._link_path_for(artifact_id)
+        try:
+            with open(link_path, 'r') as f:
+                target_id = f.read().strip()
+        except FileNotFoundError:
+            return None
+        # Keep the link alive as long as the artifact it belongs to is being used
+        self._touch(link_path)
+        return target_id if self._DIGEST_PATTERN.match(target_id) else None
+
+    def cleanup(self) -> int:
+        """
+        Remove expired artifacts and enforce the size cap. Returns the number of files removed.
+        """
+        with self._lock:
+            return self._evict()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report artifact count and disk usage
+        """
+        entries = self._scan()
+        return {
+            'artifact_count': len(entries),
+            'disk_usage_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'memory_usage_bytes': self._memory_bytes,
+            'memory_max_bytes': self.memory_max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'directory': self.base_dir
+        }
+
+    def _path_for(self, digest: str) -> str:
+        return os.path.join(self.base_dir, f"{digest}.pdf")
+
+    def _link_path_for(self, digest: str) -> str:
+        return os.path.join(self.base_dir, f"{digest}.link")
+
+    def _remember(self, digest: str, data: bytes) -> None:
+        """
+        Add a blob to the in-memory LRU tier. Caller must hold the lock.
+        """
+        if len(data) > self.memory_max_bytes:
+            return
+        if digest in self._memory:
+            self._memory.move_to_end(digest)
+            return
+
+        self._memory[digest] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _scan(self, suffix: str = '.pdf') -> list:
+        """
+        List (path, size, last_access) for every stored artifact (or link, by suffix)
+        """
+        entries = []
+        try:
+            with os.scandir(self.base_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(suffix):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _evict(self) -> int:
+        """
+        Drop expired artifacts, then least recently used ones until under the size cap.
+        Caller must hold the lock.
+        """
+        now = time.time()
+        removed = 0
+        live = []
+
+        for path, size, last_access in self._scan():
+            if now - last_access > self.ttl_seconds:
+                removed += self._remove(path)
+            else:
+                live.append((path, size, last_access))
+
+        # Links expire like artifacts, a TTL after they were last resolved
+        for path, _, written_at in self._scan('.link'):
+            if now - written_at > self.ttl_seconds:
+                self._remove(path)
+
+        total = sum(size for _, size, _ in live)
+        if total > self.max_bytes:
+            live.sort(key=lambda entry: entry[2])
+            for path, size, _ in live:
+                if total <= self.max_bytes:
+                    break
+                removed += self._remove(path)
+                total -= size
+
+        return removed
+
+    def _touch(self, path: str) -> None:
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+
+    def _remove(self, path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,95 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+_ERROR_LINE_PATTERN = re.compile(r'^l\.(\d+)', re.MULTILINE)
+
+def parse_latex_error(log: Optional[str], latex_content: str = '') -> Dict[str, Any]:
+    """
+    Pull the first error out of a pdflatex log, with the offending source lines
+    """
+    if not log:
+        return {'reason': 'pdflatex produced no PDF and no log', 'line': None, 'log_excerpt': '', 'source_excerpt': ''}
+
+    lines = log.splitlines()
+    error_index = next((i for i, line in enumerate(lines) if line.startswith('! ')), None)
+    if error_index is None:
+        return {'reason': 'pdflatex produced no PDF', 'line': None, 'log_excerpt': '\n'.join(lines[-15:]), 'source_excerpt': ''}
+
+    reason = lines[error_index][2:].strip()
+    log_excerpt = '\n'.join(lines[error_index:error_index + 8])
+    line_match = _ERROR_LINE_PATTERN.search('\n'.join(lines[error_index:error_index + 20]))
+    line_number = int(line_match.group(1)) if line_match else None
+
+    source_excerpt = ''
+    if line_number and latex_content:
+        source_lines = latex_content.splitlines()
+        start = max(line_number - 3, 0)
+        source_excerpt = '\n'.join(
+            f"{number:5d}: {text}" for number, text in enumerate(source_lines[start:line_number + 2], start=start + 1)
+        )
+
+    return {'reason': reason, 'line': line_number, 'log_excerpt': log_excerpt, 'source_excerpt': source_excerpt}
+
+class CompileFailureMemo:
+    """
+    Bounded, expiring memo of rendered inputs that pdflatex failed to compile.
+
+    Compiles are deterministic, so an input that failed once fails again; looking
+    it up here sends retries straight to the ReportLab fallback instead of paying
+    for another multi-second compile. Entries keep the parsed error for template debugging.
+    """
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries or int(os.environ.get('COMPILE_FAILURE_MEMO_SIZE', 1024))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.environ.get('COMPILE_FAILURE_TTL_SECONDS', 6 * 3600))
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, input_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the recorded failure for an input, counting the skipped compile
+        """
+        with self._lock:
+            entry = self._entries.get(input_hash)
+            if entry is None:
+                return None
+            if time.time() - entry['failed_at'] > self.ttl_seconds:
+                del self._entries[input_hash]
+                return None
+            entry['skipped_compiles'] += 1
+            self._entries.move_to_end(input_hash)
+            return dict(entry)
+
+    def record(self, input_hash: str, template_name: str, error: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[input_hash] = {
+                'input_hash': input_hash,
+                'template': template_name,
+                'failed_at': time.time(),
+                'skipped_compiles': 0,
+                **error
+            }
+            self._entries.move_to_end(input_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def export(self) -> List[Dict[str, Any]]:
+        """
+        Live entries, most recently used first, for template debugging
+        """
+        now = time.time()
+        with self._lock:
+            entries = [dict(entry) for entry in reversed(self._entries.values()) if now - entry['failed_at'] <= self.ttl_seconds]
+        for entry in entries:
+            entry['expires_in_seconds'] = int(self.ttl_seconds - (now - entry['failed_at']))
+            entry['failed_at'] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(entry['failed_at']))
+        return entries
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
@@ -5,7 +5,7 @@ from datetime import datetime
 
 class EmailService:
     def __init__(self):
-        self.formsubmit_endpoint = "https://formsubmit.co/ajax"
+        self.formsubmit_endpoint = os.environ.get('FORMSUBMIT_ENDPOINT', "https://formsubmit.co/ajax")
         self.admin_email = os.environ.get('ADMIN_EMAIL', 'admin@tailorcv.com')
         
     def send_resume_email(self, user_email: str, resume_url: str) -> bool:
@@ -1,12 +1,222 @@
 import os
 import json
 import requests
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from .pdf_service import PDFService
+from .prompt_budget import prepare_job_description, prepare_resume_text, estimate_tokens
+from utils.metrics import timed, llm_section_requests, llm_output_tokens, llm_prompt_tokens, llm_json_outcomes
+from utils.json_repair import repair_truncated_json
+from utils.profiler import propagate
+
+EXPERIENCE_ENTRY_SHAPE = """{"title": "Job Title", "company": "Company Name", "location": "City, State", "startDate": "MM/YYYY", "endDate": "MM/YYYY or Present", "description": ["Achievement-focused bullet point with quantifiable results"]}"""
+PROJECT_SHAPE = """{"name": "Project Name", "description": "Brief description highlighting technologies and impact", "technologies": ["Tech1"], "date": "MM/YYYY", "github": "github.com/repo-link", "link": "live-demo-link.com"}"""
+CERTIFICATION_SHAPE = """{"name": "Certification Name", "issuer": "Issuing Organization", "date": "MM/YYYY", "link": "credential-link.com"}"""
+COVER_LETTER_SHAPE = """{"coverLetter": {"company": "Hiring company name", "greeting": "Dear Hiring Manager,", "paragraphs": ["Paragraph"], "closing": "Sincerely,"}}"""
+PERSONAL_INFO_SHAPE = """{"personalInfo": {"name": "Candidate Name", "email": "email@example.com", "phone": "+1234567890", "location": "City, State", "linkedin": "linkedin.com/in/profile", "github": "github.com/username", "website": "portfolio-website.com"}}"""
+EDUCATION_SHAPE = """{"degree": "Degree Name", "institution": "University Name", "location": "City, State", "startDate": "MM/YYYY", "endDate": "MM/YYYY", "gpa": "3.X", "relevantCourses": ["Course 1"]}"""
+
+# The response structure shown in the default prompt, one entry per top-level field
+RESUME_SCHEMA_FIELDS = [
+    ('personalInfo', """    "personalInfo": {
+        "name": "Candidate Name",
+        "email": "email@example.com",
+        "phone": "+1234567890",
+        "location": "City, State",
+        "linkedin": "linkedin.com/in/profile",
+        "github": "github.com/username",
+        "website": "portfolio-website.com"
+    }"""),
+    ('summary', '    "summary": "A compelling 2-3 sentence professional summary that highlights key qualifications for this role"'),
+    ('skills', """    "skills": [
+        "Relevant technical skills",
+        "Programming languages",
+        "Frameworks and tools",
+        "Soft skills relevant to the job"
+    ]"""),
+    ('experience', """    "experience": [
+        {
+            "title": "Job Title",
+            "company": "Company Name",
+            "location": "City, State",
+            "startDate": "MM/YYYY",
+            "endDate": "MM/YYYY or Present",
+            "description": [
+                "Achievement-focused bullet point with quantifiable results",
+                "Another accomplishment that relates to the target job",
+                "Technical implementation or leadership example"
+            ]
+        }
+    ]"""),
+    ('education', """    "education": [
+        {
+            "degree": "Degree Name",
+            "institution": "University Name",
+            "location": "City, State",
+            "startDate": "MM/YYYY",
+            "endDate": "MM/YYYY",
+            "gpa": "3.X" (if mentioned and above 3.5),
+            "relevantCourses": ["Course 1", "Course 2"] (if relevant)
+        }
+    ]"""),
+    ('projects', """    "projects": [
+        {
+            "name": "Project Name",
+            "description": "Brief description highlighting technologies and impact",
+            "technologies": ["Tech1", "Tech2", "Tech3"],
+            "date": "MM/YYYY",
+            "github": "github.com/repo-link",
+            "link": "live-demo-link.com"
+        }
+    ]"""),
+    ('certifications', """    "certifications": [
+        {
+            "name": "Certification Name",
+            "issuer": "Issuing Organization",
+            "date": "MM/YYYY",
+            "link": "credential-link.com"
+        }
+    ]"""),
+    ('coverLetter', """    "coverLetter": {
+        "company": "Hiring company name",
+        "greeting": "Dear Hiring Manager,",
+        "paragraphs": [
+            "Opening: the role and why the candidate fits it",
+            "One or two paragraphs tying specific achievements to the job's requirements",
+            "Closing: enthusiasm for the role and a call to action"
+        ],
+        "closing": "Sincerely,"
+    }"""),
+]
+
+# Structured-output mode: the response schema sent to the API. Keys are shortened to
+# cut output tokens and mapped back to the field names above when parsed.
+def _string(key, description=None):
+    return {'key': key, 'type': 'STRING', 'description': description}
+
+def _strings(key, description=None):
+    return {'key': key, 'type': 'ARRAY', 'items': 'STRING', 'description': description}
+
+def _objects(key, fields, required, description=None):
+    return {'key': key, 'type': 'ARRAY', 'items': 'OBJECT', 'fields': fields, 'required': required, 'description': description}
+
+RESPONSE_FIELDS = {
+    'personalInfo': {'key': 'p', 'type': 'OBJECT', 'description': 'contact', 'required': ['name'], 'fields': {
+        'name': _string('n', 'name'), 'email': _string('e', 'email'), 'phone': _string('ph', 'phone'),
+        'location': _string('l', 'City, State'), 'linkedin': _string('li', 'linkedin'),
+        'github': _string('gh', 'github'), 'website': _string('w', 'website'),
+    }},
+    'summary': _string('s', '2-3 sentence summary for this role'),
+    'skills': _strings('k', 'skills, most relevant first'),
+    'experience': _objects('x', {
+        'title': _string('t', 'title'), 'company': _string('c', 'company'), 'location': _string('l', 'City, State'),
+        'startDate': _string('sd', 'start MM/YYYY'), 'endDate': _string('ed', 'end MM/YYYY or Present'),
+        'description': _strings('b', 'achievement bullets with results'),
+    }, ['title', 'company', 'description'], 'experience'),
+    'education': _objects('ed', {
+        'degree': _string('dg', 'degree'), 'institution': _string('i', 'institution'), 'location': _string('l', 'City, State'),
+        'startDate': _string('sd', 'start MM/YYYY'), 'endDate': _string('ed', 'end MM/YYYY'),
+        'gpa': _string('g', 'GPA if above 3.5'), 'relevantCourses': _strings('rc', 'relevant courses'),
+    }, ['degree', 'institution'], 'education'),
+    'projects': _objects('pr', {
+        'name': _string('n', 'name'), 'description': _string('d', 'technologies and impact'),
+        'technologies': _strings('te', 'technologies'), 'date': _string('dt', 'MM/YYYY'),
+        'github': _string('gh', 'repository'), 'link': _string('lk', 'demo link'),
+    }, ['name'], 'projects'),
+    'certifications': _objects('ce', {
+        'name': _string('n', 'name'), 'issuer': _string('is', 'issuer'),
+        'date': _string('dt', 'MM/YYYY'), 'link': _string('lk', 'credential link'),
+    }, ['name'], 'certifications'),
+    'coverLetter': {'key': 'cv', 'type': 'OBJECT', 'description': 'cover letter for this job, facts from the resume only',
+                    'required': ['paragraphs'], 'fields': {
+        'company': _string('co', 'company'), 'greeting': _string('gr', 'greeting'),
+        'paragraphs': _strings('pa', '3-4 short paragraphs'), 'closing': _string('so', 'sign-off'),
+    }},
+}
+
+# Only generated when asked for, alongside the resume
+COVER_LETTER_INSTRUCTION = "Also write a cover letter for this job in coverLetter: 3-4 short paragraphs that fit on one page, using only facts from the resume."
+
+def requested_fields(static_fields: List[str], cover_letter: bool) -> List[str]:
+    """
+    Fields the model is asked for: everything except the static sections, and
+    the cover letter only when it was requested
+    """
+    return [name for name, _ in RESUME_SCHEMA_FIELDS
+            if name not in static_fields and (cover_letter or name != 'coverLetter')]
+
+def build_response_schema(fields: Dict[str, Dict[str, Any]], required: List[str]) -> Dict[str, Any]:
+    """
+    OpenAPI-style schema for Gemini's responseSchema, using the short keys
+    """
+    def property_schema(field):
+        if field['type'] == 'OBJECT' or field.get('items') == 'OBJECT':
+            schema = build_response_schema(field['fields'], field['required'])
+            if field['type'] == 'ARRAY':
+                schema = {'type': 'ARRAY', 'items': schema}
+        elif field['type'] == 'ARRAY':
+            schema = {'type': 'ARRAY', 'items': {'type': field['items']}}
+        else:
+            schema = {'type': field['type']}
+        if field.get('description'):
+            schema['description'] = field['description']
+        return schema
+
+    return {
+        'type': 'OBJECT',
+        'properties': {field['key']: property_schema(field) for field in fields.values()},
+        'required': [fields[name]['key'] for name in required],
+    }
+
+def expand_compact_keys(data: Any, fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Map a response in short keys back to the full field names. Full names are
+    accepted as well, in case the model ignored the schema; other keys are dropped.
+    """
+    if not isinstance(data, dict):
+        return {}
+    expanded = {}
+    for name, field in fields.items():
+        if field['key'] in data:
+            value = data[field['key']]
+        elif name in data:
+            value = data[name]
+        else:
+            continue
+        if field['type'] == 'OBJECT':
+            value = expand_compact_keys(value, field['fields'])
+        elif field.get('items') == 'OBJECT':
+            value = [expand_compact_keys(item, field['fields']) for item in value if isinstance(item, dict)] \
+                if isinstance(value, list) else []
+        expanded[name] = value
+    return expanded
+
+def compact_keys(data: Any, fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The inverse of expand_compact_keys: full field names to the short keys
+    """
+    if not isinstance(data, dict):
+        return {}
+    compacted = {}
+    for name, field in fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        if field['type'] == 'OBJECT':
+            value = compact_keys(value, field['fields'])
+        elif field.get('items') == 'OBJECT':
+            value = [compact_keys(item, field['fields']) for item in value if isinstance(item, dict)] \
+                if isinstance(value, list) else []
+        compacted[field['key']] = value
+    return compacted
 
 class GeminiService:
     def __init__(self):
         self.api_key = os.environ.get('GEMINI_API_KEY')
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+        self.base_url = os.environ.get(
+            'GEMINI_API_URL',
+            "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+        )
         
         # Check if running in demo mode (for local development)
         self.demo_mode = (
@@ -17,23 +227,320 @@ class GeminiService:
         # Validate API key is configured (unless in demo mode)
         if not self.demo_mode and (not self.api_key or self.api_key == "your-gemini-api-key"):
             raise Exception("GEMINI_API_KEY environment variable is required and must be set to a valid API key")
+
+        # Opt-in: one concurrent request per JD-dependent section instead of one long generation
+        self.sectional = os.environ.get('GEMINI_SECTIONAL_TAILORING', 'false').lower() == 'true'
+        self.section_concurrency = int(os.environ.get('GEMINI_SECTION_CONCURRENCY', 6))
+        self.section_timeout = float(os.environ.get('GEMINI_SECTION_TIMEOUT_SECONDS', 15))
+        self.section_retries = int(os.environ.get('GEMINI_SECTION_RETRIES', 1))
+        # Opt-in: personal info, education and certifications parsed locally are merged back, not generated
+        self.static_passthrough = os.environ.get('GEMINI_STATIC_PASSTHROUGH', 'false').lower() == 'true'
+        # Ask for JSON against a compact response schema instead of embedding an example structure
+        self.structured_output = os.environ.get('GEMINI_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+        # Output limit of the request that completes a response cut off at maxOutputTokens
+        self.continuation_max_tokens = int(os.environ.get('GEMINI_CONTINUATION_MAX_TOKENS', 2000))
+        self.resume_parser = PDFService()
+        # Kept-alive connections to the API, shared by every request of this worker
+        self.http = requests.Session()
+
+    def prepare_resume(self, resume_data: str) -> Dict[str, Any]:
+        """
+        The job-independent work on a resume: section parsing, the static
+        sections and the budgeted prompt text. A batch does this once and
+        passes the result to optimize_resume for each job description.
+        """
+        with timed('prompt_preprocess'):
+            parsed = self.resume_parser.parse_resume_sections(resume_data)
+            prompt_resume, prompt_stats = prepare_resume_text(resume_data)
+        return {
+            'parsed': parsed,
+            # Static sections are parsed from the full text, before it is cut to the budget
+            'static': self.resume_parser.extract_static_sections(resume_data, parsed) if self.static_passthrough else {},
+            'prompt_resume': prompt_resume,
+            'prompt_stats': prompt_stats
+        }
         
-    def optimize_resume(self, resume_data: str, job_description: str) -> Dict[str, Any]:
+    def optimize_resume(self, resume_data: str, job_description: str, include_cover_letter: bool = False,
+                        prepared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Use Gemini API to optimize resume content based on job description
+        Use Gemini API to optimize resume content based on job description.
+        With `include_cover_letter` the same response also carries a `coverLetter`.
+        `prepared` is the result of prepare_resume for this resume, if already done.
         """
         # If in demo mode, return structured demo data
         if self.demo_mode:
-            return self._get_demo_resume_data(resume_data, job_description)
-            
-        prompt = self._create_optimization_prompt(resume_data, job_description)
-        response = self._call_gemini_api(prompt)
-        return self._parse_gemini_response(response)
+            demo_data = self._get_demo_resume_data(resume_data, job_description)
+            if include_cover_letter:
+                demo_data['coverLetter'] = self._get_demo_cover_letter()
+            return demo_data
+
+        if prepared is None:
+            prepared = self.prepare_resume(resume_data)
+        with timed('prompt_preprocess'):
+            prompt_job_description, jd_stats = prepare_job_description(job_description)
+        print(f"Prompt inputs: {dict(prepared['prompt_stats'], **jd_stats)}")
+
+        if self.sectional:
+            with timed('llm_call'):
+                return self._optimize_resume_sectional(resume_data, prompt_job_description, include_cover_letter,
+                                                       parsed=prepared['parsed'], prompt_resume=prepared['prompt_resume'])
+
+        prompt_resume = prepared['prompt_resume']
+        static = prepared['static']
+        required_fields = [field for field in ['personalInfo', 'summary', 'skills', 'experience'] if field not in static]
+        fields = requested_fields(list(static), include_cover_letter)
+        prompt = self._create_optimization_prompt(prompt_resume, prompt_job_description, static_fields=list(static),
+                                                  structured=self.structured_output, cover_letter=include_cover_letter)
+        response_fields = None
+        if self.structured_output:
+            response_fields = {name: RESPONSE_FIELDS[name] for name in fields}
+        with timed('llm_call'):
+            response, finish_reason = self._generate(
+                prompt, request='passthrough' if static else 'full',
+                # A cover letter adds a few hundred tokens to the response
+                max_output_tokens=5000 if include_cover_letter else 4000,
+                response_schema=build_response_schema(response_fields, required_fields) if response_fields else None
+            )
+        parse_error = None
+        with timed('json_parse'):
+            try:
+                parsed_data = self._parse_gemini_response(response, required_fields, compact_fields=response_fields)
+                llm_json_outcomes.inc(outcome='complete')
+            except Exception as e:
+                print(f"Gemini response did not parse (finish reason {finish_reason}): {e}")
+                parse_error = e
+        if parse_error:
+            parsed_data = self._salvage_response(response, parse_error, prompt_resume, prompt_job_description,
+                                                 fields, required_fields)
+        parsed_data.update(static)
+        return parsed_data
+
+    def _salvage_response(self, response: str, error: Exception, resume_data: str, job_description: str,
+                          fields: List[str], required_fields: List[str]) -> Dict[str, Any]:
+        """
+        Recover from a response that did not parse, usually one cut off at the
+        output token limit. The completed fields are kept, and one short
+        continuation request asks only for the fields that are missing or were
+        cut off; a list cut off mid-way keeps its finished items and is extended.
+        """
+        compact_fields = None
+        if self.structured_output:
+            compact_fields = {name: RESPONSE_FIELDS[name] for name in fields}
+        repaired = repair_truncated_json(response)
+        if not repaired:
+            llm_json_outcomes.inc(outcome='failed')
+            raise error
+        data, open_key = repaired
+        if compact_fields:
+            data = expand_compact_keys(data, compact_fields)
+            open_key = next((name for name, field in compact_fields.items() if field['key'] == open_key), None)
+
+        missing = [name for name in fields if name not in data or name == open_key]
+        continuation = {}
+        if missing:
+            print(f"Salvaged {sorted(set(data) - set(missing))} from the Gemini response, continuing with {missing}")
+            try:
+                with timed('llm_continuation'):
+                    continuation = self._continue_response(resume_data, job_description, data, missing, open_key)
+            except Exception as e:
+                print(f"Gemini continuation request failed: {e}")
+
+        for name, value in continuation.items():
+            if name == open_key and isinstance(data.get(name), list) and isinstance(value, list):
+                data[name] = data[name] + value
+            else:
+                data[name] = value
+
+        missing_required = [field for field in required_fields if field not in data]
+        if missing_required:
+            llm_json_outcomes.inc(outcome='failed')
+            raise Exception(f"Error parsing Gemini response: {error}; still missing {missing_required} after repair")
+        llm_json_outcomes.inc(outcome='continued' if continuation else 'repaired')
+        return data
+
+    def _continue_response(self, resume_data: str, job_description: str, data: Dict[str, Any],
+                           missing: List[str], open_key: Optional[str]) -> Dict[str, Any]:
+        """
+        Request only the `missing` fields of a cut-off response
+        """
+        done = [name for name, _ in RESUME_SCHEMA_FIELDS if name not in missing and name != 'coverLetter']
+        prompt = self._create_optimization_prompt(resume_data, job_description, static_fields=done,
+                                                  structured=self.structured_output, cover_letter='coverLetter' in missing)
+        written = data.get(open_key) if open_key in missing else None
+        if isinstance(written, list) and written:
+            labels = [
+                ' at '.join(str(item[key]) for key in ('title', 'company', 'name', 'degree') if item.get(key))
+                if isinstance(item, dict) else str(item)
+                for item in written
+            ]
+            prompt += f"\n\nThe {open_key} list is partly written already: {json.dumps(labels, ensure_ascii=False)}. " \
+                      f"Return only the {open_key} entries that come after these, or an empty list if there are none."
+
+        fields = None
+        if self.structured_output:
+            fields = {name: RESPONSE_FIELDS[name] for name in missing}
+        response, _ = self._generate(
+            prompt, max_output_tokens=self.continuation_max_tokens, request='continuation',
+            response_schema=build_response_schema(fields, []) if fields else None
+        )
+        try:
+            result = self._extract_json(response)
+        except ValueError:
+            repaired = repair_truncated_json(response)
+            result = repaired[0] if repaired else {}
+        if fields:
+            result = expand_compact_keys(result, fields)
+        return {name: value for name, value in result.items() if name in missing}
     
-    def _call_gemini_api(self, prompt: str) -> str:
+    def _optimize_resume_sectional(self, resume_data: str, job_description: str,
+                                   include_cover_letter: bool = False,
+                                   parsed: Optional[Dict[str, Any]] = None,
+                                   prompt_resume: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Tailor the summary, the skills, each experience entry and the projects in
+        concurrent requests, so latency follows the longest section rather than
+        the whole resume. Personal info, education and certifications are parsed
+        locally and passed through when they parse reliably, and requested
+        otherwise. Whole-resume prompts use `prompt_resume`, the budgeted text from
+        prepare_resume. A failed section is retried on its own; projects,
+        certifications, education and the cover letter are dropped if they still
+        fail, anything else fails the request.
+        """
+        parsed = parsed or self.resume_parser.parse_resume_sections(resume_data)
+        prompt_resume = prompt_resume or resume_data
+        sections = parsed['sections']
+        personal_info = self.resume_parser.extract_static_sections(resume_data, parsed).get('personalInfo')
+        # name -> (prompt, max output tokens, required)
+        tasks = {
+            'summary': (self._section_prompt(
+                "Write a compelling 2-3 sentence professional summary that highlights the candidate's key qualifications for the job below.",
+                'RESUME DATA', prompt_resume, job_description, '{"summary": "..."}'
+            ), 300, True),
+            'skills': (self._section_prompt(
+                "Select the candidate's skills most relevant to the job below: technical skills, programming languages, frameworks and tools, and relevant soft skills, most relevant first.",
+                'RESUME DATA', sections.get('skills') or prompt_resume, job_description, '{"skills": ["Skill"]}'
+            ), 400, True),
+        }
+
+        entries = parsed['experience_entries']
+        for index, entry in enumerate(entries):
+            tasks[f"experience[{index}]"] = (self._section_prompt(
+                "Rewrite this one role from the candidate's resume for the job below, with 3-5 achievement-focused bullet points that show impact and results.",
+                'ROLE', entry, job_description, EXPERIENCE_ENTRY_SHAPE
+            ), 700, True)
+        if not entries:
+            # No experience section was recognised, so let the model find it in the whole resume
+            tasks['experience'] = (self._section_prompt(
+                "Rewrite the candidate's work experience for the job below, with achievement-focused bullet points.",
+                'RESUME DATA', prompt_resume, job_description, f'{{"experience": [{EXPERIENCE_ENTRY_SHAPE}]}}'
+            ), 2000, True)
+
+        if sections.get('projects'):
+            tasks['projects'] = (self._section_prompt(
+                "Rewrite the candidate's projects for the job below, most relevant first.",
+                'PROJECTS', sections['projects'], job_description, f'{{"projects": [{PROJECT_SHAPE}]}}'
+            ), 800, False)
+        if sections.get('certifications') and not parsed['certifications']:
+            tasks['certifications'] = (self._section_prompt(
+                "List the candidate's certifications exactly as given.",
+                'CERTIFICATIONS', sections['certifications'], None, f'{{"certifications": [{CERTIFICATION_SHAPE}]}}'
+            ), 300, False)
+        if personal_info is None:
+            # The header did not yield a name with an email or phone, so let the model read it
+            tasks['personalInfo'] = (self._section_prompt(
+                "Extract the candidate's contact details exactly as given.",
+                'RESUME HEADER', sections.get('header') or prompt_resume, None, PERSONAL_INFO_SHAPE
+            ), 300, True)
+        if parsed['education'] is None:
+            # The section is there but the local parser could not read it
+            tasks['education'] = (self._section_prompt(
+                "List the candidate's education exactly as given.",
+                'EDUCATION', sections['education'], None, f'{{"education": [{EDUCATION_SHAPE}]}}'
+            ), 400, False)
+        if include_cover_letter:
+            tasks['coverLetter'] = (self._section_prompt(
+                "Write a cover letter for the job below: 3-4 short paragraphs that fit on one page, using only facts from the resume.",
+                'RESUME DATA', prompt_resume, job_description, COVER_LETTER_SHAPE
+            ), 800, False)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.section_concurrency, len(tasks))),
+                                thread_name_prefix='gemini-section') as executor:
+            futures = {
+                name: executor.submit(propagate(self._request_section), name, prompt, max_tokens, required)
+                for name, (prompt, max_tokens, required) in tasks.items()
+            }
+            results = {name: future.result() for name, future in futures.items()}
+
+        if entries:
+            experience = [results[f"experience[{index}]"] for index in range(len(entries))]
+        else:
+            experience = results['experience'].get('experience', [])
+        tailored = {
+            'personalInfo': personal_info or results['personalInfo'].get('personalInfo', {}),
+            'summary': results['summary'].get('summary', ''),
+            'skills': results['skills'].get('skills', []),
+            'experience': experience,
+            'education': parsed['education'] if parsed['education'] is not None else (results.get('education') or {}).get('education', []),
+            'projects': (results.get('projects') or {}).get('projects', []),
+            'certifications': parsed['certifications'] or (results.get('certifications') or {}).get('certifications', [])
+        }
+        if (results.get('coverLetter') or {}).get('coverLetter'):
+            tailored['coverLetter'] = results['coverLetter']['coverLetter']
+        return tailored
+
+    def _section_prompt(self, instruction: str, source_label: str, source_text: str,
+                        job_description: Optional[str], shape: str) -> str:
+        """
+        Prompt for one section of the sectional mode
+        """
+        job_block = f"\n\nJOB DESCRIPTION:\n{job_description}" if job_description else ''
+        return f"""You are an expert resume writer and ATS optimization specialist. {instruction}
+Use keywords from the job description naturally and stay truthful to the candidate's background.
+
+{source_label}:
+{source_text}{job_block}
+
+Return ONLY a JSON object of this shape, no additional text or explanation:
+{shape}"""
+
+    def _request_section(self, name: str, prompt: str, max_tokens: int, required: bool) -> Optional[Dict[str, Any]]:
+        """
+        Request one section, retrying only this section on failure
+        """
+        section = name.split('[')[0]
+        attempts = 1 + self.section_retries
+        last_error = None
+        for attempt in range(attempts):
+            try:
+                response = self._call_gemini_api(prompt, max_output_tokens=max_tokens, timeout=self.section_timeout, request='section')
+                result = self._extract_json(response)
+                llm_section_requests.inc(section=section, outcome='ok' if attempt == 0 else 'retried')
+                return result
+            except Exception as e:
+                last_error = e
+                print(f"Gemini request for {name} failed (attempt {attempt + 1} of {attempts}): {e}")
+
+        llm_section_requests.inc(section=section, outcome='failed')
+        if required:
+            raise Exception(f"Gemini request for the {name} section failed: {last_error}")
+        print(f"Leaving out the {name} section")
+        return None
+
+    def _call_gemini_api(self, prompt: str, max_output_tokens: int = 4000, timeout: float = 30,
+                         request: str = 'full', response_schema: Optional[Dict[str, Any]] = None) -> str:
         """
         Make API call to Gemini
         """
+        return self._generate(prompt, max_output_tokens, timeout, request, response_schema)[0]
+
+    def _generate(self, prompt: str, max_output_tokens: int = 4000, timeout: float = 30,
+                  request: str = 'full', response_schema: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[str]]:
+        """
+        Make API call to Gemini and return the text with the finish reason
+        (MAX_TOKENS when the output limit cut it off). Prompt and output tokens
+        are recorded under `request` (full, passthrough, section or continuation).
+        With `response_schema` the API returns bare JSON conforming to it.
+        """
         url = f"{self.base_url}?key={self.api_key}"
         
         payload = {
@@ -50,15 +557,18 @@ class GeminiService:
                 "temperature": 0.7,
                 "topK": 40,
                 "topP": 0.95,
-                "maxOutputTokens": 4000,
+                "maxOutputTokens": max_output_tokens,
             }
         }
+        if response_schema:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = response_schema
         
         headers = {
             "Content-Type": "application/json",
         }
         
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = self.http.post(url, json=payload, headers=headers, timeout=timeout)
         
         if response.status_code != 200:
             raise Exception(f"Gemini API returned status {response.status_code}: {response.text}")
@@ -71,12 +581,35 @@ class GeminiService:
         if 'content' not in data['candidates'][0] or 'parts' not in data['candidates'][0]['content']:
             raise Exception("Invalid response structure from Gemini")
         
-        return data['candidates'][0]['content']['parts'][0]['text']
+        text = data['candidates'][0]['content']['parts'][0]['text']
+        # Estimated from the character count when the API does not report usage
+        usage = data.get('usageMetadata') or {}
+        llm_prompt_tokens.observe(usage.get('promptTokenCount') or estimate_tokens(prompt), request=request)
+        llm_output_tokens.observe(usage.get('candidatesTokenCount') or estimate_tokens(text), request=request)
+        return text, data['candidates'][0].get('finishReason')
     
-    def _create_optimization_prompt(self, resume_data: str, job_description: str) -> str:
+    def _create_optimization_prompt(self, resume_data: str, job_description: str,
+                                    static_fields: Optional[List[str]] = None, structured: bool = False,
+                                    cover_letter: bool = False) -> str:
         """
-        Create optimized prompt for Gemini
+        Create optimized prompt for Gemini. Fields in `static_fields` were parsed
+        locally, so they are left out of the requested structure. In structured
+        mode the structure is sent as the response schema instead.
         """
+        static_fields = static_fields or []
+        fields = requested_fields(static_fields, cover_letter)
+        letter_note = f"{COVER_LETTER_INSTRUCTION}\n\n" if cover_letter else ''
+        if structured:
+            response_format = "Fill in the response schema with the optimized resume; each key's description says what it holds."
+        else:
+            schema = '{\n' + ',\n'.join(snippet for field, snippet in RESUME_SCHEMA_FIELDS if field in fields) + '\n}'
+            static_note = ''
+            if static_fields:
+                static_note = f"Do not include {', '.join(static_fields)}; these sections are handled separately.\n\n"
+            response_format = f"""Return your response as a JSON object with the following structure:
+{schema}
+
+{static_note}IMPORTANT: Return ONLY the JSON object, no additional text or explanation."""
         return f"""You are an expert resume writer and ATS optimization specialist. Your task is to optimize a resume for a specific job description while maintaining accuracy and professionalism.
 
 RESUME DATA:
@@ -92,88 +625,22 @@ Please create an optimized resume that:
 4. Follows ATS-friendly formatting
 5. Creates compelling bullet points that show impact and results
 
-Return your response as a JSON object with the following structure:
-{{
-    "personalInfo": {{
-        "name": "Candidate Name",
-        "email": "email@example.com",
-        "phone": "+1234567890",
-        "location": "City, State",
-        "linkedin": "linkedin.com/in/profile",
-        "github": "github.com/username",
-        "website": "portfolio-website.com"
-    }},
-    "summary": "A compelling 2-3 sentence professional summary that highlights key qualifications for this role",
-    "skills": [
-        "Relevant technical skills",
-        "Programming languages",
-        "Frameworks and tools",
-        "Soft skills relevant to the job"
-    ],
-    "experience": [
-        {{
-            "title": "Job Title",
-            "company": "Company Name",
-            "location": "City, State",
-            "startDate": "MM/YYYY",
-            "endDate": "MM/YYYY or Present",
-            "description": [
-                "Achievement-focused bullet point with quantifiable results",
-                "Another accomplishment that relates to the target job",
-                "Technical implementation or leadership example"
-            ]
-        }}
-    ],
-    "education": [
-        {{
-            "degree": "Degree Name",
-            "institution": "University Name",
-            "location": "City, State",
-            "startDate": "MM/YYYY",
-            "endDate": "MM/YYYY",
-            "gpa": "3.X" (if mentioned and above 3.5),
-            "relevantCourses": ["Course 1", "Course 2"] (if relevant)
-        }}
-    ],
-    "projects": [
-        {{
-            "name": "Project Name",
-            "description": "Brief description highlighting technologies and impact",
-            "technologies": ["Tech1", "Tech2", "Tech3"],
-            "date": "MM/YYYY",
-            "github": "github.com/repo-link",
-            "link": "live-demo-link.com"
-        }}
-    ],
-    "certifications": [
-        {{
-            "name": "Certification Name",
-            "issuer": "Issuing Organization",
-            "date": "MM/YYYY",
-            "link": "credential-link.com"
-        }}
-    ]
-}}
-
-IMPORTANT: Return ONLY the JSON object, no additional text or explanation."""
+{letter_note}{response_format}"""
 
-    def _parse_gemini_response(self, response_text: str) -> Dict[str, Any]:
+    def _parse_gemini_response(self, response_text: str, required_fields: Optional[List[str]] = None,
+                               compact_fields: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
-        Parse Gemini's response and extract JSON
+        Parse Gemini's response and extract JSON. A structured-output response
+        uses the short keys of `compact_fields`, which are mapped back.
         """
         try:
-            # Try to find JSON in the response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                raise ValueError(f"No JSON found in Gemini response. Response: {response_text[:200]}...")
-            
-            json_str = response_text[start_idx:end_idx]
-            parsed_data = json.loads(json_str)
+            parsed_data = self._extract_json(response_text)
+            if compact_fields:
+                parsed_data = expand_compact_keys(parsed_data, compact_fields)
             
             # Validate required fields
-            required_fields = ['personalInfo', 'summary', 'skills', 'experience']
+            if required_fields is None:
+                required_fields = ['personalInfo', 'summary', 'skills', 'experience']
             missing_fields = [field for field in required_fields if field not in parsed_data]
             if missing_fields:
                 raise ValueError(f"Gemini response missing required fields: {missing_fields}")
@@ -185,6 +652,22 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation."""
         except Exception as e:
             raise Exception(f"Error parsing Gemini response: {e}")
     
+    def _extract_json(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse the outermost JSON object in a response
+        """
+        # Try to find JSON in the response
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}') + 1
+
+        if start_idx == -1 or end_idx == 0:
+            raise ValueError(f"No JSON found in Gemini response. Response: {response_text[:200]}...")
+
+        parsed_data = json.loads(response_text[start_idx:end_idx])
+        if not isinstance(parsed_data, dict):
+            raise ValueError("Gemini response is not a JSON object")
+        return parsed_data
+
     def _get_demo_resume_data(self, resume_data: str, job_description: str) -> Dict[str, Any]:
         """
         Generate demo resume data for local development/testing
@@ -277,6 +760,21 @@ IMPORTANT: Return ONLY the JSON object, no additional text or explanation."""
                 }
             ]
         }
+
+    def _get_demo_cover_letter(self) -> Dict[str, Any]:
+        """
+        Demo cover letter to go with the demo resume data
+        """
+        return {
+            "company": "TechCorp Inc.",
+            "greeting": "Dear Hiring Manager,",
+            "paragraphs": [
+                "I am excited to apply for the Software Developer role. With five years of full-stack experience building scalable web applications, I am confident I can contribute from day one.",
+                "At TechCorp I led the development of a microservices platform serving over 100,000 users, cutting response times by 40%. Earlier, at StartupXYZ, I built RESTful APIs and reduced deployment time by 80% with automated CI/CD pipelines.",
+                "I would welcome the chance to discuss how my experience with React, Node.js and AWS can help your team. Thank you for your time and consideration."
+            ],
+            "closing": "Sincerely,"
+        }
     
     def test_connection(self) -> bool:
         """
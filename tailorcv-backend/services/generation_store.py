@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
+class GenerationStore:
+    """
+    Keeps the tailored JSON of each generation so it can be re-rendered with
+    another template without calling the LLM again.
+
+    Records are JSON files named by a random generation id and written
+    atomically, so gunicorn workers can share the directory. As in the artifact
+    store, a file's mtime is its last-access time and drives the idle TTL.
+    """
+
+    _ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+    def __init__(self, base_dir: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.base_dir = base_dir or os.environ.get(
+            'GENERATION_STORE_DIR', os.path.join(tempfile.gettempdir(), 'tailorcv', 'generations')
+        )
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.environ.get('GENERATION_TTL_SECONDS', 24 * 3600))
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        self.cleanup()
+
+    def put(self, content: Dict[str, Any], owner_id: Optional[str] = None) -> str:
+        """
+        Store the tailored content of a generation and return its id
+        """
+        generation_id = hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+        self._write({
+            'generation_id': generation_id,
+            'owner_id': owner_id,
+            'created_at': time.time(),
+            'content': content,
+            'renders': {}
+        })
+        self._maybe_cleanup()
+        return generation_id
+
+    def update_content(self, record: Dict[str, Any], content: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace a generation's content with an edited version. Renders of the old content are forgotten.
+        """
+        record = dict(record, content=content, renders={}, edited_at=time.time())
+        self._write(record)
+        return record
+
+    def record_render(self, record: Dict[str, Any], variant: str, artifact_id: str) -> None:
+        """
+        Remember the artifact rendered from the current content for a variant
+        (template, layout and watermark), so an unchanged resubmission is served as is
+        """
+        renders = dict(record.get('renders') or {})
+        if renders.get(variant) == artifact_id:
+            return
+        renders[variant] = artifact_id
+        record['renders'] = renders
+        self._write(record)
+
+    def get(self, generation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored record (owner_id, created_at, content), or None if unknown or expired
+        """
+        if not self._ID_PATTERN.match(generation_id or ''):
+            return None
+        path = self._path_for(generation_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                self._remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        # Each re-render keeps the generation alive for another TTL
+        self._touch(path)
+        return record
+
+    def cleanup(self) -> int:
+        """
+        Remove expired records. Returns the number of files removed.
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            self._last_cleanup = now
+            try:
+                with os.scandir(self.base_dir) as it:
+                    for entry in it:
+                        if not entry.name.endswith('.json'):
+                            continue
+                        try:
+                            if now - entry.stat().st_mtime > self.ttl_seconds:
+                                removed += self._remove(entry.path)
+                        except FileNotFoundError:
+                            continue
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.base_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+                json.dump(record, tmp_file, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self._path_for(record['generation_id']))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _maybe_cleanup(self) -> None:
+        # Sweeping on every write would scan the directory per generation
+        if time.time() - self._last_cleanup > min(self.ttl_seconds, 600):
+            self.cleanup()
+
+    def _path_for(self, generation_id: str) -> str:
+        return os.path.join(self.base_dir, f"{generation_id}.json")
+
+    def _touch(self, path: str) -> None:
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+
+    def _remove(self, path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,175 @@
+"""
+Static checks for rendered LaTeX, run before pdflatex is spawned.
+
+`lint_latex` predicts whether a document will fail to compile (unbalanced
+braces or environments, specials outside the context where they are legal,
+unusable `\\href` URLs) and flags overlong unbreakable words. `repair_latex`
+fixes `\\href` URLs, which the sanitizer escapes like any other text, so a
+payload does not have to fall back to ReportLab for them.
+"""
+
+import re
+from typing import Dict, Any, List, Tuple
+
+# Words longer than this cannot be hyphenated or broken and overflow the margin
+MAX_TOKEN_LENGTH = 60
+
+ALIGNMENT_ENVIRONMENTS = {
+    'tabular', 'tabular*', 'tabularx', 'array', 'align', 'align*', 'alignat', 'alignat*',
+    'eqnarray', 'eqnarray*', 'matrix', 'pmatrix', 'bmatrix', 'cases', 'split', 'longtable'
+}
+MATH_ENVIRONMENTS = {
+    'equation', 'equation*', 'align', 'align*', 'alignat', 'alignat*', 'gather', 'gather*',
+    'multline', 'multline*', 'eqnarray', 'eqnarray*', 'math', 'displaymath'
+}
+
+_TOKEN_PATTERN = re.compile(r'\\(?:[A-Za-z@]+\*?|.)|%[^\n]*|\$\$?|[{}&#_^]', re.DOTALL)
+_ENVIRONMENT_PATTERN = re.compile(r'\s*\{([^{}]*)\}')
+_HREF_PATTERN = re.compile(r'\\href\{([^{}]*)\}')
+_URL_ARGUMENT_PATTERN = re.compile(r'\\(?:href|url)\{([^{}]*)\}')
+_URL_PATTERN = re.compile(r'^(https?://|mailto:|ftp://)(?:[^\s\\{}]|\\[%#])+$')
+_WORD_PATTERN = re.compile(r'[^\s{}\\]+')
+
+# Inside a URL the sanitizer's escapes become literal characters again
+_URL_UNESCAPES = [
+    ('\\textasciitilde{}', '~'), ('\\textasciicircum{}', '^'), ('\\textbackslash{}', '%5C'),
+    ('\\textless{}', '<'), ('\\textgreater{}', '>'), ('\\_', '_'), ('\\&', '&'),
+    ('\\$', '$'), ('\\{', '{'), ('\\}', '}'),
+]
+
+def _issue(rule: str, content: str, position: int, message: str, fatal: bool = True) -> Dict[str, Any]:
+    return {
+        'rule': rule,
+        'line': content.count('\n', 0, position) + 1,
+        'message': message,
+        'fatal': fatal
+    }
+
+def lint_latex(content: str) -> List[Dict[str, Any]]:
+    """
+    Return the problems found in a LaTeX document. Issues marked `fatal` are
+    expected to make pdflatex fail.
+    """
+    issues = []
+    body_start = content.find('\\begin{document}')
+    if body_start == -1:
+        return [_issue('structure', content, 0, 'Missing \\begin{document}')]
+    if content.find('\\end{document}', body_start) == -1:
+        issues.append(_issue('structure', content, len(content), 'Missing \\end{document}'))
+
+    # URL arguments are read verbatim by hyperref, so blank them out (keeping offsets) before scanning
+    scanned = _URL_ARGUMENT_PATTERN.sub(
+        lambda match: match.group()[:match.start(1) - match.start()] + ' ' * len(match.group(1)) + '}',
+        content
+    )
+
+    depth = 0
+    in_math = False
+    environments: List[Tuple[str, int]] = []
+
+    for match in _TOKEN_PATTERN.finditer(scanned):
+        token = match.group()
+        position = match.start()
+        in_body = position > body_start
+
+        if token[0] == '%':
+            continue
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth < 0:
+                issues.append(_issue('brace_balance', content, position, 'Closing brace without a matching opening brace'))
+                depth = 0
+        elif token[0] == '$':
+            in_math = not in_math
+        elif token in ('\\(', '\\['):
+            in_math = True
+        elif token in ('\\)', '\\]'):
+            in_math = False
+        elif token in ('\\begin', '\\end'):
+            environment = _ENVIRONMENT_PATTERN.match(scanned, match.end())
+            if not environment:
+                continue
+            name = environment.group(1).strip()
+            if token == '\\begin':
+                environments.append((name, position))
+                in_math = in_math or name in MATH_ENVIRONMENTS
+            elif name not in (opened for opened, _ in environments):
+                issues.append(_issue('environment', content, position, f"\\end{{{name}}} without a matching \\begin"))
+            else:
+                # Pop back to the matching \begin, reporting anything left open inside it
+                while environments[-1][0] != name:
+                    opened, _ = environments.pop()
+                    issues.append(_issue('environment', content, position, f"\\begin{{{opened}}} is never ended"))
+                environments.pop()
+                if name in MATH_ENVIRONMENTS:
+                    in_math = False
+        elif not in_body:
+            # The preamble legitimately uses # for macro parameters and & in macro bodies
+            continue
+        elif token == '&':
+            if not any(name in ALIGNMENT_ENVIRONMENTS for name, _ in environments):
+                issues.append(_issue('unescaped_special', content, position, 'Unescaped & outside a table'))
+        elif token == '#':
+            issues.append(_issue('unescaped_special', content, position, 'Unescaped # in the document body'))
+        elif token in ('_', '^') and not in_math:
+            issues.append(_issue('unescaped_special', content, position, f"Unescaped {token} outside math mode"))
+
+    if depth > 0:
+        issues.append(_issue('brace_balance', content, len(content), f"{depth} unclosed brace(s)"))
+    if in_math:
+        issues.append(_issue('math', content, len(content), 'Math mode is never closed'))
+    for name, position in environments:
+        issues.append(_issue('environment', content, position, f"\\begin{{{name}}} is never ended"))
+
+    issues.extend(_lint_hrefs(content))
+    issues.extend(_lint_long_tokens(content, body_start))
+    return issues
+
+def _lint_hrefs(content: str) -> List[Dict[str, Any]]:
+    issues = []
+    for match in _HREF_PATTERN.finditer(content):
+        url = match.group(1)
+        if not _URL_PATTERN.match(url):
+            # hyperref still compiles these, but the link is broken
+            issues.append(_issue('href', content, match.start(), f"Unusable \\href URL: {url[:80]!r}", fatal=False))
+    return issues
+
+def _lint_long_tokens(content: str, body_start: int) -> List[Dict[str, Any]]:
+    issues = []
+    body = _HREF_PATTERN.sub('', content[body_start:])
+    for match in _WORD_PATTERN.finditer(body):
+        if len(match.group()) > MAX_TOKEN_LENGTH:
+            issues.append({
+                'rule': 'long_token',
+                'line': None,
+                'message': f"Unbreakable word of {len(match.group())} characters: {match.group()[:40]!r}...",
+                'fatal': False
+            })
+    return issues
+
+def repair_latex(content: str) -> Tuple[str, int]:
+    """
+    Fix `\\href` URLs: undo the sanitizer's escapes, which hyperref would take
+    literally, and add a missing scheme. Returns the repaired document and the
+    number of URLs changed.
+    """
+    repairs = 0
+
+    def repair_href(match):
+        nonlocal repairs
+        url = original = match.group(1).strip()
+        for escaped, plain in _URL_UNESCAPES:
+            url = url.replace(escaped, plain)
+        url = url.replace(' ', '%20')
+        if url and not re.match(r'^[a-z][a-z0-9+.-]*:', url, re.IGNORECASE):
+            url = f"https://{url}"
+        # hyperref needs % and # escaped when \href sits inside another command's argument
+        url = re.sub(r'(?<!\\)([%#])', r'\\\1', url)
+        if url != original:
+            repairs += 1
+        return f"\\href{{{url}}}"
+
+    content = _HREF_PATTERN.sub(repair_href, content)
+    return content, repairs
@@ -0,0 +1,126 @@
+import os
+import time
+import signal
+import tempfile
+import subprocess
+from typing import Dict, Any, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+class LaTeXSandbox:
+    """
+    Runs one pdflatex job under enforced limits: CPU seconds, address space,
+    output file size and wall clock, in a throwaway directory on tmpfs.
+
+    Limits are applied to the child with prlimit() right after it starts rather
+    than in a preexec_fn, which is unsafe in threaded servers. A job that hits a
+    limit is killed and reported with its own outcome instead of stalling the worker.
+    """
+    def __init__(self):
+        self.cpu_seconds = int(os.environ.get('LATEX_CPU_SECONDS', 20))
+        self.memory_bytes = int(os.environ.get('LATEX_MEMORY_MB', 1024)) * 1024 * 1024
+        self.max_output_bytes = int(os.environ.get('LATEX_MAX_OUTPUT_MB', 20)) * 1024 * 1024
+        self.timeout_seconds = float(os.environ.get('LATEX_TIMEOUT_SECONDS', 60))
+        self.work_dir = os.environ.get('LATEX_WORK_DIR') or self._default_work_dir()
+
+    def _default_work_dir(self) -> Optional[str]:
+        # /dev/shm keeps the intermediate files in memory; fall back to the normal temp dir
+        if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+            return '/dev/shm'
+        return None
+
+    def compile(self, latex_content: str) -> Dict[str, Any]:
+        """
+        Compile a document. Returns the outcome ('ok', 'error', 'timeout',
+        'cpu_limit', 'output_limit' or 'killed'), the PDF bytes when one was
+        written, the log, a short reason and the elapsed seconds.
+        """
+        start = time.monotonic()
+        with tempfile.TemporaryDirectory(dir=self.work_dir, prefix='tailorcv-latex-') as job_dir:
+            with open(os.path.join(job_dir, 'file.tex'), 'w', encoding='utf-8') as f:
+                f.write(latex_content)
+
+            args = [
+                'pdflatex',
+                '-interaction=nonstopmode',
+                '-halt-on-error',
+                '-no-shell-escape',
+                '-output-directory', job_dir,
+                'file.tex'
+            ]
+            process = subprocess.Popen(
+                args,
+                cwd=job_dir,
+                # Everything pdflatex prints also goes to file.log, which the FSIZE limit caps
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                # Own process group, so a timeout kills anything pdflatex started
+                start_new_session=True
+            )
+            self._apply_limits(process.pid)
+
+            timed_out = False
+            try:
+                process.wait(timeout=self.timeout_seconds)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                process.wait()
+
+            log = self._read(os.path.join(job_dir, 'file.log'))
+            pdf_bytes = None
+            if not timed_out and process.returncode == 0:
+                pdf_bytes = self._read(os.path.join(job_dir, 'file.pdf'))
+
+        outcome, reason = self._classify(process.returncode, timed_out, pdf_bytes)
+        return {
+            'outcome': outcome,
+            'pdf': pdf_bytes,
+            'log': log.decode('utf-8', errors='ignore') if log else None,
+            'reason': reason,
+            'elapsed': time.monotonic() - start
+        }
+
+    def _apply_limits(self, pid: int) -> None:
+        if resource is None or not hasattr(resource, 'prlimit'):
+            return
+        limits = [
+            # The hard limit sits one second above the soft one: SIGXCPU first, SIGKILL if ignored
+            (resource.RLIMIT_CPU, (self.cpu_seconds, self.cpu_seconds + 1)),
+            (resource.RLIMIT_AS, (self.memory_bytes, self.memory_bytes)),
+            (resource.RLIMIT_FSIZE, (self.max_output_bytes, self.max_output_bytes)),
+        ]
+        for limit, values in limits:
+            try:
+                resource.prlimit(pid, limit, values)
+            except (ProcessLookupError, ValueError, OSError):
+                # The job already exited, or the limit is above what this process may grant
+                pass
+
+    def _classify(self, returncode: int, timed_out: bool, pdf_bytes: Optional[bytes]):
+        if timed_out:
+            return 'timeout', f"Killed after the {self.timeout_seconds:g} s wall-clock limit"
+        if returncode is not None and returncode < 0:
+            killed_by = -returncode
+            if killed_by in (signal.SIGXCPU, signal.SIGKILL):
+                return 'cpu_limit', f"Killed after the {self.cpu_seconds} s CPU limit"
+            if killed_by == signal.SIGXFSZ:
+                return 'output_limit', f"Killed for writing more than {self.max_output_bytes // (1024 * 1024)} MB"
+            return 'killed', f"Killed by {signal.Signals(killed_by).name} (memory limit {self.memory_bytes // (1024 * 1024)} MB)"
+        if returncode != 0 or not pdf_bytes:
+            return 'error', f"pdflatex exited with status {returncode}"
+        return 'ok', ''
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
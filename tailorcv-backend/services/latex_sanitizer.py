@@ -1,28 +1,47 @@
-import re
+from typing import Dict, Optional
 
-def sanitize_for_latex(text: str) -> str:
+# Characters that need to be escaped
+LATEX_ESCAPES = {
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+    '\\': r'\textbackslash{}',
+    '<': r'\textless{}',
+    '>': r'\textgreater{}',
+}
+
+# Every key is a single character, so one str.translate pass replaces them all
+# without rescanning replacements, exactly like the old regex alternation did
+_TRANSLATION_TABLE = str.maketrans(LATEX_ESCAPES)
+_SPECIAL_CHARS = frozenset(LATEX_ESCAPES)
+
+def sanitize_for_latex(text: str, memo: Optional[Dict[str, str]] = None) -> str:
     """
     Escapes special LaTeX characters in a given string.
+
+    Pass the same `memo` dict for every string of a document to escape repeated
+    values (skills, company names, dates) only once.
     """
     if not isinstance(text, str):
         return ""
 
-    # Characters that need to be escaped
-    conv = {
-        '&': r'\\&',
-        '%': r'\\%',
-        '$': r'\\$',
-        '#': r'\\#',
-        '_': r'\\_',
-        '{': r'\\{',
-        '}': r'\\}',
-        '~': r'\\textasciitilde{}',
-        '^': r'\\textasciicircum{}',
-        '\\': r'\\textbackslash{}',
-        '<': r'\\textless{}',
-        '>': r'\\textgreater{}',
-    }
-    
-    # Use regex to perform replacements
-    regex = re.compile('|'.join(re.escape(str(key)) for key in sorted(conv.keys(), key=len, reverse=True)))
-    return regex.sub(lambda match: conv[match.group()], text) 
\ No newline at end of file
+    if memo is not None:
+        cached = memo.get(text)
+        if cached is not None:
+            return cached
+
+    # Most strings contain no special character and are returned unchanged
+    if _SPECIAL_CHARS.isdisjoint(text):
+        escaped = text
+    else:
+        escaped = text.translate(_TRANSLATION_TABLE)
+
+    if memo is not None:
+        memo[text] = escaped
+    return escaped
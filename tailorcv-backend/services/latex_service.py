@@ -1,83 +1,309 @@
+import io
 import os
+import json
+import random
 import shutil
-from jinja2 import Environment, FileSystemLoader
-from pdflatex import PDFLaTeX
+import hashlib
+import threading
+from collections import OrderedDict
 import traceback
+from PyPDF2 import PdfReader, PdfWriter
 from .latex_sanitizer import sanitize_for_latex
+from .latex_lint import lint_latex, repair_latex
+from .compile_failure_memo import CompileFailureMemo, parse_latex_error
+from .latex_sandbox import LaTeXSandbox
+from .page_fit import LAYOUTS, DEFAULT_LAYOUT, choose_layout, count_pdf_pages
 from .pdf_fallback_service import PDFFallbackService
+from .resume_shaper import shape_resume, estimate_pages, get_budget
+from .template_env import TEMPLATE_DIR, get_template_env, template_names
+from .watermark_service import WatermarkService
+from utils.metrics import timed, pdf_renders, record_cache, latex_lint_outcomes, latex_lint_repairs, latex_jobs, page_fit_outcomes
+
+# Rendered through the same pipeline as the resume templates, from personalInfo and coverLetter
+COVER_LETTER_TEMPLATE = 'cover_letter'
 
 class LaTeXService:
     def __init__(self):
-        """Initializes the LaTeX service, setting up the template directory."""
-        self.template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
-        self.template_env = Environment(
-            loader=FileSystemLoader(self.template_dir),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            autoescape=True, # Enable autoescaping
-            variable_start_string='((', # Use custom delimiters
-            variable_end_string='))',
-            comment_start_string='((#',  # Custom comment delimiters to avoid LaTeX conflicts
-            comment_end_string='#))',
-            block_start_string='((%',    # Custom block delimiters  
-            block_end_string='%)',
-        )
+        """Initializes the LaTeX service, sharing the process-wide template environment."""
+        self.template_dir = TEMPLATE_DIR
+        self.template_env = get_template_env()
         # Initialize fallback service for when LaTeX fails
         self.fallback_service = PDFFallbackService()
+        self.watermark_service = WatermarkService()
+        # Unwatermarked PDFs by template and sanitized data, shared by free and premium requests
+        self.render_cache_size = int(os.environ.get('RENDER_CACHE_SIZE', 64))
+        self._render_cache = OrderedDict()
+        self._render_cache_lock = threading.Lock()
+        # Sanitized copies of top-level sections, so a render only escapes the sections that changed
+        self.fragment_cache_size = int(os.environ.get('SANITIZED_FRAGMENT_CACHE_SIZE', 512))
+        self._fragment_cache = OrderedDict()
+        self._fragment_cache_lock = threading.Lock()
+        # Share of predicted failures compiled anyway, to measure how often the lint is wrong
+        self.lint_audit_rate = float(os.environ.get('LATEX_LINT_AUDIT_RATE', 0.05))
+        # Inputs that already failed to compile go straight to the fallback
+        self.compile_failures = CompileFailureMemo()
+        self.sandbox = LaTeXSandbox()
+
+    def warm_up(self):
+        """
+        Loads every template so the first request does not pay for it.
+        Returns the number of templates loaded.
+        """
+        names = template_names(self.template_dir)
+        for name in names:
+            self.template_env.get_template(name)
+        return len(names)
 
-    def _sanitize_data(self, data):
+    def _sanitize_data(self, data, memo=None):
         """
         Recursively sanitizes all string values in a dictionary or list
-        to make them safe for LaTeX.
+        to make them safe for LaTeX. Repeated strings are escaped once per document.
         """
+        if memo is None:
+            memo = {}
         if isinstance(data, dict):
-            return {key: self._sanitize_data(value) for key, value in data.items()}
+            return {key: self._sanitize_data(value, memo) for key, value in data.items()}
         elif isinstance(data, list):
-            return [self._sanitize_data(item) for item in data]
+            return [self._sanitize_data(item, memo) for item in data]
         elif isinstance(data, str):
             # Apply the sanitizer to every string
-            return sanitize_for_latex(data)
+            return sanitize_for_latex(data, memo)
         # Return non-string, non-dict, non-list values as-is
         return data
 
+    def _sanitize_sections(self, data):
+        """
+        Sanitizes the data one top-level section at a time, reusing the cached
+        sanitized copy of any section already seen (unchanged sections of an edited
+        resume, or every section on a template switch). Returns the sanitized data
+        and a fingerprint per section. Cached fragments are shared, never mutate them.
+        """
+        memo = {}
+        sanitized_data = {}
+        fingerprints = []
+        for key, value in data.items():
+            fingerprint = hashlib.sha1(json.dumps([key, value], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+            with self._fragment_cache_lock:
+                fragment = self._fragment_cache.get(fingerprint)
+                if fragment is not None:
+                    self._fragment_cache.move_to_end(fingerprint)
+            record_cache('sanitized_fragment', fragment is not None)
+            if fragment is None:
+                fragment = self._sanitize_data(value, memo)
+                with self._fragment_cache_lock:
+                    self._fragment_cache[fingerprint] = fragment
+                    while len(self._fragment_cache) > self.fragment_cache_size:
+                        self._fragment_cache.popitem(last=False)
+            sanitized_data[key] = fragment
+            fingerprints.append(fingerprint)
+        return sanitized_data, fingerprints
+
+    def _template_context(self, sanitized_data, layout=None):
+        """
+        Builds the render context. The templates refer to the contact block as
+        `personal_info`, while the tailored JSON uses `personalInfo`.
+        """
+        context = dict(sanitized_data)
+        context.setdefault('personal_info', sanitized_data.get('personalInfo', {}))
+        context['layout'] = layout or DEFAULT_LAYOUT
+        return context
+
     def generate_pdf(self, template_name, data, is_premium=False):
         """
         Generates a PDF from a given LaTeX template and data.
+        Free-tier PDFs get the watermark stamped onto the shared unwatermarked render.
+        """
+        pdf_bytes = self.render_pdf(template_name, data)
+        if pdf_bytes and not is_premium:
+            pdf_bytes = self.apply_watermark(pdf_bytes)
+        return pdf_bytes
+
+    def render_draft(self, data, template_name=None):
+        """
+        Renders a quick ReportLab preview of the resume (or the cover letter),
+        shown while the LaTeX version compiles.
+        """
+        with timed('draft_render'):
+            if template_name == COVER_LETTER_TEMPLATE:
+                pdf_bytes = self.fallback_service.generate_cover_letter(data)
+            else:
+                pdf_bytes = self.fallback_service.generate_pdf(data)
+        pdf_renders.inc(renderer='draft')
+        return pdf_bytes
+
+    def append_pdf(self, pdf_bytes, extra_pdf_bytes):
+        """
+        Appends the pages of a second PDF, e.g. the cover letter after the resume.
+        """
+        writer = PdfWriter()
+        for source in (pdf_bytes, extra_pdf_bytes):
+            writer.append(PdfReader(io.BytesIO(source)))
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    def apply_watermark(self, pdf_bytes):
+        """
+        Stamps the free-tier watermark onto a rendered PDF.
+        """
+        with timed('watermark'):
+            return self.watermark_service.apply(pdf_bytes)
+
+    def render_pdf(self, template_name, data, layout=None):
+        """
+        Renders the unwatermarked PDF, reusing a cached render of the same template, data and layout.
         Sanitizes the data before rendering and falls back to ReportLab if LaTeX fails.
         """
+        # First, sanitize all the data to prevent injection and errors
+        with timed('sanitize'):
+            sanitized_data, fingerprints = self._sanitize_sections(data)
+
+        cache_key = self._render_key(template_name, fingerprints, layout)
+        with self._render_cache_lock:
+            pdf_bytes = self._render_cache.get(cache_key)
+            if pdf_bytes is not None:
+                self._render_cache.move_to_end(cache_key)
+        record_cache('render', pdf_bytes is not None)
+        if pdf_bytes is not None:
+            return pdf_bytes
+
+        pdf_bytes, renderer = self._compile_pdf(template_name, data, sanitized_data, cache_key, layout)
+        # A fallback render is not cached: a timeout may not happen again, cleared compile
+        # failures should get another compile, and the lint audit needs to see repeats
+        if pdf_bytes and renderer == 'latex':
+            with self._render_cache_lock:
+                self._render_cache[cache_key] = pdf_bytes
+                while len(self._render_cache) > self.render_cache_size:
+                    self._render_cache.popitem(last=False)
+        return pdf_bytes
+
+    def _render_key(self, template_name, fingerprints, layout=None):
+        # Sanitizing is deterministic, so the section fingerprints identify the sanitized data too
+        layout_name = (layout or DEFAULT_LAYOUT)['name']
+        payload = ','.join(sorted(fingerprints))
+        return hashlib.sha256(f"{template_name}\0{layout_name}\0{payload}".encode('utf-8')).hexdigest()
+
+    def render_cover_letter(self, data):
+        """
+        Renders the unwatermarked cover letter from the tailored data's coverLetter
+        and personalInfo. Only those two sections go into the render, so resume
+        edits do not invalidate a cached cover letter.
+        """
+        letter_data = {
+            'personalInfo': data.get('personalInfo') or {},
+            'coverLetter': data.get('coverLetter') or {}
+        }
+        return self.render_pdf(COVER_LETTER_TEMPLATE, letter_data)
+
+    def render_one_page(self, template_name, data):
+        """
+        Renders the resume onto a single page. The page count is predicted from the
+        template's line model and the loosest layout expected to fit is compiled;
+        only if that still overflows is it compiled once more with the tightest
+        layout. Content beyond what the tightest layout holds is trimmed first.
+        Returns the PDF and a summary of the fit.
+        """
+        tightest = LAYOUTS[-1]
+        with timed('page_fit'):
+            budget = get_budget(template_name)
+            predicted = estimate_pages(data, budget)
+            trimmed = []
+            if predicted > tightest['capacity']:
+                data, trimmed = shape_resume(data, template_name, target_pages=1, line_scale=tightest['capacity'])
+                predicted = estimate_pages(data, budget)
+            index = choose_layout(predicted)
+
+        pdf_bytes = self.render_pdf(template_name, data, LAYOUTS[index])
+        pages = count_pdf_pages(pdf_bytes)
+        compiles = 1
+        # The ReportLab fallback ignores the layout, so a second attempt only helps with pdflatex
+        if pages > 1 and index < len(LAYOUTS) - 1 and shutil.which('pdflatex'):
+            index = len(LAYOUTS) - 1
+            pdf_bytes = self.render_pdf(template_name, data, LAYOUTS[index])
+            pages = count_pdf_pages(pdf_bytes)
+            compiles = 2
+
+        layout_name = LAYOUTS[index]['name']
+        page_fit_outcomes.inc(layout=layout_name, compiles=str(compiles), fit='yes' if pages == 1 else 'no')
+        return pdf_bytes, {
+            'predicted_pages': round(predicted, 2),
+            'layout': layout_name,
+            'pages': pages,
+            'compiles': compiles,
+            'trimmed': trimmed
+        }
+
+    def _compile_pdf(self, template_name, data, sanitized_data, input_hash, layout=None):
+        """
+        Renders the template and compiles it with pdflatex, or with ReportLab when that fails.
+        Returns the PDF and the renderer that produced it ('latex' or 'fallback').
+        """
         if not shutil.which('pdflatex'):
             print("ERROR: pdflatex command not found. LaTeX is not installed or not in PATH.")
             print("Falling back to ReportLab PDF generation...")
-            return self.fallback_service.generate_pdf(data, is_premium)
+            return self._render_fallback(data, template_name)
+
+        known_failure = self.compile_failures.get(input_hash)
+        record_cache('compile_failure_memo', known_failure is not None)
+        if known_failure:
+            print(f"Skipping LaTeX for an input that already failed to compile: {known_failure['reason']}")
+            print("Falling back to ReportLab PDF generation...")
+            return self._render_fallback(data, template_name)
 
         try:
-            # First, sanitize all the data to prevent injection and errors
-            sanitized_data = self._sanitize_data(data)
-            
-            # Load the template
-            template = self.template_env.get_template(f"{template_name}.tex")
-            
-            # Render the template with the sanitized data
-            latex_content = template.render(sanitized_data)
+            with timed('jinja_render'):
+                # Load the template
+                template = self.template_env.get_template(f"{template_name}.tex")
+                
+                # Render the template with the sanitized data
+                latex_content = template.render(self._template_context(sanitized_data, layout))
 
-            # Create a PDFLaTeX object from the rendered content
-            p = PDFLaTeX.from_binarystring(latex_content.encode('utf-8'), 'generated_resume')
-            
-            # Create the PDF. This might take a few seconds.
-            pdf_bytes, log, _ = p.create_pdf(keep_pdf_file=False, max_runs=3)
+            # Repair \href URLs and skip compiles that are bound to fail
+            with timed('latex_lint'):
+                latex_content, repairs = repair_latex(latex_content)
+                fatal_issues = [issue for issue in lint_latex(latex_content) if issue['fatal']]
+            if repairs:
+                latex_lint_repairs.inc(repairs)
+            predicted = 'fail' if fatal_issues else 'pass'
+            if fatal_issues and random.random() >= self.lint_audit_rate:
+                first = fatal_issues[0]
+                print(f"LaTeX lint predicts a failed compile ({len(fatal_issues)} issue(s), first on line {first['line']}: {first['message']})")
+                print("Falling back to ReportLab PDF generation...")
+                latex_lint_outcomes.inc(predicted='fail', actual='skipped')
+                return self._render_fallback(data, template_name)
+
+            # Compile in the sandbox. This might take a few seconds.
+            with timed('latex_compile'):
+                job = self.sandbox.compile(latex_content)
+            latex_jobs.inc(outcome=job['outcome'])
+            latex_lint_outcomes.inc(predicted=predicted, actual='pass' if job['pdf'] else 'fail')
+            pdf_bytes = job['pdf']
+
+            if job['outcome'] not in ('ok', 'error'):
+                # A resource limit killed the job; the wall-clock limit depends on load, so only
+                # the deterministic limits are remembered
+                print(f"LaTeX job killed: {job['reason']} ({job['elapsed']:.1f} s)")
+                if job['outcome'] != 'timeout':
+                    self.compile_failures.record(input_hash, template_name, {
+                        'reason': job['reason'], 'line': None, 'log_excerpt': '', 'source_excerpt': ''
+                    })
+                print("Falling back to ReportLab PDF generation...")
+                return self._render_fallback(data, template_name)
 
             # Check if the PDF was successfully created
             if not pdf_bytes:
                 print("="*20 + " LATEX COMPILATION FAILED " + "="*20)
                 print("LaTeX failed to produce a PDF. This is often due to complex characters or formatting.")
-                if log:
+                if job['log']:
                     print("--- LaTeX Compiler Log ---")
-                    print(log.decode('utf-8', errors='ignore'))
+                    print(job['log'])
                     print("--------------------------")
+                self.compile_failures.record(input_hash, template_name, parse_latex_error(job['log'], latex_content))
                 print("Falling back to ReportLab PDF generation...")
-                return self.fallback_service.generate_pdf(data, is_premium)
+                return self._render_fallback(data, template_name)
             
-            return pdf_bytes
+            pdf_renders.inc(renderer='latex')
+            return pdf_bytes, 'latex'
             
         except Exception as e:
             print("="*20 + " UNEXPECTED PDF GENERATION ERROR " + "="*20)
@@ -86,7 +312,20 @@ class LaTeXService:
             print("="*60)
             print("Falling back to ReportLab PDF generation...")
             try:
-                return self.fallback_service.generate_pdf(data, is_premium)
+                return self._render_fallback(data, template_name)
             except Exception as fallback_error:
                 print(f"Fallback PDF generation also failed: {fallback_error}")
-                return None
\ No newline at end of file
+                return None, 'fallback'
+
+    def _render_fallback(self, data, template_name=None):
+        """
+        Renders the resume (or the cover letter) with ReportLab, recording it towards the fallback rate.
+        Returns the PDF and 'fallback', like _compile_pdf.
+        """
+        with timed('fallback_render'):
+            if template_name == COVER_LETTER_TEMPLATE:
+                pdf_bytes = self.fallback_service.generate_cover_letter(data)
+            else:
+                pdf_bytes = self.fallback_service.generate_pdf(data)
+        pdf_renders.inc(renderer='fallback')
+        return pdf_bytes, 'fallback'
\ No newline at end of file
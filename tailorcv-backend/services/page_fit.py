@@ -0,0 +1,43 @@
+"""
+One-page fit for the LaTeX templates.
+
+The templates take two layout knobs, the base font size and the line spread.
+Instead of recompiling blindly until a resume fits, the page count is predicted
+from the shaper's per-template line model and the loosest layout expected to fit
+is compiled first. A second compile with the tightest layout only happens when
+the first one still overflows.
+"""
+
+import io
+from typing import Dict, Any, List, Optional
+from PyPDF2 import PdfReader
+
+# Ordered loosest to tightest. `capacity` is how many pages of content, as measured
+# by the line model at the default layout, the layout fits onto one page.
+LAYOUTS: List[Dict[str, Any]] = [
+    {'name': 'default', 'font_size': '11pt', 'line_spread': '1.0', 'capacity': 1.0},
+    {'name': 'compact', 'font_size': '11pt', 'line_spread': '0.92', 'capacity': 1.08},
+    {'name': 'tight', 'font_size': '10pt', 'line_spread': '0.92', 'capacity': 1.25},
+]
+DEFAULT_LAYOUT = LAYOUTS[0]
+
+# The line model is approximate, so a layout is only picked when the prediction
+# fits with some room to spare
+PREDICTION_MARGIN = 0.97
+
+def choose_layout(predicted_pages: float) -> int:
+    """
+    Index of the loosest layout expected to fit the content on one page
+    """
+    for index, layout in enumerate(LAYOUTS):
+        if predicted_pages <= layout['capacity'] * PREDICTION_MARGIN:
+            return index
+    return len(LAYOUTS) - 1
+
+def count_pdf_pages(pdf_bytes: Optional[bytes]) -> int:
+    if not pdf_bytes:
+        return 0
+    try:
+        return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except Exception:
+        return 0
@@ -69,8 +69,8 @@ class PDFFallbackService:
             textColor=HexColor('#374151')
         )
     
-    def generate_pdf(self, resume_data: Dict[str, Any], is_premium: bool = False) -> bytes:
-        """Generate PDF from resume data using ReportLab"""
+    def generate_pdf(self, resume_data: Dict[str, Any]) -> bytes:
+        """Generate PDF from resume data using ReportLab (the free-tier watermark is stamped on afterwards)"""
         try:
             buffer = io.BytesIO()
             doc = SimpleDocTemplate(
@@ -112,10 +112,6 @@ class PDFFallbackService:
             if resume_data.get('certifications'):
                 self._add_certifications_section(story, resume_data['certifications'])
             
-            # Add watermark for free users
-            if not is_premium:
-                self._add_watermark(story)
-            
             # Build PDF
             doc.build(story)
             
@@ -128,6 +124,43 @@ class PDFFallbackService:
         except Exception as e:
             raise Exception(f"Failed to generate PDF: {str(e)}")
     
+    def generate_cover_letter(self, data: Dict[str, Any]) -> bytes:
+        """Generate a cover letter PDF from the tailored data's personalInfo and coverLetter"""
+        try:
+            buffer = io.BytesIO()
+            doc = SimpleDocTemplate(
+                buffer,
+                pagesize=letter,
+                rightMargin=72,
+                leftMargin=72,
+                topMargin=72,
+                bottomMargin=72
+            )
+            personal_info = data.get('personalInfo', {})
+            letter_data = data.get('coverLetter') or {}
+
+            story = []
+            self._add_header(story, personal_info)
+            if letter_data.get('company'):
+                story.append(Paragraph(self._escape_html(letter_data['company']), self.body_style))
+                story.append(Spacer(1, 12))
+            story.append(Paragraph(self._escape_html(letter_data.get('greeting') or 'Dear Hiring Manager,'), self.body_style))
+            story.append(Spacer(1, 6))
+            for paragraph in letter_data.get('paragraphs', []):
+                story.append(Paragraph(self._escape_html(paragraph), self.body_style))
+                story.append(Spacer(1, 6))
+            story.append(Spacer(1, 6))
+            story.append(Paragraph(self._escape_html(letter_data.get('closing') or 'Sincerely,'), self.body_style))
+            story.append(Paragraph(self._escape_html(personal_info.get('name', '')), self.body_style))
+
+            doc.build(story)
+            pdf_bytes = buffer.getvalue()
+            buffer.close()
+            return pdf_bytes
+
+        except Exception as e:
+            raise Exception(f"Failed to generate cover letter PDF: {str(e)}")
+
     def _escape_html(self, text):
         """Escape HTML characters for safe PDF rendering"""
         if not isinstance(text, str):
@@ -258,15 +291,3 @@ class PDFFallbackService:
             
             story.append(Paragraph(cert_text, self.body_style))
             story.append(Spacer(1, 4))
-    
-    def _add_watermark(self, story):
-        """Add watermark for free users"""
-        story.append(Spacer(1, 20))
-        watermark_style = ParagraphStyle(
-            'Watermark',
-            parent=self.styles['Normal'],
-            fontSize=8,
-            alignment=TA_CENTER,
-            textColor=HexColor('#9ca3af')
-        )
-        story.append(Paragraph("Generated by TailorCV - AI-Powered Resume Generator", watermark_style))
\ No newline at end of file
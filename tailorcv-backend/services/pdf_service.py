@@ -1,8 +1,68 @@
 import PyPDF2
 import io
-from typing import Dict, Any
+import re
+from typing import Dict, Any, List, Optional
 from werkzeug.datastructures import FileStorage
 
+# Heading lines that start each resume section, lowercased without punctuation
+SECTION_HEADINGS = {
+    'summary': ['summary', 'professional summary', 'objective', 'profile', 'professional profile', 'about'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history'],
+    'education': ['education', 'academic background'],
+    'skills': ['skills', 'technical skills', 'core competencies', 'competencies', 'skills & tools'],
+    'projects': ['projects', 'personal projects', 'selected projects', 'portfolio'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'licenses & certifications',
+                       'licenses and certifications'],
+}
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+# Lines added around the text by extract_text_from_pdf and the LinkedIn formatter
+_WRAPPER_LINES = {'RESUME CONTENT FROM PDF:', 'END OF RESUME CONTENT', 'LINKEDIN PROFILE DATA:'}
+
+_BULLET_PATTERN = re.compile(r'^\s*[•●▪◦■*·\-–]\s*')
+_DATE_PATTERN = re.compile(
+    r'\b(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?(?:19|20)\d{2}\b|\bpresent\b|\bcurrent\b',
+    re.IGNORECASE
+)
+_INSTITUTION_PATTERN = re.compile(r'\b(university|college|institute|school|academy|polytechnic)\b', re.IGNORECASE)
+_DEGREE_PATTERN = re.compile(
+    r'\b(?:(?i:bachelor|master|doctor|associate|diploma)|Ph\.?D|MBA|B\.?Sc?|M\.?Sc?|B\.?A|M\.?A|B\.?Eng|M\.?Eng|'
+    r'B\.?Tech|M\.?Tech)\b\.?'
+)
+# A bare two-letter part after the first is a state code ("Cambridge, MA"), not a degree
+_STATE_CODE_PART = re.compile(r'^[A-Z]{2}$')
+# Separators between the fields of a line; only used outside brackets
+_FIELD_SEPARATOR = re.compile(r'\s*[,|–—]\s*|\s+-\s+')
+_GPA_PATTERN = re.compile(r'\bGPA\b[:\s]*([0-4]\.\d{1,2})', re.IGNORECASE)
+_COURSES_PATTERN = re.compile(r'^(?:relevant\s+)?course(?:work|s)?\s*:\s*(.+)$', re.IGNORECASE)
+
+def _split_fields(text: str) -> List[str]:
+    """
+    Split a line on _FIELD_SEPARATOR, keeping bracketed text such as "(CKA)" or
+    "(Honours, First Class)" in one piece
+    """
+    parts = []
+    start = 0
+    for match in _FIELD_SEPARATOR.finditer(text):
+        before = text[:match.start()]
+        if before.count('(') > before.count(')') or before.count('[') > before.count(']'):
+            continue
+        parts.append(text[start:match.start()])
+        start = match.end()
+    parts.append(text[start:])
+    return parts
+
+def _balanced(text: str) -> bool:
+    depth = 0
+    for char in text:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
 class PDFService:
     def __init__(self):
         pass
@@ -147,7 +207,8 @@ END OF RESUME CONTENT
                 'contact_info': self._extract_contact_info(text),
                 'skills': self._extract_skills(text),
                 'experience': self._extract_experience_keywords(text),
-                'education': self._extract_education_keywords(text)
+                'education': self._extract_education_keywords(text),
+                'static_sections': self.extract_static_sections(text)
             }
             
             return structured_data
@@ -155,6 +216,214 @@ END OF RESUME CONTENT
         except Exception as e:
             return {'error': f"Failed to extract structured data: {str(e)}"}
     
+    def parse_resume_sections(self, text: str) -> Dict[str, Any]:
+        """
+        Split resume text (from a PDF or a LinkedIn profile) into sections without
+        an LLM. Returns the raw text of each section, the contact block as
+        `personalInfo`, the education and certification entries (None when the
+        section is there but could not be parsed) and the experience section split
+        into one chunk per role.
+        """
+        sections = self._split_sections(text)
+        return {
+            'sections': sections,
+            'personalInfo': self._parse_personal_info(sections.get('header', '')),
+            'education': self._parse_education(sections.get('education', '')),
+            'certifications': self._parse_certifications(sections.get('certifications', '')),
+            'experience_entries': self._split_entries(sections.get('experience', ''))
+        }
+
+    def extract_static_sections(self, text: str, parsed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        The sections that do not change with the job description (personalInfo,
+        education, certifications), for the ones that parsed reliably. Sections
+        missing here are left to the LLM.
+        """
+        parsed = parsed or self.parse_resume_sections(text)
+        static = {}
+        personal_info = parsed['personalInfo']
+        if personal_info.get('name') and (personal_info.get('email') or personal_info.get('phone')):
+            static['personalInfo'] = personal_info
+        # An empty list may just mean the heading was not recognised
+        if parsed['education']:
+            static['education'] = parsed['education']
+        if parsed['certifications']:
+            static['certifications'] = parsed['certifications']
+        return static
+
+    def _split_sections(self, text: str) -> Dict[str, str]:
+        """
+        Group lines under the section heading they follow. Lines before the first
+        heading (name and contact details) go to 'header'.
+        """
+        sections = {'header': []}
+        current = 'header'
+        for raw_line in text.split('\n'):
+            line = raw_line.rstrip()
+            stripped = line.strip()
+            if not stripped or stripped in _WRAPPER_LINES:
+                continue
+            key = re.sub(r'[^a-z& ]', '', stripped.lower()).strip()
+            if len(stripped) <= 40 and key in _HEADING_LOOKUP:
+                current = _HEADING_LOOKUP[key]
+                sections.setdefault(current, [])
+                continue
+            sections.setdefault(current, []).append(line)
+        return {name: '\n'.join(lines) for name, lines in sections.items() if lines}
+
+    def _split_entries(self, section_text: str) -> List[str]:
+        """
+        Split a section into entries. A new entry starts at a non-bullet line that
+        follows a bullet and carries a date (on the line or the next one); wrapped
+        bullet text, which continues in lowercase, stays with its bullet.
+        """
+        lines = [line for line in section_text.split('\n') if line.strip()]
+        if not lines:
+            return []
+
+        if lines[0].startswith('- ') and any(line.startswith(' ') for line in lines):
+            # LinkedIn format: "- Title at Company" followed by an indented description
+            starts = [i for i, line in enumerate(lines) if line.startswith('- ')]
+        else:
+            starts = [0]
+            for i in range(1, len(lines)):
+                line = lines[i].strip()
+                if _BULLET_PATTERN.match(line) or not _BULLET_PATTERN.match(lines[i - 1].strip()):
+                    continue
+                if line[:1].islower():
+                    continue
+                next_line = lines[i + 1].strip() if i + 1 < len(lines) else ''
+                if _DATE_PATTERN.search(line) or (next_line and not _BULLET_PATTERN.match(next_line) and _DATE_PATTERN.search(next_line)):
+                    starts.append(i)
+
+        bounds = starts + [len(lines)]
+        return ['\n'.join(line.strip() for line in lines[bounds[i]:bounds[i + 1]]) for i in range(len(starts))]
+
+    def _parse_personal_info(self, header_text: str) -> Dict[str, str]:
+        """
+        Name and contact details from the lines above the first section heading
+        """
+        info = {}
+        lines = [line.strip() for line in header_text.split('\n') if line.strip()]
+
+        for line in lines:
+            # LinkedIn format
+            labelled = re.match(r'^(Name|Location):\s*(.+)$', line)
+            if labelled:
+                info[labelled.group(1).lower()] = labelled.group(2).strip()
+        if 'name' not in info and lines and not re.search(r'[@\d]', lines[0]) and len(lines[0]) <= 60:
+            info['name'] = lines[0]
+
+        info.update({key: value.strip() for key, value in self._extract_contact_info(header_text).items()})
+
+        github = re.search(r'github\.com/[A-Za-z0-9\-_.]+', header_text)
+        if github:
+            info['github'] = github.group()
+        # Any other domain is the personal website; emails are removed so their domain does not count
+        without_emails = re.sub(r'\S+@\S+', ' ', header_text)
+        for website in re.finditer(r'\b(?:https?://)?(?:www\.)?[a-z0-9\-]+\.(?:com|io|dev|me|net|org|app|co|tech)(?:/[^\s|,]*)?', without_emails, re.IGNORECASE):
+            if not re.search(r'linkedin\.com|github\.com', website.group(), re.IGNORECASE):
+                info['website'] = website.group()
+                break
+        if 'location' not in info:
+            location = re.search(r'\b[A-Z][a-zA-Z .]+,\s*[A-Z]{2}\b', header_text)
+            if location:
+                info['location'] = location.group().strip()
+        return info
+
+    def _parse_education(self, section_text: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Education entries (degree, institution, dates, GPA, coursework) from the
+        section text. Returns None when the section has text but no entry is recognised.
+        """
+        lines = [line.strip() for line in section_text.split('\n') if line.strip()]
+        if not lines:
+            return []
+
+        entries = []
+        for line in lines:
+            text = _BULLET_PATTERN.sub('', line)
+            linkedin = re.match(r'^(.+?)\s+from\s+(.+)$', text)
+            if linkedin and line.startswith('- '):
+                entries.append({'degree': linkedin.group(1).strip(), 'institution': linkedin.group(2).strip()})
+                continue
+
+            courses = _COURSES_PATTERN.match(text)
+            if courses and entries:
+                entries[-1]['relevantCourses'] = [course.strip() for course in courses.group(1).split(',') if course.strip()]
+                continue
+
+            gpa = _GPA_PATTERN.search(text)
+            dates = [match.group() for match in _DATE_PATTERN.finditer(text)]
+            remainder = _GPA_PATTERN.sub('', _DATE_PATTERN.sub('', text))
+
+            parts = [part.strip(' ,|-–—') for part in _split_fields(remainder)]
+            parts = [part for part in parts if part]
+            institution = next((part for part in parts if _INSTITUTION_PATTERN.search(part)), None)
+            degree = next((part for index, part in enumerate(parts) if _DEGREE_PATTERN.search(part)
+                           and part != institution and not (index and _STATE_CODE_PART.match(part))), None)
+
+            if institution and (not entries or 'institution' in entries[-1]):
+                entries.append({})
+            if degree and (not entries or 'degree' in entries[-1]):
+                entries.append({})
+            # The GPA belongs to the entry this line starts or continues
+            if gpa and entries:
+                entries[-1]['gpa'] = gpa.group(1)
+            if not entries or not (institution or degree):
+                if entries and dates:
+                    self._set_education_dates(entries[-1], dates)
+                continue
+            if institution:
+                entries[-1]['institution'] = institution
+            if degree:
+                entries[-1]['degree'] = degree
+            if dates:
+                self._set_education_dates(entries[-1], dates)
+
+        # Only an unambiguous parse replaces the LLM's section: every entry has both
+        # a degree and an institution, and no field was cut inside brackets
+        if not entries or not all(entry.get('institution') and entry.get('degree') for entry in entries):
+            return None
+        if not all(_balanced(value) for entry in entries for value in entry.values() if isinstance(value, str)):
+            return None
+        return entries
+
+    def _parse_certifications(self, section_text: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        One certification per line: name, then optionally the issuer and a date,
+        separated by dashes, pipes or commas. Returns None when any line is ambiguous.
+        """
+        certifications = []
+        for line in section_text.split('\n'):
+            text = _BULLET_PATTERN.sub('', line.strip())
+            if not text:
+                continue
+            dates = [match.group() for match in _DATE_PATTERN.finditer(text)]
+            parts = [part.strip(' ,|-–—') for part in _split_fields(_DATE_PATTERN.sub('', text))]
+            parts = [part for part in parts if part and part != '()']
+            if not parts:
+                continue
+            if len(parts[0]) > 120 or len(parts) > 2 or not all(_balanced(part) for part in parts):
+                # Prose, a name with separators of its own ("Architect – Associate"),
+                # or a line split in the wrong place; the LLM reads these better
+                return None
+            certification = {'name': parts[0]}
+            if len(parts) > 1:
+                certification['issuer'] = parts[1]
+            if dates:
+                certification['date'] = dates[-1]
+            certifications.append(certification)
+        if section_text.strip() and not certifications:
+            return None
+        return certifications
+
+    def _set_education_dates(self, entry: Dict[str, Any], dates: List[str]) -> None:
+        if len(dates) >= 2:
+            entry['startDate'], entry['endDate'] = dates[0], dates[1]
+        else:
+            entry['endDate'] = dates[0]
+
     def _identify_sections(self, text: str) -> Dict[str, int]:
         """
         Identify common resume sections
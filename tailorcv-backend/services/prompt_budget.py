@@ -0,0 +1,214 @@
+"""
+Prompt preprocessing for the Gemini calls.
+
+Job descriptions are usually pasted whole, so they arrive with EEO statements,
+benefits lists and company blurbs that do nothing for tailoring. These are
+removed with line heuristics, repeated lines are dropped, and the resume and the
+job description are then cut to a token budget. When a text is over budget the
+lowest-priority lines go first, so requirement sentences in the job description
+and headings and role lines in the resume are the last to be removed.
+"""
+
+import os
+import re
+from typing import Dict, Any, List, Tuple
+
+# Rough tokens-per-character ratio for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Headings of sections that are boilerplate as a whole. Everything under them is
+# skipped until the next heading, except lines that state a requirement.
+_BOILERPLATE_HEADINGS = re.compile(
+    r'^(about (us|the company)|who we are|our (story|mission|values|culture)|'
+    r'(what we offer|benefits|perks|compensation|pay|salary)( and (benefits|perks))?|why (join|work)( with)? us|'
+    r'equal (employment )?opportunity.*|eeo( statement)?|diversity.*|accommodations?|'
+    r'privacy( notice| policy)?|how to apply|application process)\s*:?$',
+    re.IGNORECASE
+)
+
+# "About <CompanyName>", matched case-sensitively so "About you" or "About the job" are not taken for it
+_COMPANY_INTRO_HEADING = re.compile(
+    r'^About (?!(?:You|Your|Yourself|The|This|Role|Job|Position|Team|Us)\b)[A-Z][\w&.\-]*( [A-Z][\w&.\-]*){0,3}\s*:?$'
+)
+
+# Headings of the sections worth keeping; these end a skipped boilerplate section
+_KEEP_HEADINGS = re.compile(
+    r'^(requirements|qualifications|(minimum|basic|preferred|required) qualifications|responsibilities|'
+    r'what you.ll do|what you.ll bring|what we.re looking for|you have|you will|skills|nice to have|'
+    r'the role|role overview|about (the|this) (role|job|position)|about you|job description|key responsibilities|experience)\s*:?$',
+    re.IGNORECASE
+)
+
+# Individual boilerplate lines that show up anywhere in a posting
+_BOILERPLATE_LINE = re.compile(
+    r'equal opportunity employer|without regard to (race|age|sex)|race, (color|colour)|'
+    r'sexual orientation|gender identity|protected veteran|national origin|e-verify|'
+    r'reasonable accommodation|401\s?\(?k\)?|paid time off|\bPTO\b|parental leave|health, dental|'
+    r'dental and vision|medical, dental|wellness (stipend|program)|commuter benefits|'
+    r'pay range|salary range|base salary|compensation (range|package)|'
+    r'privacy (notice|policy)|apply (now|today)|click apply|recruitment agencies|'
+    r'follow us on|visit our website',
+    re.IGNORECASE
+)
+
+# Lines that state what the candidate needs or will do
+_REQUIREMENT_LINE = re.compile(
+    r'\b(require[ds]?|requirements?|must|should|experience (with|in)|years?|proficien\w*|knowledge of|'
+    r'familiar\w*|expertise|degree|bachelor|master|skills?|ability to|you will|you.ll|responsib\w*|'
+    r'qualif\w*|preferred|plus|nice to have|strong)\b',
+    re.IGNORECASE
+)
+
+_BULLET = re.compile(r'^\s*([•▪◦●\-–*]|\d+[.)])\s+')
+_DATE = re.compile(r'\b(19|20)\d{2}\b|\bpresent\b', re.IGNORECASE)
+
+def get_budgets() -> Dict[str, int]:
+    """
+    Token budgets for the resume and the job description in a prompt
+    """
+    return {
+        'resume': int(os.environ.get('PROMPT_RESUME_TOKEN_BUDGET', 3000)),
+        'job_description': int(os.environ.get('PROMPT_JD_TOKEN_BUDGET', 1200)),
+    }
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token estimate from the character count, rounded up
+    """
+    return -(-len(text or '') // CHARS_PER_TOKEN)
+
+def _is_heading(line: str) -> bool:
+    return len(line) <= 50 and not _BULLET.match(line) and (line.endswith(':') or len(line.split()) <= 5) \
+        and not line.endswith('.')
+
+def strip_boilerplate(job_description: str) -> Tuple[str, Dict[str, int]]:
+    """
+    Remove boilerplate sections and lines and repeated lines from a job description.
+    Returns the cleaned text and how many lines were removed, by reason.
+    """
+    stats = {'boilerplate': 0, 'duplicate': 0}
+    kept = []
+    seen = set()
+    skipping = False
+    for raw_line in job_description.split('\n'):
+        line = raw_line.strip()
+        if not line:
+            if kept and kept[-1]:
+                kept.append('')
+            continue
+        if _is_heading(line):
+            if _KEEP_HEADINGS.match(line):
+                skipping = False
+            elif _BOILERPLATE_HEADINGS.match(line) or _COMPANY_INTRO_HEADING.match(line):
+                skipping = True
+                stats['boilerplate'] += 1
+                continue
+        if _BOILERPLATE_LINE.search(line) or (skipping and not _REQUIREMENT_LINE.search(line)):
+            stats['boilerplate'] += 1
+            continue
+        key = re.sub(r'\W+', ' ', _BULLET.sub('', line)).strip().lower()
+        if key in seen:
+            stats['duplicate'] += 1
+            continue
+        seen.add(key)
+        kept.append(line)
+    return '\n'.join(kept).strip(), stats
+
+def _fit_lines(lines: List[str], priorities: List[int], max_tokens: int) -> Tuple[List[str], int]:
+    """
+    Drop the lowest-priority lines, last ones first, until the text fits the budget.
+    Returns the remaining lines in their original order and the number dropped.
+    """
+    # Counted in characters so per-line rounding does not add up
+    total = len('\n'.join(lines))
+    budget = max_tokens * CHARS_PER_TOKEN
+    # Lowest priority first; within a priority, from the end of the text
+    order = sorted(range(len(lines)), key=lambda i: (priorities[i], -i))
+    dropped = set()
+    for index in order:
+        if total <= budget:
+            break
+        dropped.add(index)
+        total -= len(lines[index]) + 1
+    return [line for i, line in enumerate(lines) if i not in dropped], len(dropped)
+
+def fit_job_description(job_description: str, max_tokens: int) -> Tuple[str, int]:
+    """
+    Cut a job description to `max_tokens`, keeping requirement sentences longest.
+    Returns the text and the number of lines dropped.
+    """
+    if estimate_tokens(job_description) <= max_tokens:
+        return job_description, 0
+    lines = [line for line in job_description.split('\n') if line.strip()]
+    priorities = []
+    for index, line in enumerate(lines):
+        if _REQUIREMENT_LINE.search(line):
+            priorities.append(3)
+        elif index == 0 or _is_heading(line.strip()):
+            # The title and section headings give the requirements their context
+            priorities.append(2)
+        elif _BULLET.match(line):
+            priorities.append(1)
+        else:
+            priorities.append(0)
+    kept, dropped = _fit_lines(lines, priorities, max_tokens)
+    return '\n'.join(kept), dropped
+
+def fit_resume(resume_text: str, max_tokens: int) -> Tuple[str, int]:
+    """
+    Cut resume text to `max_tokens`. Bullets go first, starting with the last
+    ones (usually the oldest roles); the contact block, headings and role lines stay.
+    Returns the text and the number of lines dropped.
+    """
+    if estimate_tokens(resume_text) <= max_tokens:
+        return resume_text, 0
+    lines = [line for line in resume_text.split('\n') if line.strip()]
+    priorities = []
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if index < 4 or _is_heading(stripped) or (not _BULLET.match(stripped) and _DATE.search(stripped)):
+            priorities.append(2)
+        elif _BULLET.match(stripped):
+            priorities.append(0)
+        else:
+            priorities.append(1)
+    kept, dropped = _fit_lines(lines, priorities, max_tokens)
+    return '\n'.join(kept), dropped
+
+def prepare_job_description(job_description: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Strip boilerplate from a job description and fit it to its budget.
+    Returns the text and a summary of what was removed.
+    """
+    cleaned_jd, removed = strip_boilerplate(job_description)
+    if not cleaned_jd:
+        # Nothing recognisable was left; better the whole posting than none of it
+        cleaned_jd = job_description.strip()
+    fitted_jd, jd_dropped = fit_job_description(cleaned_jd, get_budgets()['job_description'])
+    return fitted_jd, {
+        'jd_tokens_before': estimate_tokens(job_description),
+        'jd_tokens_after': estimate_tokens(fitted_jd),
+        'jd_boilerplate_lines': removed['boilerplate'],
+        'jd_duplicate_lines': removed['duplicate'],
+        'jd_lines_over_budget': jd_dropped,
+    }
+
+def prepare_resume_text(resume_text: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Fit resume text to its budget. Returns the text and a summary of what was removed.
+    """
+    fitted_resume, resume_dropped = fit_resume(resume_text, get_budgets()['resume'])
+    return fitted_resume, {
+        'resume_tokens_before': estimate_tokens(resume_text),
+        'resume_tokens_after': estimate_tokens(fitted_resume),
+        'resume_lines_over_budget': resume_dropped,
+    }
+
+def prepare_prompt_inputs(resume_text: str, job_description: str) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Strip job description boilerplate and fit both texts to their budgets.
+    Returns the resume, the job description and a summary of what was removed.
+    """
+    fitted_jd, jd_stats = prepare_job_description(job_description)
+    fitted_resume, resume_stats = prepare_resume_text(resume_text)
+    return fitted_resume, fitted_jd, dict(jd_stats, **resume_stats)
@@ -0,0 +1,103 @@
+import os
+import uuid
+import hashlib
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Any, Optional
+from utils.metrics import timed, background_renders
+from utils.profiler import propagate
+
+class RenderJobQueue:
+    """
+    Background LaTeX renders for draft-first generation.
+
+    The request returns a ReportLab draft straight away and queues the final
+    render here. A finished job is recorded as an artifact link from the job id
+    to the final PDF, so whichever gunicorn worker receives the poll can answer
+    it from the shared artifact directory.
+    """
+    # Link target of a job that failed with no draft to fall back to
+    FAILED_ID = '0' * 64
+    # Link target of a job that was handed out and has not finished yet
+    PENDING_ID = 'f' * 64
+
+    def __init__(self, artifact_store, max_workers: Optional[int] = None):
+        self.artifact_store = artifact_store
+        self.max_workers = max_workers or int(os.environ.get('RENDER_JOB_WORKERS', 2))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='render-job')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_job_id() -> str:
+        """
+        A fresh job id. Job ids share the artifact id format so they can be stored as links.
+        """
+        return hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+
+    def reserve(self, job_id: Optional[str] = None) -> str:
+        """
+        Record a job as pending, so polls answer 202 until it finishes and 404 for
+        ids that were never handed out. Returns the job id.
+        """
+        job_id = job_id or self.new_job_id()
+        self.artifact_store.link(job_id, self.PENDING_ID)
+        return job_id
+
+    def submit(self, render: Callable[[], str], draft_id: Optional[str] = None, job_id: Optional[str] = None) -> str:
+        """
+        Queue `render`, which returns the artifact id of the final PDF. If it
+        fails, the job resolves to the draft, or is marked failed without one,
+        so pollers are never left waiting. Returns the job id.
+        """
+        job_id = self.reserve(job_id)
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(propagate(self._run), job_id, render, draft_id)
+        return job_id
+
+    def _run(self, job_id: str, render: Callable[[], str], draft_id: str) -> None:
+        try:
+            with timed('final_render'):
+                final_id = render()
+            outcome = 'done'
+        except Exception as e:
+            print(f"Background render {job_id[:12]} failed{', keeping the draft' if draft_id else ''}: {e}")
+            traceback.print_exc()
+            final_id = draft_id or self.FAILED_ID
+            outcome = 'failed'
+        try:
+            self.artifact_store.link(job_id, final_id)
+        except Exception as e:
+            print(f"Failed to record background render {job_id[:12]}: {e}")
+            outcome = 'failed'
+        finally:
+            with self._lock:
+                self._pending -= 1
+        background_renders.inc(outcome=outcome)
+
+    def fail(self, job_id: str) -> None:
+        """
+        Mark a reserved job as failed before its render was submitted
+        """
+        self.artifact_store.link(job_id, self.FAILED_ID)
+        background_renders.inc(outcome='failed')
+
+    def run(self, fn: Callable[..., Any], *args) -> Future:
+        """
+        Run `fn` on the render workers without job bookkeeping, for callers that wait on the result
+        """
+        return self._executor.submit(propagate(fn), *args)
+
+    def result(self, job_id: str) -> Optional[str]:
+        """
+        Artifact id of the finished job's PDF, FAILED_ID if it failed, PENDING_ID
+        while it is still running, or None for an unknown or expired job
+        """
+        return self.artifact_store.resolve_link(job_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending
+        return {'pending': pending, 'workers': self.max_workers}
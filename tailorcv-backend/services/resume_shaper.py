@@ -0,0 +1,318 @@
+"""
+Input shaping between the LLM output and the PDF renderers.
+
+Every template gets item and length budgets per section plus a target page
+count, so the size of what reaches pdflatex (and ReportLab) has a known upper
+bound. Pages are estimated with a per-template line model; content over the
+target is trimmed in a fixed priority order, oldest and least important first.
+Every change is recorded so callers can report what was cut.
+"""
+
+import copy
+import math
+from typing import Dict, Any, List, Tuple, Optional
+
+DEFAULT_BUDGET = {
+    'target_pages': 2,
+    'max_summary_chars': 600,
+    'max_skills': 24,
+    'max_skill_chars': 40,
+    'max_experience': 6,
+    'max_bullets': 6,
+    'min_bullets': 2,
+    'max_bullet_chars': 260,
+    'max_projects': 4,
+    'max_project_description_chars': 300,
+    'max_technologies': 8,
+    'max_education': 3,
+    'max_courses': 8,
+    'max_certifications': 6,
+    'max_field_chars': 120,
+    # Line model: characters per body line, body lines per page, and whether
+    # skills share lines (comma separated) or take one line each
+    'chars_per_line': 95,
+    'lines_per_page': 52,
+    'inline_skills': False,
+}
+
+TEMPLATE_BUDGETS = {
+    # Dense one-page design: small type, narrow margins, comma-separated skills
+    'jakes_resume': {'chars_per_line': 110, 'lines_per_page': 60, 'inline_skills': True},
+    'free_resume': {'max_experience': 5, 'max_projects': 3},
+    'premium_resume': {},
+}
+
+# Fields shortened to max_field_chars wherever they appear
+SHORT_FIELDS = ('title', 'company', 'location', 'degree', 'institution', 'name', 'issuer')
+DATE_FIELDS = ('startDate', 'endDate', 'date')
+MAX_DATE_CHARS = 30
+
+def get_budget(template_name: str, target_pages: Optional[int] = None, line_scale: float = 1.0) -> Dict[str, Any]:
+    budget = dict(DEFAULT_BUDGET)
+    budget.update(TEMPLATE_BUDGETS.get(template_name, {}))
+    if target_pages:
+        budget['target_pages'] = target_pages
+    budget['line_scale'] = line_scale
+    return budget
+
+def shape_resume(data: Dict[str, Any], template_name: str, target_pages: Optional[int] = None,
+                 line_scale: float = 1.0) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Return a copy of the resume that fits the template's budgets, plus the list
+    of trims made (each with the path of what changed, the action and details).
+    `line_scale` is how much more a page holds than the line model assumes, for
+    layouts tighter than the template's default.
+    """
+    budget = get_budget(template_name, target_pages, line_scale)
+    shaped = copy.deepcopy(data)
+    trimmed: List[Dict[str, Any]] = []
+
+    _apply_item_budgets(shaped, budget, trimmed)
+    _fit_pages(shaped, budget, trimmed)
+    return shaped, trimmed
+
+def _truncate(text: Any, limit: int, path: str, trimmed: List[Dict[str, Any]]) -> Any:
+    if not isinstance(text, str) or len(text) <= limit:
+        return text
+    # Cut at a word boundary when one is reasonably close
+    cut = text[:limit - 3]
+    space = cut.rfind(' ')
+    if space > limit * 0.6:
+        cut = cut[:space]
+    trimmed.append({'path': path, 'action': 'truncated', 'original_length': len(text)})
+    return cut.rstrip(' ,;:-') + '...'
+
+def _cap_list(items: list, limit: int, path: str, trimmed: List[Dict[str, Any]]) -> list:
+    if len(items) <= limit:
+        return items
+    trimmed.append({'path': f"{path}[{limit}:]", 'action': 'dropped', 'count': len(items) - limit})
+    return items[:limit]
+
+def _shorten_fields(entry: Dict[str, Any], budget: Dict[str, Any], path: str, trimmed: List[Dict[str, Any]]) -> None:
+    for field in SHORT_FIELDS:
+        if field in entry:
+            entry[field] = _truncate(entry[field], budget['max_field_chars'], f"{path}.{field}", trimmed)
+    for field in DATE_FIELDS:
+        if field in entry:
+            entry[field] = _truncate(entry[field], MAX_DATE_CHARS, f"{path}.{field}", trimmed)
+
+def _entries(data: Dict[str, Any], section: str) -> list:
+    items = data.get(section)
+    return items if isinstance(items, list) else []
+
+def _apply_item_budgets(data: Dict[str, Any], budget: Dict[str, Any], trimmed: List[Dict[str, Any]]) -> None:
+    if isinstance(data.get('personalInfo'), dict):
+        _shorten_fields(data['personalInfo'], budget, 'personalInfo', trimmed)
+
+    data['summary'] = _truncate(data.get('summary'), budget['max_summary_chars'], 'summary', trimmed)
+    if data['summary'] is None:
+        del data['summary']
+
+    if isinstance(data.get('skills'), list):
+        skills = _cap_list(data['skills'], budget['max_skills'], 'skills', trimmed)
+        data['skills'] = [_truncate(skill, budget['max_skill_chars'], f"skills[{i}]", trimmed) for i, skill in enumerate(skills)]
+
+    experience = _entries(data, 'experience')
+    if len(experience) > budget['max_experience']:
+        # Older roles are merged into one entry rather than dropped
+        keep = budget['max_experience'] - 1
+        experience = experience[:keep] + [_merge_roles(experience[keep:], f"experience[{keep}:]", trimmed)]
+        data['experience'] = experience
+    for i, entry in enumerate(experience):
+        if not isinstance(entry, dict):
+            continue
+        path = f"experience[{i}]"
+        _shorten_fields(entry, budget, path, trimmed)
+        description = entry.get('description')
+        if isinstance(description, list):
+            description = _cap_list(description, budget['max_bullets'], f"{path}.description", trimmed)
+            entry['description'] = [
+                _truncate(bullet, budget['max_bullet_chars'], f"{path}.description[{j}]", trimmed)
+                for j, bullet in enumerate(description)
+            ]
+        else:
+            entry['description'] = _truncate(description, budget['max_bullet_chars'], f"{path}.description", trimmed)
+
+    if 'projects' in data and isinstance(data['projects'], list):
+        data['projects'] = _cap_list(data['projects'], budget['max_projects'], 'projects', trimmed)
+    for i, project in enumerate(_entries(data, 'projects')):
+        if not isinstance(project, dict):
+            continue
+        path = f"projects[{i}]"
+        _shorten_fields(project, budget, path, trimmed)
+        project['description'] = _truncate(project.get('description'), budget['max_project_description_chars'], f"{path}.description", trimmed)
+        if isinstance(project.get('technologies'), list):
+            project['technologies'] = _cap_list(project['technologies'], budget['max_technologies'], f"{path}.technologies", trimmed)
+
+    if 'education' in data and isinstance(data['education'], list):
+        data['education'] = _cap_list(data['education'], budget['max_education'], 'education', trimmed)
+    for i, entry in enumerate(_entries(data, 'education')):
+        if not isinstance(entry, dict):
+            continue
+        _shorten_fields(entry, budget, f"education[{i}]", trimmed)
+        if isinstance(entry.get('relevantCourses'), list):
+            entry['relevantCourses'] = _cap_list(entry['relevantCourses'], budget['max_courses'], f"education[{i}].relevantCourses", trimmed)
+
+    if 'certifications' in data and isinstance(data['certifications'], list):
+        data['certifications'] = _cap_list(data['certifications'], budget['max_certifications'], 'certifications', trimmed)
+    for i, cert in enumerate(_entries(data, 'certifications')):
+        if isinstance(cert, dict):
+            _shorten_fields(cert, budget, f"certifications[{i}]", trimmed)
+
+def _merge_roles(roles: list, path: str, trimmed: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Collapse several roles into one entry with a single line per role
+    """
+    roles = [role for role in roles if isinstance(role, dict)]
+    lines = []
+    for role in roles:
+        dates = ' - '.join(part for part in (role.get('startDate'), role.get('endDate')) if part)
+        line = ', '.join(part for part in (role.get('title'), role.get('company')) if part)
+        lines.append(f"{line} ({dates})" if dates else line)
+    trimmed.append({'path': path, 'action': 'merged', 'count': len(roles)})
+    return {
+        'title': 'Earlier Experience',
+        'company': '',
+        'location': '',
+        # Entries are newest first, so the span runs from the last role's start to the first role's end
+        'startDate': roles[-1].get('startDate', '') if roles else '',
+        'endDate': roles[0].get('endDate', '') if roles else '',
+        'description': lines or ['Additional roles'],
+        'merged': True
+    }
+
+def _text_lines(text: Any, chars_per_line: int) -> int:
+    if not text:
+        return 0
+    return max(1, math.ceil(len(str(text)) / chars_per_line))
+
+def estimate_lines(data: Dict[str, Any], budget: Dict[str, Any]) -> int:
+    """
+    Rough body-line count of the rendered resume under the template's line model
+    """
+    cpl = budget['chars_per_line']
+    # Bullets are indented, so they fit a little less per line
+    bullet_cpl = int(cpl * 0.92)
+    lines = 4  # name and contact block
+
+    if data.get('summary'):
+        lines += 2 + _text_lines(data['summary'], cpl)
+
+    skills = data.get('skills')
+    if isinstance(skills, list) and skills:
+        if budget['inline_skills']:
+            lines += 2 + _text_lines(', '.join(str(skill) for skill in skills), cpl)
+        else:
+            lines += 2 + len(skills)
+
+    experience = _entries(data, 'experience')
+    if experience:
+        lines += 2
+        for entry in experience:
+            description = entry.get('description') if isinstance(entry, dict) else None
+            bullets = description if isinstance(description, list) else [description]
+            lines += 2 + sum(_text_lines(bullet, bullet_cpl) for bullet in bullets if bullet)
+
+    education = _entries(data, 'education')
+    if education:
+        lines += 2 + sum(2 + (1 if isinstance(entry, dict) and entry.get('gpa') else 0) for entry in education)
+
+    projects = _entries(data, 'projects')
+    if projects:
+        lines += 2
+        for project in projects:
+            if isinstance(project, dict):
+                lines += 1 + _text_lines(project.get('description'), bullet_cpl) + (1 if project.get('technologies') else 0)
+
+    certifications = _entries(data, 'certifications')
+    if certifications:
+        lines += 2 + len(certifications)
+
+    return lines
+
+def estimate_pages(data: Dict[str, Any], budget: Dict[str, Any]) -> float:
+    return estimate_lines(data, budget) / budget['lines_per_page']
+
+def _fit_pages(data: Dict[str, Any], budget: Dict[str, Any], trimmed: List[Dict[str, Any]]) -> None:
+    max_lines = int(budget['target_pages'] * budget['lines_per_page'] * budget['line_scale'])
+    steps = [
+        _drop_bullet_from_longest_role,
+        _drop_last_project,
+        _merge_oldest_roles,
+        _drop_last_certification,
+        _drop_last_listed_skill,
+        _shorten_summary,
+        _drop_bullet_to_minimum_one,
+    ]
+    while estimate_lines(data, budget) > max_lines:
+        if not any(step(data, budget, trimmed) for step in steps):
+            break
+
+def _drop_bullet_from_longest_role(data, budget, trimmed, minimum=None) -> bool:
+    minimum = budget['min_bullets'] if minimum is None else minimum
+    candidates = [
+        (len(entry['description']), i) for i, entry in enumerate(_entries(data, 'experience'))
+        if isinstance(entry, dict) and not entry.get('merged')
+        and isinstance(entry.get('description'), list) and len(entry['description']) > minimum
+    ]
+    if not candidates:
+        return False
+    # Most bullets first, and the oldest role among equals
+    _, index = max(candidates)
+    description = data['experience'][index]['description']
+    trimmed.append({'path': f"experience[{index}].description[{len(description) - 1}]", 'action': 'dropped', 'count': 1})
+    description.pop()
+    return True
+
+def _drop_bullet_to_minimum_one(data, budget, trimmed) -> bool:
+    return _drop_bullet_from_longest_role(data, budget, trimmed, minimum=1)
+
+def _drop_last_project(data, budget, trimmed) -> bool:
+    projects = _entries(data, 'projects')
+    if len(projects) <= 1:
+        return False
+    trimmed.append({'path': f"projects[{len(projects) - 1}]", 'action': 'dropped', 'count': 1})
+    projects.pop()
+    return True
+
+def _merge_oldest_roles(data, budget, trimmed) -> bool:
+    experience = _entries(data, 'experience')
+    if len(experience) <= 2:
+        return False
+    if isinstance(experience[-1], dict) and experience[-1].get('merged'):
+        if len(experience) <= 3:
+            return False
+        # Fold the next oldest role into the existing merged entry
+        previous = experience[-2]
+        merged = _merge_roles([previous], f"experience[{len(experience) - 2}]", trimmed)
+        experience[-1]['description'] = merged['description'] + experience[-1]['description']
+        experience[-1]['endDate'] = merged['endDate'] or experience[-1]['endDate']
+        del experience[-2]
+        return True
+    start = len(experience) - 2
+    experience[start:] = [_merge_roles(experience[start:], f"experience[{start}:]", trimmed)]
+    return True
+
+def _drop_last_certification(data, budget, trimmed) -> bool:
+    certifications = _entries(data, 'certifications')
+    if len(certifications) <= 2:
+        return False
+    trimmed.append({'path': f"certifications[{len(certifications) - 1}]", 'action': 'dropped', 'count': 1})
+    certifications.pop()
+    return True
+
+def _drop_last_listed_skill(data, budget, trimmed) -> bool:
+    skills = data.get('skills')
+    if budget['inline_skills'] or not isinstance(skills, list) or len(skills) <= 8:
+        return False
+    trimmed.append({'path': f"skills[{len(skills) - 1}]", 'action': 'dropped', 'count': 1})
+    skills.pop()
+    return True
+
+def _shorten_summary(data, budget, trimmed) -> bool:
+    limit = budget['chars_per_line'] * 2
+    summary = data.get('summary')
+    if not isinstance(summary, str) or len(summary) <= limit:
+        return False
+    data['summary'] = _truncate(summary, limit, 'summary', trimmed)
+    return True
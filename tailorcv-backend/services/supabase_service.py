@@ -100,6 +100,48 @@ class SupabaseService:
         except Exception as e:
             print(f"Error logging generation: {str(e)}")
     
+    def save_generation(self, user_id: str, job_description: str, ip_address: str = 'unknown') -> None:
+        """
+        Log a resume generation for an authenticated user
+        """
+        try:
+            self.client.table('generations').insert({
+                'user_id': user_id,
+                'ip': ip_address,
+                'job_description_snippet': job_description[:200]
+            }).execute()
+        except Exception as e:
+            print(f"Error saving generation: {str(e)}")
+    
+    def upload_file(self, file_path: str, content: bytes, content_type: str, bucket: str = 'payments') -> None:
+        """
+        Upload raw file content to Supabase storage
+        """
+        try:
+            self.client.storage.from_(bucket).upload(
+                path=file_path,
+                file=content,
+                file_options={"content-type": content_type}
+            )
+        except Exception as e:
+            raise Exception(f"Failed to upload file to storage: {str(e)}")
+    
+    def get_public_url(self, file_path: str, bucket: str = 'payments') -> str:
+        """
+        Get the public URL of a file in Supabase storage
+        """
+        return self.client.storage.from_(bucket).get_public_url(file_path)
+    
+    def save_payment(self, email: str, screenshot_url: str) -> None:
+        """
+        Record a pending payment for admin review
+        """
+        self.create_payment_record({
+            'email': email,
+            'screenshot_url': screenshot_url,
+            'status': 'pending'
+        })
+    
     def upload_resume(self, file_path: str, filename: str) -> str:
         """
         Upload resume PDF to Supabase storage
@@ -0,0 +1,147 @@
+"""
+Shared Jinja environment for the LaTeX templates.
+
+Templates are precompiled to Python modules (at image build time with
+`python -m services.template_env`, otherwise on first use) and loaded through a
+ModuleLoader, so production workers never parse template source. Anything not
+precompiled falls back to the FileSystemLoader with an on-disk bytecode cache
+that all workers on the host share.
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import threading
+import jinja2
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, ModuleLoader, ChoiceLoader
+from typing import List, Optional
+
+TEMPLATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'templates'))
+
+LATEX_ENV_OPTIONS = dict(
+    trim_blocks=True,
+    lstrip_blocks=True,
+    # sanitize_for_latex escapes the data for LaTeX; HTML autoescaping would add entities on top
+    autoescape=False,
+    variable_start_string='((', # Use custom delimiters
+    variable_end_string='))',
+    comment_start_string='((#',  # Custom comment delimiters to avoid LaTeX conflicts
+    comment_end_string='#))',
+    block_start_string='((%',    # Custom block delimiters
+    block_end_string='%)',
+)
+
+_shared_env = None
+_env_lock = threading.Lock()
+
+def cache_dir() -> str:
+    return os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'tailorcv', 'templates'))
+
+def auto_reload_enabled() -> bool:
+    """
+    Auto-reload stats every template on each get_template call, so it is only
+    on in development (TEMPLATE_AUTO_RELOAD, defaulting to DEBUG).
+    """
+    setting = os.environ.get('TEMPLATE_AUTO_RELOAD')
+    if setting is None:
+        return os.environ.get('DEBUG') == 'True'
+    return setting.lower() in ('1', 'true', 'yes')
+
+def template_names(template_dir: str = TEMPLATE_DIR) -> List[str]:
+    return sorted(name for name in os.listdir(template_dir) if name.endswith('.tex'))
+
+def options_digest() -> str:
+    """
+    Hash of the Jinja version and environment options, which both change the compiled code
+    """
+    return hashlib.sha256(f"{jinja2.__version__}\0{sorted(LATEX_ENV_OPTIONS.items())!r}".encode()).hexdigest()[:16]
+
+def templates_digest(template_dir: str = TEMPLATE_DIR) -> str:
+    """
+    Hash of the template sources, Jinja version and environment options, so
+    edited templates or options never load stale compiled modules
+    """
+    digest = hashlib.sha256(options_digest().encode())
+    for name in template_names(template_dir):
+        digest.update(name.encode())
+        with open(os.path.join(template_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def compiled_templates_dir(template_dir: str = TEMPLATE_DIR) -> str:
+    return os.path.join(cache_dir(), 'compiled', templates_digest(template_dir))
+
+def compile_templates(template_dir: str = TEMPLATE_DIR) -> str:
+    """
+    Compile every template to a Python module and return the module directory.
+    Modules are written to a staging directory and renamed into place, so
+    workers compiling at the same time never import a half-written module.
+    """
+    target = compiled_templates_dir(template_dir)
+    if os.path.isdir(target):
+        return target
+
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix='.staging-')
+    try:
+        env = Environment(loader=FileSystemLoader(template_dir), **LATEX_ENV_OPTIONS)
+        env.compile_templates(
+            staging,
+            zip=None,
+            filter_func=lambda name: name.endswith('.tex'),
+            ignore_errors=False
+        )
+        os.rename(staging, target)
+    except OSError:
+        # Another worker finished first
+        if not os.path.isdir(target):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+def build_template_env(template_dir: str = TEMPLATE_DIR, auto_reload: Optional[bool] = None) -> Environment:
+    if auto_reload is None:
+        auto_reload = auto_reload_enabled()
+
+    loaders = []
+    if not auto_reload:
+        # Compiled modules are never re-checked against the sources, so only use them without auto-reload
+        try:
+            loaders.append(ModuleLoader(compile_templates(template_dir)))
+        except Exception as e:
+            print(f"⚠️ Could not precompile templates, loading from source: {e}")
+    loaders.append(FileSystemLoader(template_dir))
+
+    # Jinja's bytecode cache only checks the template source, so keep one per set of options
+    bytecode_dir = os.path.join(cache_dir(), 'bytecode', options_digest())
+    os.makedirs(bytecode_dir, exist_ok=True)
+
+    return Environment(
+        loader=ChoiceLoader(loaders),
+        bytecode_cache=FileSystemBytecodeCache(bytecode_dir),
+        auto_reload=auto_reload,
+        **LATEX_ENV_OPTIONS
+    )
+
+def get_template_env() -> Environment:
+    """
+    The environment shared by every LaTeXService in this process
+    """
+    global _shared_env
+    if _shared_env is None:
+        with _env_lock:
+            if _shared_env is None:
+                _shared_env = build_template_env()
+    return _shared_env
+
+if __name__ == '__main__':
+    # Build step: precompile the templates into the image
+    try:
+        print(f"Compiled templates to {compile_templates()}")
+    except Exception as e:
+        print(f"❌ Template compilation failed: {e}")
+        sys.exit(1)
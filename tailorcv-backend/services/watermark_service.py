@@ -0,0 +1,106 @@
+import io
+import threading
+from typing import Dict, Tuple
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ContentStream, DictionaryObject, NameObject
+from reportlab.pdfgen import canvas
+from reportlab.lib.colors import HexColor
+
+class WatermarkService:
+    """
+    Stamps the free-tier watermark onto an already rendered PDF.
+
+    The watermark is a single-page overlay (a faint diagonal mark plus a footer
+    line) rendered once per page size and merged onto every page, so free and
+    premium downloads can share one LaTeX compile.
+    """
+    DIAGONAL_TEXT = "Generated by TailorCV"
+    FOOTER_TEXT = "Generated by TailorCV - AI-Powered Resume Generator"
+
+    def __init__(self):
+        self._overlays: Dict[Tuple[int, int], bytes] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, pdf_bytes: bytes) -> bytes:
+        """Return a copy of the PDF with the watermark merged onto every page"""
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        writer = PdfWriter()
+        overlays = {}
+
+        for page in reader.pages:
+            size = (round(float(page.mediabox.width)), round(float(page.mediabox.height)))
+            if size not in overlays:
+                overlays[size] = PdfReader(io.BytesIO(self._overlay_for(*size))).pages[0]
+            page.merge_page(overlays[size])
+            writer.add_page(page)
+
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+    def _overlay_for(self, width: int, height: int) -> bytes:
+        """
+        Overlay PDF for a page size. Rendered bytes are cached; readers are not,
+        because a PdfReader is not safe to share between request threads.
+        """
+        with self._lock:
+            overlay = self._overlays.get((width, height))
+            if overlay is None:
+                overlay = self._overlays[(width, height)] = self._render_overlay(width, height)
+            return overlay
+
+    def _render_overlay(self, width: int, height: int) -> bytes:
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=(width, height), invariant=1)
+
+        # Faint diagonal mark across the middle of the page
+        pdf.saveState()
+        pdf.setFillColor(HexColor('#808080'))
+        pdf.setFillAlpha(0.08)
+        pdf.translate(width / 2, height / 2)
+        pdf.rotate(45)
+        pdf.setFont('Helvetica-Bold', min(width, height) / 9)
+        pdf.drawCentredString(0, 0, self.DIAGONAL_TEXT)
+        pdf.restoreState()
+
+        # Branding footer in the bottom margin
+        pdf.setFillColor(HexColor('#9ca3af'))
+        pdf.setFont('Helvetica', 8)
+        pdf.drawCentredString(width / 2, 20, self.FOOTER_TEXT)
+
+        pdf.showPage()
+        pdf.save()
+        return self._prefix_resource_names(buffer.getvalue())
+
+    def _prefix_resource_names(self, overlay_bytes: bytes) -> bytes:
+        """
+        ReportLab names resources /F1, /gRLs0, ..., which collide with ReportLab-rendered
+        resumes. merge_page renames colliding names with a random uuid, which would give
+        every stamped copy different bytes (and a different artifact id), so the overlay
+        gets names of its own.
+        """
+        reader = PdfReader(io.BytesIO(overlay_bytes))
+        page = reader.pages[0]
+        resources = page['/Resources'].get_object()
+
+        renamed = {}
+        for category in ('/Font', '/ExtGState'):
+            if category not in resources:
+                continue
+            entries = DictionaryObject()
+            for name, value in resources[category].get_object().items():
+                renamed[name] = NameObject(f"/TailorCVWatermark{name[1:]}")
+                entries[renamed[name]] = value
+            resources[NameObject(category)] = entries
+
+        content = ContentStream(page.get_contents(), reader)
+        for operands, operator in content.operations:
+            if operator in (b'Tf', b'gs') and operands and operands[0] in renamed:
+                operands[0] = renamed[operands[0]]
+        page[NameObject('/Contents')] = content
+
+        writer = PdfWriter()
+        writer.add_page(page)
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
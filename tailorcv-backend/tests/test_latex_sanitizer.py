@@ -0,0 +1,106 @@
+"""
+Equivalence tests for the translate-table sanitizer against the original
+regex-alternation implementation.
+
+Run from tailorcv-backend/ with `python -m pytest tests`. Random inputs come from
+a seeded generator, so a failure always reproduces with the same input.
+"""
+
+import re
+import random
+
+import pytest
+
+from services.latex_sanitizer import sanitize_for_latex
+
+# Written out rather than imported, so a change to LATEX_ESCAPES shows up here
+EXPECTED_ESCAPES = {
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+    '\\': r'\textbackslash{}',
+    '<': r'\textless{}',
+    '>': r'\textgreater{}',
+}
+
+_REFERENCE_PATTERN = re.compile('|'.join(re.escape(key) for key in sorted(EXPECTED_ESCAPES, key=len, reverse=True)))
+
+def reference_sanitize(text):
+    """
+    The original implementation: one regex alternation over the escape table
+    """
+    if not isinstance(text, str):
+        return ""
+    return _REFERENCE_PATTERN.sub(lambda match: EXPECTED_ESCAPES[match.group()], text)
+
+# Specials weighted heavily, plus the backslash sequences the escapes themselves
+# produce, whitespace, and non-ASCII letters, CJK, emoji and combining marks
+ALPHABET = (
+    list(EXPECTED_ESCAPES) * 3
+    + ['\\\\', '\\&', '\\textbackslash{}', '{}', '\\n', 'a', 'Z', '0', ' ', '.', '\n', '\t']
+    + ['é', 'ß', 'Ω', '中', '文', '😀', 'e\u0301', '\u00a0', '\u200b', '\U0001f9d1\u200d\U0001f4bb']
+)
+
+def random_strings(seed, count=2000, max_length=60):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+@pytest.mark.parametrize('char, escaped', sorted(EXPECTED_ESCAPES.items()))
+def test_each_special_character(char, escaped):
+    assert sanitize_for_latex(char) == escaped
+    assert sanitize_for_latex(f"a{char}b") == f"a{escaped}b"
+    assert sanitize_for_latex(char * 3) == escaped * 3
+
+def test_all_specials_together():
+    text = ''.join(EXPECTED_ESCAPES)
+    assert sanitize_for_latex(text) == reference_sanitize(text)
+
+def test_empty_and_plain_input():
+    assert sanitize_for_latex('') == ''
+    assert sanitize_for_latex('Senior Engineer, Acme Corp.') == 'Senior Engineer, Acme Corp.'
+
+@pytest.mark.parametrize('text', [
+    '\\', '\\\\', '\\' * 9, '\\&', '\\\\&', '\\textbf{x}', 'C:\\Users\\me', '\\{}', '}{', '$\\alpha$',
+])
+def test_backslash_sequences(text):
+    # Replacements are never rescanned, so escaping an escape sequence escapes every character once
+    assert sanitize_for_latex(text) == reference_sanitize(text)
+
+@pytest.mark.parametrize('text', [
+    'Zürich & München', 'café_au_lait', '東京 #1', '😀 100%', 'e\u0301t\u00e9 ~ ^', '\u200b{\u00a0}', 'Ωmega <3>',
+])
+def test_unicode(text):
+    assert sanitize_for_latex(text) == reference_sanitize(text)
+
+@pytest.mark.parametrize('value', [None, 42, 1.5, b'&', ['&'], {'a': '&'}])
+def test_non_strings(value):
+    assert sanitize_for_latex(value) == reference_sanitize(value) == ""
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_inputs_match_reference(seed):
+    for text in random_strings(seed):
+        assert sanitize_for_latex(text) == reference_sanitize(text), text
+
+@pytest.mark.parametrize('seed', range(3))
+def test_memoized_path_matches_reference(seed):
+    memo = {}
+    # Repeat a smaller pool so most calls are memo hits
+    pool = list(random_strings(seed, count=300))
+    rng = random.Random(seed)
+    for _ in range(3000):
+        text = rng.choice(pool)
+        assert sanitize_for_latex(text, memo) == reference_sanitize(text), text
+    assert all(memo[text] == reference_sanitize(text) for text in memo)
+
+def test_memo_is_keyed_by_input():
+    memo = {}
+    assert sanitize_for_latex('a&b', memo) == 'a\\&b'
+    assert sanitize_for_latex('a_b', memo) == 'a\\_b'
+    assert memo == {'a&b': 'a\\&b', 'a_b': 'a\\_b'}
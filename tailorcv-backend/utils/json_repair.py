@@ -0,0 +1,79 @@
+import json
+from typing import Dict, Any, Optional, Tuple
+
+# Cut points are tried from the end; a response never needs more than a few
+MAX_REPAIR_ATTEMPTS = 20
+
+def repair_truncated_json(text: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+    """
+    Salvage a JSON object that was cut off, e.g. by the output token limit.
+
+    The text is scanned for points where a top-level field, or an item of a
+    top-level list or object, has just been completed. The latest such point that
+    parses once the open structures are closed wins, so a half-written item is
+    dropped rather than kept. Returns the salvaged object and the top-level key
+    that was still being written at that point (None if the cut fell between
+    top-level fields), or None if nothing could be salvaged.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    # One frame per open container: [opening char, last key seen, expecting a key]
+    stack = []
+    cuts = []
+    in_string = False
+    escape = False
+    string_start = 0
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+                frame = stack[-1]
+                if frame[0] == '{' and frame[2]:
+                    frame[1] = text[string_start + 1:index]
+            continue
+
+        if char == '"':
+            in_string = True
+            string_start = index
+        elif char in '{[':
+            stack.append([char, None, char == '{'])
+        elif char in '}]':
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                # The object is complete; whatever made it fail to parse came after it
+                cuts.append((index + 1, '', None))
+                break
+            if len(stack) <= 2:
+                cuts.append((index + 1, _closers(stack), _open_key(stack)))
+        elif char == ',' and stack:
+            if len(stack) <= 2:
+                cuts.append((index, _closers(stack), _open_key(stack)))
+            if stack[-1][0] == '{':
+                stack[-1][2] = True
+        elif char == ':' and stack:
+            stack[-1][2] = False
+
+    for end, closers, open_key in reversed(cuts[-MAX_REPAIR_ATTEMPTS:]):
+        try:
+            data = json.loads(text[start:end] + closers)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data, open_key
+    return None
+
+def _closers(stack) -> str:
+    return ''.join('}' if frame[0] == '{' else ']' for frame in reversed(stack))
+
+def _open_key(stack) -> Optional[str]:
+    # Only a field whose value is itself still open counts as unfinished
+    return stack[0][1] if len(stack) > 1 else None
@@ -0,0 +1,270 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Latency buckets in seconds, from sub-millisecond sanitizing up to the 120 s gunicorn timeout
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, label_names: Optional[List[str]] = None):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names or ())
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(Counter):
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Optional[List[str]] = None,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += series[i]
+                le_label = 'le="%s"' % (_format_value(bound) if bound == float('inf') else repr(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry rendered in the Prometheus text format.
+    Each gunicorn worker keeps its own registry, so scrape every worker or sum in Prometheus.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Optional[List[str]] = None) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names: Optional[List[str]] = None) -> Gauge:
+        return self._register(Gauge(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Optional[List[str]] = None,
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def render(self) -> str:
+        """
+        Render every metric, plus the derived fallback rate, cache hit ratios and lint accuracy
+        """
+        self._update_ratios()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _update_ratios(self) -> None:
+        latex = pdf_renders.get(renderer='latex')
+        fallback = pdf_renders.get(renderer='fallback')
+        if latex + fallback:
+            pdf_fallback_ratio.set(fallback / (latex + fallback))
+
+        with cache_requests._lock:
+            totals: Dict[str, List[float]] = {}
+            for (cache, result), value in cache_requests._values.items():
+                hits_and_total = totals.setdefault(cache, [0, 0])
+                if result == 'hit':
+                    hits_and_total[0] += value
+                hits_and_total[1] += value
+        for cache, (hits, total) in totals.items():
+            if total:
+                cache_hit_ratio.set(hits / total, cache=cache)
+
+        with latex_lint_outcomes._lock:
+            audited = [(key, value) for key, value in latex_lint_outcomes._values.items() if key[1] != 'skipped']
+        audited_total = sum(value for _, value in audited)
+        if audited_total:
+            correct = sum(value for (predicted, actual), value in audited if predicted == actual)
+            latex_lint_accuracy.set(correct / audited_total)
+
+# Global registry and the metrics shared across the app and services
+metrics = MetricsRegistry()
+
+stage_latency = metrics.histogram(
+    'tailorcv_stage_duration_seconds',
+    'Latency of each resume generation pipeline stage',
+    ['stage']
+)
+pdf_renders = metrics.counter(
+    'tailorcv_pdf_renders_total',
+    'PDFs produced, by renderer (latex, fallback, or draft for draft-first previews)',
+    ['renderer']
+)
+pdf_fallback_ratio = metrics.gauge(
+    'tailorcv_pdf_fallback_ratio',
+    'Share of PDFs rendered by the ReportLab fallback instead of LaTeX'
+)
+cache_requests = metrics.counter(
+    'tailorcv_cache_requests_total',
+    'Cache lookups, by cache and result (hit or miss)',
+    ['cache', 'result']
+)
+cache_hit_ratio = metrics.gauge(
+    'tailorcv_cache_hit_ratio',
+    'Hit ratio of each cache since the worker started',
+    ['cache']
+)
+latex_lint_outcomes = metrics.counter(
+    'tailorcv_latex_lint_outcomes_total',
+    'Pre-compile lint predictions (pass or fail) against the compile result (pass, fail, or skipped)',
+    ['predicted', 'actual']
+)
+latex_lint_accuracy = metrics.gauge(
+    'tailorcv_latex_lint_accuracy',
+    'Share of lint predictions that matched the compile result, over compiles that actually ran'
+)
+latex_lint_repairs = metrics.counter(
+    'tailorcv_latex_lint_repairs_total',
+    '\\href URLs repaired in rendered LaTeX before compiling'
+)
+latex_jobs = metrics.counter(
+    'tailorcv_latex_jobs_total',
+    'pdflatex jobs by outcome: ok, error, or killed by a limit (timeout, cpu_limit, output_limit, killed)',
+    ['outcome']
+)
+resume_trims = metrics.counter(
+    'tailorcv_resume_trims_total',
+    'Content trimmed from tailored resumes to fit template budgets, by section and action (truncated, dropped, merged)',
+    ['section', 'action']
+)
+page_fit_outcomes = metrics.counter(
+    'tailorcv_page_fit_total',
+    'One-page fit renders by final layout, number of compiles (1 or 2) and whether the result fit on one page',
+    ['layout', 'compiles', 'fit']
+)
+llm_section_requests = metrics.counter(
+    'tailorcv_llm_section_requests_total',
+    'Per-section Gemini requests in sectional tailoring, by section and outcome (ok, retried, failed)',
+    ['section', 'outcome']
+)
+llm_prompt_tokens = metrics.histogram(
+    'tailorcv_llm_prompt_tokens',
+    'Prompt tokens per Gemini request, after boilerplate stripping and budgeting, by request (full, passthrough, section or continuation)',
+    ['request'],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+llm_output_tokens = metrics.histogram(
+    'tailorcv_llm_output_tokens',
+    'Output tokens per Gemini request: full resume, passthrough (static sections parsed locally), section or continuation',
+    ['request'],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000)
+)
+llm_json_outcomes = metrics.counter(
+    'tailorcv_llm_json_outcomes_total',
+    'Parsing of full Gemini responses: complete, repaired (salvaged from a cut-off response), continued (completed by a continuation request) or failed',
+    ['outcome']
+)
+background_renders = metrics.counter(
+    'tailorcv_background_renders_total',
+    'Background final renders behind draft-first previews, by outcome (done, or failed and resolved to the draft)',
+    ['outcome']
+)
+
+@contextmanager
+def timed(stage: str):
+    """
+    Record the duration of a pipeline stage, including stages that raise
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(time.perf_counter() - start, stage=stage)
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Count a cache lookup for the hit ratio export
+    """
+    cache_requests.inc(cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,237 @@
+import os
+import sys
+import hmac
+import time
+import uuid
+import tempfile
+import functools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional
+
+# The profiler sampling the work of the current thread, if any
+_current = threading.local()
+
+class SamplingProfiler:
+    """
+    Samples the call stacks of a request's threads from a background thread.
+
+    The request thread is sampled from start to stop. Work it hands to pool
+    threads (section calls, batch LLM calls, renders) is sampled while it runs
+    there, if it was wrapped with `propagate`; those stacks are rooted at the
+    pool thread's name so they show up separately. Only the profiled request
+    pays for sampling; nothing is installed globally, so other requests in the
+    same worker run untouched.
+    """
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        # Pool threads currently running work for this request, by thread id, with their names
+        self._workers: Dict[int, str] = {}
+        self._workers_lock = threading.Lock()
+        self.worker_threads = set()
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='tailorcv-profiler', daemon=True)
+
+    def start(self) -> None:
+        self.started_at = time.time()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.time() - self.started_at
+
+    def add_worker(self, thread_id: int, name: str) -> None:
+        with self._workers_lock:
+            self._workers[thread_id] = name
+            self.worker_threads.add(name)
+
+    def remove_worker(self, thread_id: int) -> None:
+        with self._workers_lock:
+            self._workers.pop(thread_id, None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._workers_lock:
+                threads = [(self.thread_id, None)] + list(self._workers.items())
+            for thread_id, name in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                if name:
+                    stack.append(f"[{name}]")
+                self.samples[';'.join(reversed(stack))] += 1
+                self.sample_count += 1
+
+    def top_functions(self, limit: int = 25) -> List[tuple]:
+        """
+        Functions ranked by samples where they were on top of the stack (self time)
+        """
+        self_samples: Counter = Counter()
+        for stack, count in self.samples.items():
+            leaf = stack.rsplit(';', 1)[-1]
+            self_samples[leaf.rsplit(':', 1)[0]] += count
+        return self_samples.most_common(limit)
+
+    def render(self, label: str) -> str:
+        """
+        Render a summary followed by collapsed stacks (flamegraph.pl / speedscope format)
+        """
+        lines = [
+            f"# profile: {label}",
+            f"# started: {time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at))}",
+            f"# duration_seconds: {self.duration:.3f}",
+            f"# interval_seconds: {self.interval}",
+            f"# samples: {self.sample_count}",
+            f"# worker threads: {', '.join(sorted(self.worker_threads)) or 'none'}",
+            "# top functions by self samples:",
+        ]
+        for function, count in self.top_functions():
+            share = count / self.sample_count * 100 if self.sample_count else 0
+            lines.append(f"#   {share:5.1f}%  {count:6d}  {function}")
+        lines.append("")
+        for stack, count in self.samples.most_common():
+            lines.append(f"{stack} {count}")
+        return '\n'.join(lines) + '\n'
+
+def propagate(fn: Callable) -> Callable:
+    """
+    Wrap `fn`, about to be handed to another thread, so that it is sampled by the
+    profiler of the submitting thread while it runs. Returns `fn` unchanged when
+    the current thread is not being profiled.
+    """
+    profiler = getattr(_current, 'profiler', None)
+    if profiler is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        thread_id = threading.get_ident()
+        previous = getattr(_current, 'profiler', None)
+        # Work this thread hands on in turn is sampled by the same profiler
+        _current.profiler = profiler
+        profiler.add_worker(thread_id, threading.current_thread().name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.remove_worker(thread_id)
+            _current.profiler = previous
+    return run
+
+class ProfileRing:
+    """
+    Keeps the most recent captured profiles on disk, dropping the oldest beyond `max_profiles`
+    """
+    def __init__(self, directory: Optional[str] = None, max_profiles: Optional[int] = None):
+        self.directory = directory or os.environ.get(
+            'PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'tailorcv', 'profiles')
+        )
+        self.max_profiles = max_profiles or int(os.environ.get('PROFILE_RING_SIZE', 20))
+        self._lock = threading.Lock()
+
+    def save(self, content: str) -> str:
+        profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path_for(profile_id), 'w', encoding='utf-8') as f:
+                f.write(content)
+            self._trim()
+        return profile_id
+
+    def load(self, profile_id: str) -> Optional[str]:
+        if not profile_id or os.path.basename(profile_id) != profile_id:
+            return None
+        try:
+            with open(self._path_for(profile_id), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for name in self._profile_names():
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            profiles.append({
+                'id': name[:-len('.prof.txt')],
+                'size_bytes': stat.st_size,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stat.st_mtime))
+            })
+        return profiles
+
+    def _path_for(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.prof.txt")
+
+    def _profile_names(self) -> List[str]:
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.prof.txt')]
+        except FileNotFoundError:
+            return []
+        # Ids start with a millisecond timestamp, so name order is age order
+        return sorted(names, reverse=True)
+
+    def _trim(self) -> None:
+        for name in self._profile_names()[self.max_profiles:]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling, authorized by the PROFILER_TOKEN admin secret.
+
+    A request asks for profiling with the `X-Profile-Token` header; the token is
+    never read from the query string, which ends up in access logs and browser
+    history. Profiling stays disabled while no token is configured.
+    """
+    def __init__(self, ring: Optional[ProfileRing] = None):
+        self.token = os.environ.get('PROFILER_TOKEN')
+        self.interval = float(os.environ.get('PROFILER_INTERVAL_MS', 5)) / 1000
+        self.ring = ring or ProfileRing()
+
+    def is_authorized(self, supplied_token: Optional[str]) -> bool:
+        if not self.token or not supplied_token:
+            return False
+        return hmac.compare_digest(self.token.encode(), supplied_token.encode())
+
+    def is_requested(self, request) -> bool:
+        supplied = request.headers.get('X-Profile-Token')
+        # Cheap early exit keeps unprofiled requests free of any profiling work
+        if not supplied:
+            return False
+        return self.is_authorized(supplied)
+
+    @contextmanager
+    def capture(self):
+        """
+        Sample the current thread, and the work it passes on through `propagate`,
+        for the duration of the block
+        """
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        previous = getattr(_current, 'profiler', None)
+        _current.profiler = profiler
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            _current.profiler = previous
+
+    def save(self, profiler: SamplingProfiler, label: str) -> str:
+        return self.ring.save(profiler.render(label))
@@ -16,9 +16,10 @@ class RateLimiter:
         self.requests: Dict[str, list] = {}
         self.blocked_ips: Dict[str, datetime] = {}
         
-    def allow_request(self, ip_address: str) -> bool:
+    def allow_request(self, ip_address: str, cost: int = 1) -> bool:
         """
-        Check if request is allowed for given IP address
+        Check if request is allowed for given IP address. A batch request
+        counts as `cost` requests.
         """
         now = datetime.now()
         
@@ -40,13 +41,15 @@ class RateLimiter:
         current_requests = self.requests[ip_address]
         
         # Check if limit exceeded
-        if len(current_requests) >= self.max_requests:
-            # Block IP for extended period
-            self.blocked_ips[ip_address] = now + timedelta(minutes=self.window_minutes * 2)
+        if len(current_requests) + cost > self.max_requests:
+            # Block IP for extended period once the limit is used up; a batch
+            # larger than what is left is only refused
+            if len(current_requests) >= self.max_requests:
+                self.blocked_ips[ip_address] = now + timedelta(minutes=self.window_minutes * 2)
             return False
         
         # Add current request
-        current_requests.append(now)
+        current_requests.extend([now] * cost)
         
         return True
     
@@ -119,8 +119,8 @@ def validate_name(name: str) -> bool:
     if len(name.strip()) < 2 or len(name) > 100:
         return False
     
-    # Check for valid characters (letters, spaces, hyphens, apostrophes)
-    name_pattern = r"^[a-zA-Z\s\-'\.]+$"
+    # Check for valid characters (letters in any script, spaces, hyphens, apostrophes)
+    name_pattern = r"^(?:[^\W\d_]|[\s\-'\.])+$"
     return re.match(name_pattern, name) is not None
 
 def validate_location(location: str) -> bool:
@@ -149,8 +149,8 @@ def validate_skill(skill: str) -> bool:
     if len(skill.strip()) < 1 or len(skill) > 50:
         return False
     
-    # Check for valid characters
-    skill_pattern = r"^[a-zA-Z0-9\s\-\+\#\.]+$"
+    # Check for valid characters (allows names like C/C++, R&D and Node.js (Express))
+    skill_pattern = r"^[\w\s\-\+\#\./&\(\),':]+$"
     return re.match(skill_pattern, skill) is not None
 
 def validate_company_name(company: str) -> bool:
@@ -165,7 +165,7 @@ def validate_company_name(company: str) -> bool:
         return False
     
     # Check for valid characters
-    company_pattern = r"^[a-zA-Z0-9\s\-\.,&]+$"
+    company_pattern = r"^[\w\s\-\.,&'\(\)/\+:!#]+$"
     return re.match(company_pattern, company) is not None
 
 def validate_date(date_str: str) -> bool:
@@ -217,10 +217,14 @@ def validate_resume_data(resume_data: dict) -> tuple[bool, str]:
         
         # Validate personal info
         personal_info = resume_data['personalInfo']
+        if not isinstance(personal_info, dict):
+            return False, "Personal info must be an object"
+
         if not validate_name(personal_info.get('name', '')):
             return False, "Invalid name format"
         
-        if not validate_email(personal_info.get('email', '')):
+        # Resumes without an email address are allowed, malformed ones are not
+        if personal_info.get('email') and not validate_email(personal_info['email']):
             return False, "Invalid email format"
         
         # Validate skills
@@ -238,8 +242,24 @@ def validate_resume_data(resume_data: dict) -> tuple[bool, str]:
             return False, "Experience must be a list"
         
         for exp in experience:
+            if not isinstance(exp, dict):
+                return False, "Experience entries must be objects"
             if not validate_company_name(exp.get('company', '')):
                 return False, f"Invalid company name: {exp.get('company', '')}"
+            description = exp.get('description', [])
+            if not isinstance(description, (list, str)) or (
+                isinstance(description, list) and not all(isinstance(item, str) for item in description)
+            ):
+                return False, "Experience descriptions must be a list of strings"
+
+        if not isinstance(resume_data['summary'], str):
+            return False, "Summary must be a string"
+
+        # The remaining sections are optional, but must be lists of entries when present
+        for field in ('education', 'projects', 'certifications'):
+            entries = resume_data.get(field, [])
+            if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+                return False, f"{field.capitalize()} must be a list of objects"
         
         return True, "Valid resume data"
         